@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import re
+from typing import Dict, Iterable, List, Tuple, Union
+
+from .KappaAgent import KappaAgent
+from .KappaSite import KappaPort, KappaCounter, KappaSite
+
+_bond_id_pat = re.compile(r'\[\d+\]')
+
+
+def _get_site_name(site: KappaSite) -> str:
+    """Returns the name of a port or counter."""
+    return site.get_port_name() if type(site) is KappaPort else site.get_counter_name()
+
+
+def _site_embeds(query_site: KappaSite, agent_site: KappaSite) -> bool:
+    """Returns true if the query site embeds in the agent site, with the semantics of KappaAgent containment. Both sites
+    must share their name."""
+    if type(query_site) is KappaPort:
+        return type(agent_site) is KappaPort and query_site in agent_site
+    return type(agent_site) is KappaCounter and query_site == agent_site
+
+
+class AgentPatternBatch:
+    """Class for answering many single-agent patterns, e.g. site-state queries like 'A(s{ph})' or 'B(x[_] y{u}[.])', in
+    a single traversal of a complex or snapshot. Patterns are grouped by agent name, and their sites are deduplicated,
+    so each agent is visited once, and each distinct query site is tested once per agent, against the agent's sites of
+    the same name. Results follow the semantics of KappaAgent containment, i.e. of get_number_of_embeddings_of_agent
+    and get_abundance_of_agent, and are aligned with the order of the patterns. The matches of each agent seen are
+    remembered, so a batch can be reused across snapshots that share agents. Unless a pattern names a bond identifier,
+    a port bound through an identifier embeds exactly the patterns a port bound to anything, [_], does; agents are then
+    remembered with their bond identifiers erased, so the many agents that only differ in them are tested once."""
+
+    def __init__(self, patterns: Iterable[Union[str, KappaAgent]]):
+        self._patterns: List[KappaAgent]
+        self._pattern_groups: Dict[str, Tuple[List[KappaSite], List[Tuple[int, List[int]]]]]
+        self._agent_matches: Dict[Union[KappaAgent, str], Tuple[int, ...]]
+        self._erase_bond_ids: bool
+
+        # type the patterns into Agents, if they're not already
+        self._patterns = [pattern if type(pattern) is KappaAgent else KappaAgent(pattern) for pattern in patterns]
+        # per agent name: the distinct query sites, and each pattern as its index and the indexes of its query sites
+        self._pattern_groups = dict()
+        # sites are told apart by their canonical expression, which also tells ports from counters
+        group_site_codes = dict()
+        for pattern_index, pattern in enumerate(self._patterns):
+            query_sites, group_patterns = self._pattern_groups.setdefault(pattern.get_agent_name(), ([], []))
+            site_codes = group_site_codes.setdefault(pattern.get_agent_name(), dict())
+            site_indexes = []
+            for site in pattern.get_agent_signature():
+                if str(site) not in site_codes:
+                    site_codes[str(site)] = len(query_sites)
+                    query_sites.append(site)
+                site_indexes.append(site_codes[str(site)])
+            group_patterns.append((pattern_index, site_indexes))
+        self._agent_matches = dict()
+        self._erase_bond_ids = not any([type(site) is KappaPort and site.get_port_current_bond().isdigit()
+                                        for pattern in self._patterns for site in pattern.get_agent_signature()])
+
+    def __repr__(self) -> str:
+        return '{0}({1} patterns)'.format(self.__class__.__name__, len(self._patterns))
+
+    def _match_agent(self, agent: KappaAgent) -> Tuple[int, ...]:
+        """Returns the indexes of the patterns that embed in an agent."""
+        agent_key = _bond_id_pat.sub('[_]', str(agent)) if self._erase_bond_ids else agent
+        matches = self._agent_matches.get(agent_key)
+        if matches is None:
+            pattern_group = self._pattern_groups.get(agent.get_agent_name())
+            if pattern_group is None:
+                matches = ()
+            else:
+                query_sites, group_patterns = pattern_group
+                agent_sites = dict()
+                for site in agent.get_agent_signature():
+                    agent_sites.setdefault(_get_site_name(site), []).append(site)
+                hits = [any(_site_embeds(query_site, agent_site)
+                            for agent_site in agent_sites.get(_get_site_name(query_site), []))
+                        for query_site in query_sites]
+                matches = tuple([pattern_index for pattern_index, site_indexes in group_patterns
+                                 if all(hits[site_index] for site_index in site_indexes)])
+            self._agent_matches[agent_key] = matches
+        return matches
+
+    def get_patterns(self) -> List[KappaAgent]:
+        """Returns the list of KappaAgents used as patterns, in the order results are given in."""
+        return list(self._patterns)
+
+    def count_in_agents(self, agents: Iterable[KappaAgent], weight: int = 1) -> List[int]:
+        """Returns the number of agents each pattern embeds in, each agent counting as weight."""
+        counts = [0] * len(self._patterns)
+        for agent in agents:
+            for pattern_index in self._match_agent(agent):
+                counts[pattern_index] += weight
+        return counts
+
+    def count_in_complex(self, kappa_complex) -> List[int]:
+        """Returns the number of embeddings of each pattern on a KappaComplex. Does not follow bonds."""
+        return self.count_in_agents(kappa_complex.get_all_agents())
+
+    def count_in_snapshot(self, snapshot) -> List[int]:
+        """Returns the abundance of each pattern in a snapshot, i.e. the number of embeddings of each pattern on each
+        complex, weighed by the complex's abundance. The snapshot can be a KappaSnapshot or a KappaSnapshotReader,
+        which is then streamed in a single pass."""
+        counts = [0] * len(self._patterns)
+        for kappa_complex, abundance in snapshot.get_all_complexes_and_abundances():
+            for agent in kappa_complex.get_all_agents():
+                for pattern_index in self._match_agent(agent):
+                    counts[pattern_index] += abundance
+        return counts
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import os
+import secrets
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+
+def _open_exclusive(file_name: str, flags: int) -> int:
+    """Opener failing if the file already exists, and otherwise creating it with the mode open() would use."""
+    return os.open(file_name, flags | os.O_EXCL, 0o666)
+
+
+def _create_temp_file(directory: str, mode: str) -> IO:
+    """Creates a new temporary file in directory, opened with mode. Unlike tempfile's, which are owner-only, it is
+    created with the permissions any new file gets, which the kernel derives from the umask; reading the umask instead
+    would mean setting it, process-wide, for a moment."""
+    while True:
+        temp_file_name = os.path.join(directory, 'tmp' + secrets.token_hex(8) + '.tmp')
+        try:
+            return open(temp_file_name, mode, opener=_open_exclusive)
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def atomic_write(file_name: str, mode: str = 'wb') -> Iterator[IO]:
+    """Context manager yielding a temporary file, in the same directory as file_name, that replaces file_name once the
+    block exits without error, so readers never see a partial file. The result gets the permissions a newly created file
+    would, from the umask, rather than the owner-only ones of temporary files. If the block raises, the temporary file
+    is removed, and the target left as it was."""
+    temp_file = _create_temp_file(os.path.dirname(os.path.abspath(file_name)), mode)
+    try:
+        with temp_file:
+            yield temp_file
+        os.replace(temp_file.name, file_name)
+    except BaseException:
+        if os.path.isfile(temp_file.name):
+            os.remove(temp_file.name)
+        raise
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+import re
+from typing import Dict, List, Tuple
+
+from .KappaAgent import KappaAgent
+from .KappaSite import KappaPort
+from .AgentPatternBatch import AgentPatternBatch
+from .KappaError import ComplexParseError
+from .KappaScanner import scan_agents
+
+_bond_id_pat = re.compile(r'\[\d+\]')
+
+
+def _get_bond_partners(agents: List[KappaAgent], expression: str) -> Dict[Tuple[int, str], Tuple[int, str]]:
+    """Returns a dictionary from each bound port, as the index of its agent and its name, to the port at the other end
+    of its bond. Raises a ValueError for bonds without exactly two ends."""
+    bond_ends = dict()
+    for agent_index, agent in enumerate(agents):
+        for site in agent.get_agent_signature():
+            if type(site) is KappaPort and site.get_port_current_bond().isdigit():
+                bond_ends.setdefault(site.get_port_current_bond(), []).append((agent_index, site.get_port_name()))
+    partners = dict()
+    for bond_id, ends in bond_ends.items():
+        if len(ends) != 2:
+            raise ValueError('Bond <' + bond_id + '> has ' + str(len(ends)) + ' ends in <' + expression + '>')
+        partners[ends[0]] = ends[1]
+        partners[ends[1]] = ends[0]
+    return partners
+
+
+class ComplexPattern:
+    """Class for counting the embeddings of a connected, multi-agent pattern, e.g. 'A(b[1]), B(a[1] s{p})', into
+    complexes. Kappa embeddings are rigid: once one agent of the pattern is mapped onto an agent of the complex, the
+    bonds of the pattern determine where every other agent goes. The matcher picks as root the pattern agent with the
+    fewest candidates in the complex, tries each candidate, and follows the bonds of a spanning tree of the pattern; the
+    bonds left out of the tree, which close its cycles, are then checked. Candidates are the agents whose sites embed
+    those of the pattern agent, with the semantics of KappaAgent containment, a bond in the pattern requiring a bond in
+    the complex. Those per-agent tests are shared across complexes through an AgentPatternBatch.
+
+    Embeddings are counted as injective maps from pattern agents to complex agents, so a symmetric pattern, e.g. the
+    dimer 'A(a[1]), A(a[1])', is counted once per automorphism."""
+
+    def __init__(self, pattern):
+        self._pattern: str
+        self._agents: List[KappaAgent]
+        self._local_patterns: AgentPatternBatch
+        self._tree_steps: List[Tuple[int, str, int, str]]
+        self._cycle_bonds: List[Tuple[int, str, int, str]]
+        self._composition: Dict[str, int]
+
+        if type(pattern) is str:
+            agents = scan_agents(pattern)
+            if len(agents) == 0:
+                raise ComplexParseError('Complex <' + pattern + '> appears to have zero agents.')
+        else:
+            agents = pattern.get_all_agents()
+        self._agents = list(agents)
+        self._pattern = ', '.join([str(agent) for agent in self._agents])
+        # local tests: each pattern agent, with its bond identifiers erased, as bonds are followed separately
+        self._local_patterns = AgentPatternBatch([_bond_id_pat.sub('[_]', str(agent)) for agent in self._agents])
+        self._composition = dict()
+        for agent in self._agents:
+            self._composition[agent.get_agent_name()] = self._composition.get(agent.get_agent_name(), 0) + 1
+        # spanning tree of the pattern, as steps from a reached agent, through a port, to a new agent and its port
+        partners = _get_bond_partners(self._agents, self._pattern)
+        self._tree_steps = []
+        self._cycle_bonds = []
+        reached = {0}
+        frontier = [0]
+        while frontier:
+            agent_index = frontier.pop(0)
+            for site in self._agents[agent_index].get_agent_signature():
+                end = (agent_index, site.get_port_name()) if type(site) is KappaPort else None
+                if end not in partners:
+                    continue
+                other_index, other_site = partners[end]
+                if other_index not in reached:
+                    reached.add(other_index)
+                    frontier.append(other_index)
+                    self._tree_steps.append((agent_index, end[1], other_index, other_site))
+                elif end < (other_index, other_site) and \
+                        (agent_index, end[1], other_index, other_site) not in self._tree_steps and \
+                        (other_index, other_site, agent_index, end[1]) not in self._tree_steps:
+                    self._cycle_bonds.append((agent_index, end[1], other_index, other_site))
+        if len(reached) != len(self._agents):
+            raise ValueError('Pattern <' + self._pattern + '> is not connected.')
+
+    def __repr__(self) -> str:
+        return '{0}(\'{1}\')'.format(self.__class__.__name__, self._pattern)
+
+    def get_pattern(self) -> str:
+        """Returns the expression of the pattern, with its agents in the order the matcher uses."""
+        return self._pattern
+
+    def get_pattern_composition(self) -> Dict[str, int]:
+        """Returns a dictionary with the number of agents of each name in the pattern. A complex holding fewer agents of
+        any of those names can not embed the pattern."""
+        return self._composition
+
+    def count_in_complex(self, kappa_complex) -> int:
+        """Returns the number of embeddings of the pattern into a KappaComplex."""
+        agents = kappa_complex.get_all_agents()
+        # per-agent-type candidate filtering: the complex agents each pattern agent may be mapped onto
+        candidates = [set() for _ in self._agents]
+        for agent_index, agent in enumerate(agents):
+            for pattern_index in self._local_patterns._match_agent(agent):
+                candidates[pattern_index].add(agent_index)
+        if not all(candidates):
+            return 0
+        partners = _get_bond_partners(agents, str(kappa_complex))
+        # re-root the spanning tree at the pattern agent with the fewest candidates
+        root = min(range(len(self._agents)), key=lambda pattern_index: len(candidates[pattern_index]))
+        steps = self._get_steps_from(root)
+        embeddings = 0
+        for root_image in candidates[root]:
+            mapping = {root: root_image}
+            images = {root_image}
+            for from_index, from_site, to_index, to_site in steps:
+                image = partners.get((mapping[from_index], from_site))
+                if image is None or image[1] != to_site or image[0] not in candidates[to_index] or image[0] in images:
+                    break
+                mapping[to_index] = image[0]
+                images.add(image[0])
+            else:
+                if all([partners.get((mapping[from_index], from_site)) == (mapping[to_index], to_site)
+                        for from_index, from_site, to_index, to_site in self._cycle_bonds]):
+                    embeddings += 1
+        return embeddings
+
+    def _get_steps_from(self, root: int) -> List[Tuple[int, str, int, str]]:
+        """Returns the bonds of the spanning tree, oriented and ordered so that they are followed from the root."""
+        bonds = self._tree_steps
+        steps = []
+        reached = {root}
+        while len(steps) < len(bonds):
+            for from_index, from_site, to_index, to_site in bonds:
+                if from_index in reached and to_index not in reached:
+                    steps.append((from_index, from_site, to_index, to_site))
+                    reached.add(to_index)
+                elif to_index in reached and from_index not in reached:
+                    steps.append((to_index, to_site, from_index, from_site))
+                    reached.add(from_index)
+        return steps
+
+    def count_in_snapshot(self, snapshot) -> int:
+        """Returns the number of embeddings of the pattern into a snapshot, i.e. its number of embeddings into each
+        complex, weighed by the complex's abundance. The snapshot can be a KappaSnapshot or a KappaSnapshotReader."""
+        embeddings = 0
+        for kappa_complex, abundance in snapshot.get_all_complexes_and_abundances():
+            embeddings += self.count_in_complex(kappa_complex) * abundance
+        return embeddings
@@ -11,6 +11,8 @@ from .KappaError import AgentParseError, TokenParseError, PortParseError, Counte
 class KappaAgent(KappaEntity):
     """Class for representing Kappa agents. I.e. <<A(b[1])>> or <<A(s{a}[.] a[1] b[.])>>."""
 
+    __slots__ = ('_raw_expression', '_agent_name', '_agent_signature', '_abundance_change')
+
     def __init__(self, expression: str):
         self._raw_expression: str
         self._agent_name: str
@@ -60,6 +62,20 @@ class KappaAgent(KappaEntity):
             ' '.join([str(site) for site in self._agent_signature]) + \
             ')' + self._abundance_change
 
+    @classmethod
+    def _from_parts(cls, expression: str, agent_name: str, agent_signature: List[KappaSite]) -> 'KappaAgent':
+        """Builds an agent out of its name and its already-built sites, as tokenized by the snapshot scanner. The
+        signature must already be sorted as the initializer would sort it; no abundance change operation is set."""
+        agent = cls.__new__(cls)
+        agent._raw_expression = expression
+        agent._agent_name = agent_name
+        agent._agent_signature = agent_signature
+        agent._abundance_change = ''
+        kappa_expression = agent_name + '(' + ' '.join([str(site) for site in agent_signature]) + ')'
+        # when the expression is already canonical, share the string instead of holding two copies
+        agent._kappa_expression = expression if kappa_expression == expression else kappa_expression
+        return agent
+
     def __contains__(self, item) -> bool:
         # type parsing: try to make it an Agent, if that fails try a Site, if that tails, raise exception
         if (not type(item) is KappaPort) and (not type(item) is KappaCounter) and (not type(item) is KappaAgent):
@@ -103,14 +119,13 @@ class KappaAgent(KappaEntity):
         """Return the list of bonds ending/starting at this agent, e.g. for <<A(a[.] b[1] c[2] d{a}[.])>> these would
          be the list ['1','2']."""
         agent_bonds = []
-        all_bonds_data = []
         for item in self._agent_signature:
             if type(item) is KappaPort:
-                all_bonds_data.append(item.get_port_current_bond())
-                all_bonds_data.append(item.get_port_future_bond())
-        for bond_data in all_bonds_data:
-            if re.match(r'\d+', bond_data):
-                agent_bonds.append(bond_data)
+                # identifiers start with a digit, as re's \d would match; states like '.' or '_' do not
+                if item._present_bond_state[:1].isdecimal():
+                    agent_bonds.append(item._present_bond_state)
+                if item._future_bond_state[:1].isdecimal():
+                    agent_bonds.append(item._future_bond_state)
         return agent_bonds
 
     def get_abundance_change_operation(self) -> str:
@@ -121,6 +136,8 @@ class KappaAgent(KappaEntity):
 class KappaToken(KappaEntity):
     """Class for representing Kappa tokens. I.e. <<X>>, or <<ATP>>."""
 
+    __slots__ = ('_raw_expression', '_token_name', '_token_operation')
+
     def __init__(self, expression: str):
         self._raw_expression: str
         self._token_name: str
@@ -1,49 +1,56 @@
 #!/usr/bin/env python3
 
+import hashlib
 import re
 import networkx as nx
-from typing import List, Set, Dict
+from typing import List, Set, Dict, Tuple
 
 from .KappaEntity import KappaEntity
 from .KappaAgent import KappaAgent
+from .KappaSite import KappaPort
+from .AgentPatternBatch import AgentPatternBatch
+from .ComplexPattern import ComplexPattern, _get_bond_partners
 from .KappaError import ComplexParseError, AgentParseError
+from .KappaScanner import scan_agents, scan_agent_type
+
+_bond_id_pat = re.compile(r'\[\d+\]')
 
 
 class KappaComplex(KappaEntity):
     """Class for representing Kappa complexes. I.e. 'A(b[1] s{u}[.]), B(a[1] c[2]), C(b[2] a[3]), A(c[3] s[.]{x})'.
     Notice these must be connected components."""
 
+    __slots__ = ('_raw_expression', '_agents', '_agent_types', '_composition', '_canonical_form')
+
     def __init__(self, expression: str):
         self._raw_expression: str
         self._agents: List[KappaAgent]
         self._agent_types: Set[KappaAgent]
         self._kappa_expression: str
         self._composition: Dict[KappaAgent, int]
+        self._canonical_form: Tuple[str, str]
 
         self._raw_expression = expression
-        # get the set of agents making up this complex
-        agent_name_pat = r'(?:[_~][a-zA-Z0-9_~+-]+|[a-zA-Z][a-zA-Z0-9_~+-]*)'
-        agent_sign_pat = r'\([^()]*\)'
-        matches = re.findall(agent_name_pat + agent_sign_pat, expression.strip())
-        if len(matches) == 0:
-            raise ComplexParseError('Complex <' + self._raw_expression + '> appears to have zero agents.')
+        self._canonical_form = None
+        # get the list of agents making up this complex, scanning the expression in a single pass
         try:
-            agent_list = []
-            agent_types = set()
-            composition = {}
-            for item in matches:
-                agent = KappaAgent(item)
-                agent_list.append(agent)
-                agent_type = KappaAgent(agent.get_agent_name() + '()')
-                agent_types.update([agent_type])
-                if agent_type in composition:
-                    composition[agent_type] += 1
-                else:
-                    composition[agent_type] = 1
+            agent_list = scan_agents(expression)
         except AgentParseError as a:
             raise ComplexParseError('Could not parse agents in complex <' + expression + '>.') from a
-        self._agents = sorted(agent_list)
-        self._agent_types = agent_types
+        if len(agent_list) == 0:
+            raise ComplexParseError('Complex <' + self._raw_expression + '> appears to have zero agents.')
+        name_counts = {}
+        for agent in agent_list:
+            agent_name = agent.get_agent_name()
+            if agent_name in name_counts:
+                name_counts[agent_name] += 1
+            else:
+                name_counts[agent_name] = 1
+        composition = {}
+        for agent_name, count in name_counts.items():
+            composition[scan_agent_type(agent_name)] = count
+        self._agents = sorted(agent_list, key=str)
+        self._agent_types = set(composition.keys())
         self._composition = composition
         # canonicalize the kappa expression
         self._kappa_expression = ', '.join([str(agent) for agent in self._agents])
@@ -84,14 +91,47 @@ class KappaComplex(KappaEntity):
                 match_number += 1
         return match_number
 
+    def get_numbers_of_embeddings_of_agents(self, queries) -> List[int]:
+        """Returns the number of embeddings of each of the query agents on the KappaComplex, in the order of the
+        queries, visiting each agent once. The queries can be an AgentPatternBatch, or an iterable of KappaAgents or of
+        strings. Does not follow bonds, so effectively each query must be a single-agent."""
+        if not type(queries) is AgentPatternBatch:
+            queries = AgentPatternBatch(queries)
+        return queries.count_in_complex(self)
+
     def get_complex_composition(self) -> Dict[KappaAgent, int]:
         """Returns a dictionary where the key is an agent, and the value the number of times that agent appears in
         this complex."""
         return self._composition
 
-    def get_number_of_embeddings_of_complex(self, query: str) -> int:
-        """Returns the number of embedding the query complex has on the KappaComplex. Follows bonds. WIP"""
-        raise NotImplementedError
+    def get_number_of_embeddings_of_complex(self, query) -> int:
+        """Returns the number of embeddings the query complex has on the KappaComplex. Follows bonds, so the query must
+        be connected, e.g. 'A(b[1]), B(a[1] s{p})'. The query can be a string, a KappaComplex, or a ComplexPattern,
+        which can be reused across complexes."""
+        if not type(query) is ComplexPattern:
+            query = ComplexPattern(query)
+        return query.count_in_complex(self)
+
+    def get_canonical_expression(self) -> str:
+        """Returns the canonical expression of the complex, invariant under the numbering of its bonds and the order of
+        its agents: two complexes are isomorphic if, and only if, their canonical expressions are equal. Unlike the
+        expression used for equality and hashing, which keeps the bond identifiers of the file it came from, this one
+        identifies a species across files and replicates. Computed once, then cached."""
+        if self._canonical_form is None:
+            canonical_expression = _canonicalize(self._agents, self._raw_expression)
+            canonical_hash = hashlib.blake2b(canonical_expression.encode('utf-8'), digest_size=16).hexdigest()
+            self._canonical_form = canonical_expression, canonical_hash
+        return self._canonical_form[0]
+
+    def get_canonical_hash(self) -> str:
+        """Returns a hex digest of the canonical expression, stable across runs and processes, usable as a compact key
+        for the species when caching, merging, or tracking it over time."""
+        self.get_canonical_expression()
+        return self._canonical_form[1]
+
+    def is_isomorphic(self, other: 'KappaComplex') -> bool:
+        """Returns true if the other complex is the same species, up to the numbering of bonds and order of agents."""
+        return self.get_canonical_expression() == other.get_canonical_expression()
 
     def to_networkx(self) -> nx.MultiGraph:
         """Returns a Multigraph representation of the complex, abstracting away binding site data. Nodes represent
@@ -101,10 +141,18 @@ class KappaComplex(KappaEntity):
         node identifiers and their corresponding KappaAgents, and g.edges.data() displays the edges, using the node
         identifiers as well as the kappa identifiers."""
         kappa_complex_multigraph = nx.MultiGraph()
+        kappa_complex_multigraph.add_nodes_from(
+            [(agent_node_id, {'kappa': agent}) for agent_node_id, agent in enumerate(self.get_all_agents())])
+        kappa_complex_multigraph.add_edges_from(self._get_bond_list())
+        return kappa_complex_multigraph
+
+    def _get_bond_list(self) -> List[Tuple[int, int, Dict[str, str]]]:
+        """Returns the bonds of the complex as tuples of the indexes of the two agents they link, in order of
+        declaration, and an attribute dictionary where the key 'bond id' holds the bond identifier, sorted by the agent
+        closing the bond."""
         dangle_bond_list = {}   # store unpaired bonds here
         paired_bond_list = []   # store tuples of (agent index 1, agent index 2, bond identifier)
         for agent_node_id, agent in enumerate(self.get_all_agents()):
-            kappa_complex_multigraph.add_node(agent_node_id, kappa=agent)
             for bond in agent.get_bond_identifiers():
                 if bond in dangle_bond_list:
                     paired_bond_list.append((dangle_bond_list[bond], agent_node_id, {'bond id': bond}))
@@ -114,5 +162,52 @@ class KappaComplex(KappaEntity):
         if dangle_bond_list:
             raise ValueError('Dangling bonds <' + ','.join(dangle_bond_list.keys()) +
                              '> found in: ' + self._raw_expression)
-        kappa_complex_multigraph.add_edges_from(paired_bond_list)
-        return kappa_complex_multigraph
+        return paired_bond_list
+
+
+def _canonicalize(agents: List[KappaAgent], expression: str) -> str:
+    """Returns the canonical expression of a connected complex. Kappa complexes are rigid: each port holds at most one
+    bond, so walking the complex breadth-first from a root agent, visiting ports in order of their names, orders every
+    agent without any choice left. The walk is tried from each agent of the rarest kind, kinds being told apart by their
+    expression without bond identifiers, as an isomorphism maps those onto each other; bonds are numbered in order of
+    appearance, and the least of the resulting expressions is kept."""
+    partners = _get_bond_partners(agents, expression)
+    # per agent: its ports and counters, sorted by name, each with its expression sans bond identifier
+    agent_sites = []
+    kinds = dict()
+    for agent_index, agent in enumerate(agents):
+        sites = sorted([(site.get_port_name() if type(site) is KappaPort else site.get_counter_name(),
+                         _bond_id_pat.sub('[*]', str(site))) for site in agent.get_agent_signature()])
+        agent_sites.append(sites)
+        kind = agent.get_agent_name() + '(' + ' '.join([site for _, site in sites]) + ')'
+        kinds.setdefault(kind, []).append(agent_index)
+    _, roots = min([(len(members), kind) for kind, members in kinds.items()])
+    roots = kinds[roots]
+    canonical_expression = None
+    for root in roots:
+        order = [root]
+        reached = {root}
+        for agent_index in order:
+            for site_name, _ in agent_sites[agent_index]:
+                partner = partners.get((agent_index, site_name))
+                if partner is not None and partner[0] not in reached:
+                    reached.add(partner[0])
+                    order.append(partner[0])
+        if len(order) != len(agents):
+            raise ValueError('Complex <' + expression + '> is not connected.')
+        bond_numbers = dict()
+        agent_expressions = []
+        for agent_index in order:
+            site_expressions = []
+            for site_name, site_expression in agent_sites[agent_index]:
+                partner = partners.get((agent_index, site_name))
+                if partner is not None:
+                    bond = min((agent_index, site_name), partner), max((agent_index, site_name), partner)
+                    bond_number = bond_numbers.setdefault(bond, len(bond_numbers) + 1)
+                    site_expression = site_expression.replace('[*]', '[' + str(bond_number) + ']')
+                site_expressions.append(site_expression)
+            agent_expressions.append(agents[agent_index].get_agent_name() + '(' + ' '.join(site_expressions) + ')')
+        candidate = ', '.join(agent_expressions)
+        if canonical_expression is None or candidate < canonical_expression:
+            canonical_expression = candidate
+    return canonical_expression
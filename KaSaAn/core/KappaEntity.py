@@ -9,7 +9,10 @@ from .KappaError import KappaEqualtiyError
 @total_ordering
 class KappaEntity(ABC):
     """Abstract base class for Kappa entities. It should not be invoked directly. Contains boiler-plate code used
-    by child classes."""
+    by child classes. Entities are numerous, so they declare their attributes as __slots__ instead of carrying a
+    per-instance __dict__; child classes that are created in bulk declare __slots__ for the attributes they add."""
+
+    __slots__ = ('_kappa_expression',)
 
     @abstractmethod
     def __init__(self):
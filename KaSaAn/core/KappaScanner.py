@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .KappaAgent import KappaAgent
+from .KappaSite import KappaPort, KappaCounter, KappaSite
+from .KappaError import PortParseError, CounterParseError
+
+# Patterns are compiled once, at import, and shared by every snapshot, complex, and agent being scanned.
+_ident = r'[_~][a-zA-Z0-9_~+-]+|[a-zA-Z][a-zA-Z0-9_~+-]*'
+_agent_pat = re.compile(r'(' + _ident + r')\(([^()]*)\)')
+_agent_name_pat = re.compile(r'(' + _ident + r')\([^()]*\)')
+# the subset of the site grammar used by snapshots: no operations, internal state either before or after the bond
+_port_pat = re.compile(r'(' + _ident + r')(?:{(' + _ident + r'|#)})?\[(\.|_|#|\d+)\](?:{(' + _ident + r'|#)})?')
+_counter_pat = re.compile(r'(' + _ident + r'){(>?=\d+)}')
+_bond_id_pat = re.compile(r'\[\d')
+_header_pat = re.compile(
+    r'//\sSnapshot\s' +
+    r'\[Event:\s(\d+)\]//\s' +
+    r'\"uuid\"\s:\s\"(\w+)' +
+    r'\"%def:\s\"T0\"\s\"([0-9]+|([0-9]+[eE][+-]?[0-9+])|((([0-9]+\.[0-9]*)|(\.[0-9]+))([eE][+-]?[0-9]+)?))\"')
+_species_entry_pat = re.compile(r'(\d+)\s/\*(\d+)\sagents\*/\s(.+)')
+_token_entry_pat = re.compile(
+    r'((?:(?:\d+\.\d+)|(?:\d+\.)|(?:\.\d+)|(?:\d+))[eE]?[+-]?\d?)\s([_~][a-zA-Z0-9_~+-]+|[a-zA-Z][a-zA-Z0-9_~+-]*)')
+
+# Bounds of the intern tables. Entities are immutable, so scanning the same raw expression twice can hand out the same
+# object; the least recently used entries are evicted once a table is full, bounding the memory the tables hold on to.
+# Only the parts without bond identifiers are interned: those repeat across agents, complexes, and snapshots, while a
+# bond identifier makes a port, or an agent, nearly unique. The tables are global to the process, and live on for as
+# long as it does, so entities are shared by every snapshot parsed in it; clear_intern_tables() releases them.
+SITE_INTERN_SIZE = 2 ** 16
+AGENT_INTERN_SIZE = 2 ** 16
+AGENT_TYPE_INTERN_SIZE = 2 ** 10
+
+
+def _scan_site(expression: str) -> KappaSite:
+    """Returns the KappaPort or KappaCounter for a single site expression, without interning it."""
+    g = _port_pat.fullmatch(expression)
+    if g:
+        port_name, int_state_before, bond_state, int_state_after = g.groups()
+        return KappaPort._from_parts(expression, port_name, bond_state, int_state_before or int_state_after or '#')
+    g = _counter_pat.fullmatch(expression)
+    if g:
+        return KappaCounter._from_parts(expression, g.group(1), g.group(2))
+    try:
+        try:
+            return KappaPort(expression)
+        except PortParseError:
+            return KappaCounter(expression)
+    except CounterParseError:
+        raise ValueError('Could not parse <' + expression + '> as a Port nor as a Counter')
+
+
+@lru_cache(maxsize=SITE_INTERN_SIZE)
+def _scan_bond_free_site(expression: str) -> KappaSite:
+    """Interned _scan_site, for sites without a bond identifier."""
+    return _scan_site(expression)
+
+
+def scan_site(expression: str) -> KappaSite:
+    """Returns the KappaPort or KappaCounter for a single site expression, e.g. 'a{ph}[3]' or 'c{=5}'. Expressions
+    outside the snapshot subset of the grammar, like those with operations, are handed to the full initializers.
+    Interned unless it bears a bond identifier: repeated expressions return the same object."""
+    if _bond_id_pat.search(expression):
+        return _scan_site(expression)
+    return _scan_bond_free_site(expression)
+
+
+def _scan_agent(expression: str) -> KappaAgent:
+    """Returns the KappaAgent for a single agent expression, built around the interned sites without bond
+    identifiers."""
+    g = _agent_pat.fullmatch(expression)
+    if not g:
+        # outside the snapshot subset, e.g. with an abundance change operation
+        return KappaAgent(expression)
+    agent_name, agent_signature = g.groups()
+    # Kappa4 allows commas or whitespace as separators; sites are sorted by their raw expression
+    sites = [scan_site(entry) for entry in sorted(agent_signature.replace(',', ' ').split())]
+    return KappaAgent._from_parts(expression, agent_name, sites)
+
+
+@lru_cache(maxsize=AGENT_INTERN_SIZE)
+def _scan_bond_free_agent(expression: str) -> KappaAgent:
+    """Interned _scan_agent, for agents without bond identifiers."""
+    return _scan_agent(expression)
+
+
+def scan_agent(expression: str) -> KappaAgent:
+    """Returns the KappaAgent for a single agent expression, with whitespace runs already collapsed, e.g.
+    'A(a{ph}[.] b[1])'. Agents without bond identifiers are interned: repeated expressions return the same object.
+    Agents with bond identifiers are built anew, but around the interned sites they share with every other agent
+    declaring them, e.g. 'a{ph}[.]'."""
+    if _bond_id_pat.search(expression):
+        return _scan_agent(expression)
+    return _scan_bond_free_agent(expression)
+
+
+@lru_cache(maxsize=AGENT_TYPE_INTERN_SIZE)
+def scan_agent_type(agent_name: str) -> KappaAgent:
+    """Returns the signature-less KappaAgent used as the type of agents named agent_name, e.g. 'A()' for 'A'. Interned:
+    complexes and snapshots share one key per agent type."""
+    return KappaAgent._from_parts(agent_name + '()', agent_name, [])
+
+
+def clear_intern_tables():
+    """Empties the intern tables of sites, agents, and agent types."""
+    _scan_bond_free_site.cache_clear()
+    _scan_bond_free_agent.cache_clear()
+    scan_agent_type.cache_clear()
+
+
+def scan_agents(expression: str) -> List[KappaAgent]:
+    """Returns the list of KappaAgents found in a complex expression, in order of declaration. The expression is
+    walked once: each agent match is handed to the interned agent scanner, without re-parsing the complex."""
+    # collapse whitespace runs, as the KappaAgent initializer would
+    return [scan_agent(' '.join(g.group(0).split())) for g in _agent_pat.finditer(expression)]
+
+
+def scan_agent_signatures(expression: str) -> List[Tuple[str, List[str]]]:
+    """Returns the name and the site expressions of each agent found in a complex expression, in order of declaration,
+    with site expressions sorted as in the KappaAgent, without building any entity."""
+    return [(agent_name, sorted(agent_signature.replace(',', ' ').split()))
+            for agent_name, agent_signature in _agent_pat.findall(expression)]
+
+
+def scan_site_parts(expression: str) -> Tuple[str, str, Optional[str]]:
+    """Returns the name, current internal state, and current bond state of a site expression, e.g. ('a', 'ph', '3')
+    for 'a{ph}[3]'; for counters, the state is the counter's value expression and the bond state is None."""
+    g = _port_pat.fullmatch(expression)
+    if g:
+        port_name, int_state_before, bond_state, int_state_after = g.groups()
+        return port_name, int_state_before or int_state_after or '#', bond_state
+    site = scan_site(expression)
+    if type(site) is KappaPort:
+        return site.get_port_name(), site.get_port_current_state(), site.get_port_current_bond()
+    return site.get_counter_name(), site.get_counter_state(), None
+
+
+def scan_agent_names(expression: str) -> List[str]:
+    """Returns the names of the agents found in a complex expression, in order of declaration, without scanning their
+    signatures."""
+    return _agent_name_pat.findall(expression)
+
+
+def split_snapshot(lines: Iterable[str]) -> Iterator[str]:
+    """Splits the lines of a snapshot into its header, followed by each of its '%init: ' entries, with line breaks
+    removed. Equivalent to splitting the whole text, but entries are yielded one at a time."""
+    buffer = []
+    for line in lines:
+        parts = line.replace('\n', '').split('%init: ')
+        buffer.append(parts[0])
+        for part in parts[1:]:
+            yield ''.join(buffer)
+            buffer = [part]
+    yield ''.join(buffer)
+
+
+def scan_snapshot_header(header: str) -> Optional[Tuple[int, str, float]]:
+    """Returns the event, UUID, and time declared in a snapshot's header, or None if the header could not be
+    parsed."""
+    g = _header_pat.match(header)
+    if not g:
+        return None
+    return int(g.group(1)), str(g.group(2)), float(g.group(3))
+
+
+def scan_species_entry(entry: str) -> Optional[Tuple[int, int, str]]:
+    """Returns the abundance, declared size, and complex expression of a snapshot entry, or None if the entry does
+    not declare a complex, e.g. for '182 /*1 agents*/ A(b[.])'."""
+    g = _species_entry_pat.fullmatch(entry)
+    if not g:
+        return None
+    return int(g.group(1)), int(g.group(2)), g.group(3)
+
+
+def scan_token_entry(entry: str) -> Optional[str]:
+    """Returns the value & name expression of a snapshot entry declaring a token, or None if the entry does not
+    declare one, e.g. for '241 X'."""
+    g = _token_entry_pat.fullmatch(entry)
+    if not g:
+        return None
+    return g.group(0)
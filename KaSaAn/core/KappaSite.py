@@ -6,27 +6,39 @@ from abc import abstractmethod
 from .KappaEntity import KappaEntity
 from .KappaError import PortParseError, CounterParseError, PortInclusionError
 
+# bond operations are stored as small-integer codes, indexing this tuple
+_bond_operations = ('', 'creation', 'deletion', 'swap', 'unknown')
+_NO_OPERATION = 0
+_CREATION = 1
+_DELETION = 2
+_SWAP = 3
+_UNKNOWN = 4
+
 
 class KappaSite(KappaEntity):
+    __slots__ = ()
+
     @abstractmethod
     def __init__(self):
         pass
 
 
 class KappaPort(KappaSite):
-    """Class for representing traditional Kappa Sites, e.g. 's[3]', 'g[.]{b}', or 'k[_]{#}'."""
+    """Class for representing traditional Kappa Sites, e.g. 's[3]', 'g[.]{b}', or 'k[_]{#}'. The operands are not
+    stored: a bond or internal state operation is present if, and only if, its future state is not empty."""
+
+    __slots__ = ('_raw_expression', '_port_name', '_present_bond_state', '_future_bond_state', '_present_int_state',
+                 '_future_int_state', '_bond_operation')
 
     def __init__(self, expression: str):
         self._raw_expression: str
         self._port_name: str
         self._present_bond_state: str
-        self._bond_operand: str
         self._future_bond_state: str
         self._present_int_state: str
-        self._int_operand: str
         self._future_int_state: str
         self._kappa_expression: str
-        self._bond_operation: str
+        self._bond_operation: int
 
         self._raw_expression = expression
         expression = re.sub(r'\s+|\t+|\n+', '', expression)  # Remove line breaks, tabs, multi-spaces
@@ -49,48 +61,56 @@ class KappaPort(KappaSite):
         # figure out what type of bond operation is being performed
         self._present_bond_state = g.group(5)
         if g.group(6):                                                  # if there's an operation
-            self._bond_operand = '/'
-            self._future_bond_state = g.group(6)
             self._future_bond_state = g.group(7)
             if g.group(5) == '.':
                 if g.group(7) != '.':                                   # ./X
-                    self._bond_operation = 'creation'
+                    self._bond_operation = _CREATION
                 else:                                                   # ./.
-                    self._bond_operation = ''
+                    self._bond_operation = _NO_OPERATION
             elif g.group(5) == '_':
                 if g.group(7) == '.':                                   # _/.
-                    self._bond_operation = 'deletion'
+                    self._bond_operation = _DELETION
                 else:                                                   # _/X
-                    self._bond_operation = 'unknown'
+                    self._bond_operation = _UNKNOWN
             elif g.group(5) == '#':                                     # #/?
-                self._bond_operation = 'unknown'
+                self._bond_operation = _UNKNOWN
             else:
                 if g.group(7) == '.':                                   # X/.
-                    self._bond_operation = 'deletion'
+                    self._bond_operation = _DELETION
                 else:                                                   # X/Y
-                    self._bond_operation = 'swap'
+                    self._bond_operation = _SWAP
         else:                                                           # if there's no operation
-            self._bond_operand = ''
             self._future_bond_state = ''
-            self._bond_operation = ''
+            self._bond_operation = _NO_OPERATION
         # figure out what type of internal state operation is being performed
         if g.group(2):
             self._present_int_state = g.group(2)
-            self._int_operand = g.group(3) if g.group(3) else ''
             self._future_int_state = g.group(4) if g.group(4) else ''
         elif g.group(8):
             self._present_int_state = g.group(8)
-            self._int_operand = g.group(9) if g.group(9) else ''
             self._future_int_state = g.group(10) if g.group(10) else ''
         else:                                                          # unless specified, will default to wildcard '#'
             self._present_int_state = '#'
-            self._int_operand = ''
             self._future_int_state = ''
         # canonicalize the kappa expression
-        self._kappa_expression = \
-            self._port_name + \
-            '[' + self._present_bond_state + self._bond_operand + self._future_bond_state + ']' + \
-            '{' + self._present_int_state + self._int_operand + self._future_int_state + '}'
+        self._kappa_expression = self._port_name + '[' + self.get_port_bond_state() + ']{' + self.get_port_int_state() + '}'
+
+    @classmethod
+    def _from_parts(cls, expression: str, port_name: str, bond_state: str, int_state: str) -> 'KappaPort':
+        """Builds a port out of the parts already tokenized by the snapshot scanner, skipping the regex cascade of the
+        initializer. Only valid for ports without operations, e.g. 'a{ph}[3]'."""
+        port = cls.__new__(cls)
+        port._raw_expression = expression
+        port._port_name = port_name
+        port._present_bond_state = bond_state
+        port._future_bond_state = ''
+        port._bond_operation = _NO_OPERATION
+        port._present_int_state = int_state
+        port._future_int_state = ''
+        kappa_expression = port_name + '[' + bond_state + ']{' + int_state + '}'
+        # when the expression is already canonical, share the string instead of holding two copies
+        port._kappa_expression = expression if kappa_expression == expression else kappa_expression
+        return port
 
     def __contains__(self, item) -> bool:
         # we can't compare ports to counters
@@ -102,9 +122,9 @@ class KappaPort(KappaSite):
             item = KappaPort(item)
         # check if item is in self, Kappa-wise
         contains = False
-        if self._int_operand or self._bond_operand:                 # if self has an operation, issue warning
+        if self._future_int_state or self._future_bond_state:       # if self has an operation, issue warning
             raise PortInclusionError('Undefined inclusion test: <' + str(self) + '> has an operation in it.')
-        elif item._int_operand or item._bond_operand:               # if item has an operation, issue warning
+        elif item._future_int_state or item._future_bond_state:     # if item has an operation, issue warning
             raise PortInclusionError('Undefined inclusion test: <' + str(item) + '> has an operation in it.')
         else:
             if self._port_name == item._port_name:
@@ -149,11 +169,15 @@ class KappaPort(KappaSite):
 
     def get_port_int_state(self) -> str:
         """Returns a string with the port's internal state."""
-        return self._present_int_state + self._int_operand + self._future_int_state
+        if self._future_int_state:
+            return self._present_int_state + '/' + self._future_int_state
+        return self._present_int_state
 
     def get_port_bond_state(self) -> str:
         """Returns a string with the port's bond state."""
-        return self._present_bond_state + self._bond_operand + self._future_bond_state
+        if self._future_bond_state:
+            return self._present_bond_state + '/' + self._future_bond_state
+        return self._present_bond_state
 
     def get_port_current_bond(self) -> str:
         """Returns a string with the bond state or identifier required for the rule to fire, or the state or identifier
@@ -178,25 +202,27 @@ class KappaPort(KappaSite):
     def get_port_bond_operation(self) -> str:
         """Returns the operation being performed on this port's bond: creation, deletion, swap, unknown, or an empty
          string for none."""
-        return self._bond_operation
+        return _bond_operations[self._bond_operation]
 
     def has_bond_operation(self) -> bool:
         """Returns true if the port has an operation being performed on its bond state."""
-        return True if self._bond_operand else False
+        return True if self._future_bond_state else False
 
     def has_state_operation(self) -> bool:
         """Returns true if the port has an operation being performed on its internal state."""
-        return True if self._int_operand else False
+        return True if self._future_int_state else False
 
 
 class KappaCounter(KappaSite):
-    """"Class for representing counters, pseudo-Kappa sites, e.g. 'c{=5}'."""
+    """"Class for representing counters, pseudo-Kappa sites, e.g. 'c{=5}'. As for ports, the operand is not stored: a
+    counter has an operation if, and only if, its delta is not empty."""
+
+    __slots__ = ('_raw_expression', '_counter_name', '_current_state', '_counter_delta')
 
     def __init__(self, expression: str):
         self._raw_expression: str
         self._counter_name: str
         self._current_state: str
-        self._counter_operand: str
         self._counter_delta: str
         self._kappa_expression: str
 
@@ -213,12 +239,22 @@ class KappaCounter(KappaSite):
         # assign capturing groups to variables
         self._counter_name = g.group(1)
         self._current_state = g.group(2)
-        self._counter_operand = g.group(3) if g.group(3) else ''
         self._counter_delta = g.group(4) if g.group(4) else ''
         # canonicalize the kappa expression
-        self._kappa_expression = \
-            self._counter_name + \
-            '{' + self._current_state + self._counter_operand + self._counter_delta + '}'
+        self._kappa_expression = self._counter_name + '{' + self.get_counter_state() + '}'
+
+    @classmethod
+    def _from_parts(cls, expression: str, counter_name: str, current_state: str) -> 'KappaCounter':
+        """Builds a counter out of the parts already tokenized by the snapshot scanner, skipping the regex of the
+        initializer. Only valid for counters without operations, e.g. 'c{=5}'."""
+        counter = cls.__new__(cls)
+        counter._raw_expression = expression
+        counter._counter_name = counter_name
+        counter._current_state = current_state
+        counter._counter_delta = ''
+        kappa_expression = counter_name + '{' + current_state + '}'
+        counter._kappa_expression = expression if kappa_expression == expression else kappa_expression
+        return counter
 
     def get_counter_name(self) -> str:
         """Returns a string with the counter's name."""
@@ -226,7 +262,9 @@ class KappaCounter(KappaSite):
 
     def get_counter_state(self) -> str:
         """Returns a string with the counter's value expression, including the delta if specified."""
-        return self._current_state + self._counter_operand + self._counter_delta
+        if self._counter_delta:
+            return self._current_state + '/' + self._counter_delta
+        return self._current_state
 
     def get_counter_tested_value(self) -> str:
         """Returns a string with the value being tested for the rule's application."""
@@ -238,4 +276,4 @@ class KappaCounter(KappaSite):
 
     def has_operation(self) -> bool:
         """Returns true if this counter has an operation being performed on it."""
-        return True if self._counter_operand else False
+        return True if self._counter_delta else False
@@ -1,95 +1,156 @@
 #!/usr/bin/env python3
 
-import re
 import os
 import warnings
 import networkx as nx
-from typing import List, Set, ItemsView, Dict, Tuple
+import numpy as np
+from scipy.sparse import csr_matrix
+from typing import List, Set, ItemsView, Dict, Optional, Tuple
 
 from .KappaEntity import KappaEntity
 from .KappaComplex import KappaComplex
 from .KappaAgent import KappaAgent, KappaToken
-from .KappaError import SnapshotAgentParseError, SnapshotTokenParseError, SnapshotParseError
+from .AgentPatternBatch import AgentPatternBatch
+from .ComplexPattern import ComplexPattern
+from .KappaError import SnapshotParseError
+from .KappaScanner import scan_agent_names, scan_agent_type
+from .KappaSnapshotReader import KappaSnapshotReader, _build_complex
+from .KappaSnapshotCache import get_snapshot_fingerprint, read_snapshot_cache, write_snapshot_cache
+from .SnapshotArrays import SnapshotArrays
+from .SpeciesIndex import SpeciesIndex
 
 
 class KappaSnapshot(KappaEntity):
     """Class for representing Kappa snapshots. A snapshot is represented as a dictionary, where the kappa expression
      serves as the key, and the abundance serves as the value. Many of the methods for this class are simple re-namings
-     of the Dict() class', but with more informative names for Kappa entities."""
+     of the Dict() class', but with more informative names for Kappa entities.
 
-    def __init__(self, snapshot_file_name: str):
+     In lazy mode, the snapshot only keeps a compact record per species (its expression, abundance, and declared size),
+     and builds each KappaComplex the first time a method needs agent-level detail. Sizes, abundances, mass, agent
+     names, and composition are then answered without parsing any complex.
+
+     With use_cache, those records, and the snapshot's SnapshotArrays once built, are also saved to a binary sidecar
+     file next to the snapshot, and loaded from it on later reads for as long as the snapshot is unchanged."""
+
+    def __init__(self, snapshot_file_name: str, lazy: bool = False, use_cache: bool = False):
+        self._file_path: str
         self._file_name: str
         self._complexes: Dict[KappaComplex, int]
         self._tokens: Dict[str: KappaToken]
-        self._known_sizes: List[int]
-        self._raw_expression: str
-        self._kappa_expression: str
+        self._species_expressions: List[str]
+        self._species_abundances: List[int]
+        self._species_sizes: List[int]
+        self._species_complexes: List[KappaComplex]
+        self._canonical_expression: str
+        self._arrays: SnapshotArrays
+        self._composition_matrix: Tuple[csr_matrix, List[KappaAgent]]
+        self._species_index: SpeciesIndex
         self._snapshot_event: int
         self._snapshot_uuid: str
         self._snapshot_time: float
+        self._use_cache: bool
+        self._cache_fingerprint: Tuple[int, int, str]
 
+        self._file_path = snapshot_file_name
         self._file_name = os.path.split(snapshot_file_name)[1]
-        self._complexes = dict()
+        self._use_cache = use_cache
+        self._complexes = None
         self._tokens = dict()
-        self._known_sizes = []
-        # read file into a single string
-        with open(snapshot_file_name, 'r') as kf:
-            self._raw_expression = kf.read()
-        # remove newlines, split by "%init:" keyword
-        digest: List[str] = self._raw_expression.replace('\n', '').split('%init: ')
-        # parse header and get event, uuid, time
-        g = re.match(
-            r'//\sSnapshot\s' +
-            r'\[Event:\s(\d+)\]//\s' +
-            r'\"uuid\"\s:\s\"(\w+)' +
-            r'\"%def:\s\"T0\"\s\"([0-9]+|([0-9]+[eE][+-]?[0-9+])|((([0-9]+\.[0-9]*)|(\.[0-9]+))([eE][+-]?[0-9]+)?))\"',
-            digest[0])
-        if not g:
-            raise SnapshotParseError('Header <' + digest[0] + '> not be parsed in <' + snapshot_file_name + '>')
-        self._snapshot_event = int(g.group(1))
-        self._snapshot_uuid = str(g.group(2))
-        self._snapshot_time = float(g.group(3))
-        # parse the complexes into instances of KappaComplexes, get their abundance, cross-check their size
-        for entry in digest[1:]:
-            try:
-                try:
-                    # try to parse as a KappaComplex line, with agents
-                    g = re.match(r'^(\d+)\s/\*(\d+)\sagents\*/\s(.+)$', entry)
-                    if not g:
-                        raise SnapshotAgentParseError(
-                            'Abundance, length, & complex not found in <' + entry + '> in <' + snapshot_file_name + '>')
-                    abundance = int(g.group(1))
-                    size = int(g.group(2))
-                    species = KappaComplex(g.group(3))
-                    if not size == species.get_size_of_complex():
-                        raise ValueError(
-                            'Size mismatch: snapshot declares <' + str(size) + '>, I counted <' +
-                            str(species.get_size_of_complex()) + '> in <' + snapshot_file_name + '>')
-                    # assign the complex as a key to the dictionary
-                    self._complexes[species] = abundance
-                    self._known_sizes.append(size)
-                except SnapshotAgentParseError:
-                    # try to parse as a token line instead
-                    tk_value_pat = r'((?:(?:\d+\.\d+)|(?:\d+\.)|(?:\.\d+)|(?:\d+))[eE]?[+-]?\d?)'
-                    tk_name_pat = r'([_~][a-zA-Z0-9_~+-]+|[a-zA-Z][a-zA-Z0-9_~+-]*)'
-                    tk_pat = r'^' + tk_value_pat + r'\s' + tk_name_pat + r'$'
-                    g = re.match(tk_pat, entry)
-                    if not g:
-                        raise SnapshotTokenParseError(
-                            'Abundance & token name not found in <' + entry + '> in <' + snapshot_file_name + '>')
-                    # assign the token as a key to the dictionary
-                    tk = KappaToken(g.group(0))
+        self._species_expressions = []
+        self._species_abundances = []
+        self._species_sizes = []
+        self._canonical_expression = None
+        self._arrays = None
+        self._composition_matrix = None
+        self._species_index = None
+        self._cache_fingerprint = None
+        cached_records = read_snapshot_cache(snapshot_file_name) if use_cache else None
+        if cached_records:
+            self._cache_fingerprint = cached_records['fingerprint']
+            self._snapshot_event = cached_records['event']
+            self._snapshot_uuid = cached_records['uuid']
+            self._snapshot_time = cached_records['time']
+            self._species_abundances = cached_records['species_abundances']
+            self._species_sizes = cached_records['species_sizes']
+            self._species_expressions = cached_records['species_expressions']
+            for token_expression in cached_records['token_expressions']:
+                tk = KappaToken(token_expression)
+                self._tokens[tk.get_token_name()] = tk
+            self._arrays = cached_records['arrays']
+        else:
+            # fingerprinted before reading, so a snapshot rewritten mid-parse does not validate the cache
+            if use_cache:
+                self._cache_fingerprint = get_snapshot_fingerprint(snapshot_file_name)
+            # stream the file, entry by entry; the header gives event, uuid, time
+            reader = KappaSnapshotReader(snapshot_file_name)
+            self._snapshot_event = reader.get_snapshot_event()
+            self._snapshot_uuid = reader.get_snapshot_uuid()
+            self._snapshot_time = reader.get_snapshot_time()
+            # record the species, and assign tokens to the dictionary of tokens; a species listed more than once is
+            # recorded once, with the sum of its abundances
+            record_indexes = dict()
+            for entry_type, entry_data in reader._iter_raw_entries():
+                if entry_type == 'complex':
+                    abundance, size, expression = entry_data
+                    if expression in record_indexes:
+                        self._species_abundances[record_indexes[expression]] += abundance
+                        continue
+                    record_indexes[expression] = len(self._species_expressions)
+                    self._species_abundances.append(abundance)
+                    self._species_sizes.append(size)
+                    self._species_expressions.append(expression)
+                else:
+                    tk = KappaToken(entry_data)
                     self._tokens[tk.get_token_name()] = tk
-            except SnapshotTokenParseError:
-                raise SnapshotParseError(
-                    'Complex and token parse failed for <' + entry + '> in <' + snapshot_file_name + '>')
-        # canonicalize the kappa expression: tokens
-        self._kappa_expression = '\n'.join(['%init: ' + str(float(tk.get_token_operation())) + ' ' + tk.get_token_name()
-                                            for tk in self._tokens.values()])
-        self._kappa_expression += '\n' if self._tokens else ''
-        # canonicalize the kappa expression: complexes
-        self._kappa_expression += '\n'.join(['%init: ' + str(self._complexes[cx]) + ' ' + str(cx)
-                                            for cx in self._complexes.keys()])
+            if use_cache:
+                self._write_cache()
+        self._species_complexes = [None] * len(self._species_expressions)
+        # unless lazy, parse the complexes into instances of KappaComplexes now, cross-checking their size
+        if not lazy:
+            self._get_complexes()
+
+    @property
+    def _kappa_expression(self) -> str:
+        # canonicalized on first use, as it requires every complex to be parsed
+        if self._canonical_expression is None:
+            # canonicalize the kappa expression: tokens
+            expression = '\n'.join(['%init: ' + str(float(tk.get_token_operation())) + ' ' + tk.get_token_name()
+                                    for tk in self._tokens.values()])
+            expression += '\n' if self._tokens else ''
+            # canonicalize the kappa expression: complexes
+            expression += '\n'.join(['%init: ' + str(ab) + ' ' + str(cx)
+                                     for cx, ab in self._get_complexes().items()])
+            self._canonical_expression = expression
+        return self._canonical_expression
+
+    def _write_cache(self):
+        """Saves the species records, and the arrays if already built, to the snapshot's sidecar cache."""
+        write_snapshot_cache(self._file_path, self._cache_fingerprint, self._snapshot_event, self._snapshot_uuid,
+                             self._snapshot_time, self._species_abundances, self._species_sizes, self._species_expressions,
+                             [str(tk) for tk in self._tokens.values()], self._arrays)
+
+    def _get_complex(self, species_index: int) -> KappaComplex:
+        """Returns the KappaComplex of a species record, parsing it on first use."""
+        kappa_complex = self._species_complexes[species_index]
+        if kappa_complex is None:
+            kappa_complex, _ = _build_complex(
+                (self._species_abundances[species_index], self._species_sizes[species_index],
+                 self._species_expressions[species_index]), self._file_name)
+            self._species_complexes[species_index] = kappa_complex
+        return kappa_complex
+
+    def _get_complexes(self) -> Dict[KappaComplex, int]:
+        """Returns the dictionary of KappaComplexes and their abundances, parsing all complexes on first use."""
+        if self._complexes is None:
+            self._complexes = dict()
+            for species_index, abundance in enumerate(self._species_abundances):
+                self._complexes[self._get_complex(species_index)] = abundance
+        return self._complexes
+
+    def is_materialized(self) -> bool:
+        """Returns true if every complex of the snapshot has been parsed into a KappaComplex; always true unless the
+        snapshot was read in lazy mode."""
+        return self._complexes is not None
 
     def get_snapshot_file_name(self) -> str:
         """Returns a string with the name of the file this snapshot came from."""
@@ -109,86 +170,186 @@ class KappaSnapshot(KappaEntity):
 
     def get_all_complexes(self) -> List[KappaComplex]:
         """Returns a list of KappaComplexes with all the complexes in the snapshot."""
-        return list(self._complexes.keys())
+        return list(self._get_complexes().keys())
 
     def get_all_abundances(self) -> List[int]:
         """Returns a list of integers with all the abundances in the snapshot."""
-        return list(self._complexes.values())
+        return list(self._species_abundances)
 
     def get_all_sizes(self) -> List[int]:
         """Returns a list of integers with all the complex sizes visible in the snapshot, one item per complex (i.e. can
         contain repeat numbers if they correspond to different complexes)."""
-        sizes = [key.get_size_of_complex() for key in self._complexes.keys()]
-        return sizes
+        return list(self._species_sizes)
 
     def get_agent_types_present(self) -> Set[KappaAgent]:
         """Returns a set with the names of the agents present in the snapshot."""
         agent_types = set()
-        for key in self._complexes.keys():
-            agent_types.update(key.get_agent_types())
+        if self.is_materialized():
+            for key in self._complexes.keys():
+                agent_types.update(key.get_agent_types())
+        else:
+            agent_names = set()
+            for expression in self._species_expressions:
+                agent_names.update(scan_agent_names(expression))
+            agent_types = set([scan_agent_type(agent_name) for agent_name in agent_names])
         return agent_types
 
     def get_all_complexes_and_abundances(self) -> ItemsView[KappaComplex, int]:
         """Returns a list of tuples, where the first element is a KappaComplex and the second is an int with the
         abundance of the corresponding complex."""
-        return self._complexes.items()
+        return self._get_complexes().items()
 
     def get_total_mass(self) -> int:
         """Returns an int with the total mass of the snapshot, measured in number of agents."""
         total_mass = 0
-        for i_complex, i_abundance in self._complexes.items():
-            total_mass += i_complex.get_size_of_complex() * i_abundance
+        for i_size, i_abundance in zip(self._species_sizes, self._species_abundances):
+            total_mass += i_size * i_abundance
         return total_mass
 
     def get_abundance_of_agent(self, query_agent) -> int:
         """Returns an int with the abundance of the given agent. Supports passing a string with the agent expression, or
-        and instance of a KappaAgent. Supports passing agents with signature, e.g. Bob(site{state})."""
+        and instance of a KappaAgent. Supports passing agents with signature, e.g. Bob(site{state}). Once the species
+        index has been built, only the candidate species are inspected."""
         if type(query_agent) is not KappaAgent:
             query_agent = KappaAgent(query_agent)
+        if self._species_index is not None:
+            return sum([intra_cx_ab * self._species_abundances[species_index]
+                        for species_index, intra_cx_ab in self._get_embeddings_of_agent(query_agent)])
         abundance = 0
         for cx, cx_ab in self.get_all_complexes_and_abundances():
             intra_cx_ab = cx.get_number_of_embeddings_of_agent(query_agent)
             abundance += intra_cx_ab * cx_ab
         return abundance
 
+    def _get_embeddings_of_agent(self, query_agent: KappaAgent) -> List[Tuple[int, int]]:
+        """Returns the index of each species the query agent embeds in, and its number of embeddings there, looking up
+        the candidate species in the species index. Candidates are only parsed and checked if the index alone can not
+        give the exact number of embeddings."""
+        species_index = self.get_species_index()
+        candidates, multiplicities = species_index.get_candidate_species(query_agent)
+        if species_index.is_exact(query_agent):
+            return list(zip(candidates.tolist(), multiplicities.tolist()))
+        embeddings = []
+        for candidate in candidates.tolist():
+            intra_cx_ab = self._get_complex(candidate).get_number_of_embeddings_of_agent(query_agent)
+            if intra_cx_ab:
+                embeddings.append((candidate, intra_cx_ab))
+        return embeddings
+
+    def get_abundances_of_agents(self, queries) -> List[int]:
+        """Returns the abundance of each of the query agents, in the order of the queries, computed in a single pass
+        over the complexes. The queries can be an AgentPatternBatch, reused across snapshots, or an iterable of
+        KappaAgents or of strings with agent expressions, with signatures, e.g. Bob(site{state})."""
+        if not type(queries) is AgentPatternBatch:
+            queries = AgentPatternBatch(queries)
+        return queries.count_in_snapshot(self)
+
+    def get_number_of_embeddings_of_complex(self, query) -> int:
+        """Returns the number of embeddings of the query complex, e.g. 'A(b[1]), B(a[1] s{p})', into the snapshot: its
+        number of embeddings into each complex, weighed by the complex's abundance. Follows bonds, so the query must be
+        connected. Species holding fewer agents of some type than the query are skipped using the composition matrix,
+        without parsing them. The query can be a string, a KappaComplex, or a ComplexPattern."""
+        if not type(query) is ComplexPattern:
+            query = ComplexPattern(query)
+        composition_matrix, agent_types = self.get_composition_matrix()
+        type_codes = dict([(agent_type.get_agent_name(), type_code) for type_code, agent_type in enumerate(agent_types)])
+        feasible = np.ones(len(self._species_abundances), dtype=bool)
+        for agent_name, count in query.get_pattern_composition().items():
+            if agent_name not in type_codes:
+                return 0
+            feasible &= composition_matrix[:, type_codes[agent_name]].toarray().ravel() >= count
+        embeddings = 0
+        for species_index in np.flatnonzero(feasible).tolist():
+            embeddings += query.count_in_complex(self._get_complex(species_index)) * self._species_abundances[species_index]
+        return embeddings
+
     def get_composition(self) -> Dict[KappaAgent, int]:
         """Return a dictionary where the keys are KappaAgents, their names, and their value is the abundance in the
         snapshot of those agents."""
-        agent_types = self.get_agent_types_present()
-        composition = dict(zip(agent_types, [0] * len(agent_types)))
-        for agent_type in agent_types:
-            for kappa_complex, abundance in self.get_all_complexes_and_abundances():
-                complex_composition = kappa_complex.get_complex_composition()
-                local_abundance = complex_composition[agent_type] if agent_type in complex_composition else 0
-                composition[agent_type] += abundance * local_abundance
-        return composition
+        composition_matrix, agent_types = self.get_composition_matrix()
+        counts = composition_matrix.T.dot(np.array(self._species_abundances, dtype=np.int64))
+        return dict(zip(agent_types, counts.tolist()))
+
+    def get_composition_matrix(self) -> Tuple[csr_matrix, List[KappaAgent]]:
+        """Returns a sparse matrix with one row per species, in the order of the snapshot, and one column per agent
+        type, holding the number of agents of that type in that species; and the list of agent types, sorted by name,
+        that the columns stand for. Built once, from the parsed complexes, or from the species expressions if the
+        snapshot is lazy, without parsing them. The composition of the snapshot is the product of its transpose with the
+        vector of abundances."""
+        if self._composition_matrix is None:
+            type_codes = dict()
+            rows = []
+            columns = []
+            counts = []
+            for species_index, expression in enumerate(self._species_expressions):
+                if self.is_materialized():
+                    # parsed complexes already hold their composition
+                    for agent_type, count in self._get_complex(species_index).get_complex_composition().items():
+                        rows.append(species_index)
+                        columns.append(type_codes.setdefault(agent_type.get_agent_name(), len(type_codes)))
+                        counts.append(count)
+                else:
+                    for agent_name in scan_agent_names(expression):
+                        rows.append(species_index)
+                        columns.append(type_codes.setdefault(agent_name, len(type_codes)))
+                        counts.append(1)
+            # re-code the columns so agent types are sorted by name
+            agent_names = sorted(type_codes)
+            recode = np.empty(len(type_codes), dtype=np.int64)
+            for new_code, agent_name in enumerate(agent_names):
+                recode[type_codes[agent_name]] = new_code
+            # duplicate entries, i.e. repeated agent types within a species, are summed
+            composition_matrix = csr_matrix(
+                (np.array(counts, dtype=np.int64), (np.array(rows, dtype=np.int64), recode[columns])),
+                shape=(len(self._species_expressions), len(agent_names)))
+            composition_matrix.sum_duplicates()
+            self._composition_matrix = composition_matrix, [scan_agent_type(name) for name in agent_names]
+        return self._composition_matrix
+
+    def get_canonical_abundances(self) -> Dict[str, int]:
+        """Returns a dictionary where the key is the canonical hash of a species, see KappaComplex.get_canonical_hash,
+        and the value its abundance. Isomorphic complexes, e.g. the same species written with other bond identifiers,
+        are merged under one key, shared across files and replicates."""
+        abundances = dict()
+        for cx, cx_ab in self.get_all_complexes_and_abundances():
+            abundances[cx.get_canonical_hash()] = abundances.get(cx.get_canonical_hash(), 0) + cx_ab
+        return abundances
 
     def get_complexes_with_abundance(self, query_abundance: int) -> List[KappaComplex]:
         """Returns a list of KappaComplexes present in the snapshot at the query abundance. For example, get all
         elements present in single copy."""
         result_complexes = []
-        for complex_expression, complex_abundance in self._complexes.items():
+        for species_index, complex_abundance in enumerate(self._species_abundances):
             if query_abundance == complex_abundance:
-                result_complexes.append(complex_expression)
+                result_complexes.append(self._get_complex(species_index))
         return result_complexes
 
     def get_complexes_of_size(self, query_size: int) -> List[Tuple[KappaComplex, int]]:
         """Returns the list tuples, with complexes and their abudnace, for complexes that are of the query size. For
         example, get all the dimers and their respective abundances."""
         result_complexes = []
-        for comp, abun in self.get_all_complexes_and_abundances():
-            if query_size == comp.get_size_of_complex():
-                result_complexes.append((comp, abun))
+        for species_index, complex_size in enumerate(self._species_sizes):
+            if query_size == complex_size:
+                result_complexes.append((self._get_complex(species_index), self._species_abundances[species_index]))
         return result_complexes
 
+    def get_complexes_with_agent(self, query_agent) -> List[Tuple[KappaComplex, int]]:
+        """Returns the list of tuples, with complexes and their abundance, for complexes the query agent embeds in,
+        e.g. those holding a free EGFR(l[.]), in the order of the snapshot. Builds the species index if needed, and only
+        parses the complexes returned, or the candidates that need checking."""
+        if type(query_agent) is not KappaAgent:
+            query_agent = KappaAgent(query_agent)
+        return [(self._get_complex(species_index), self._species_abundances[species_index])
+                for species_index, _ in self._get_embeddings_of_agent(query_agent)]
+
     def get_largest_complexes(self) -> List[Tuple[KappaComplex, int]]:
         """Returns a list of KappaComplexes of the largest size, measured in number of constituting agents."""
-        max_known_size = max(self._known_sizes)
+        max_known_size = max(self._species_sizes)
         return self.get_complexes_of_size(max_known_size)
 
     def get_smallest_complexes(self) -> List[Tuple[KappaComplex, int]]:
         """Returns a list of KappaComplexes with the smallest complexes, measured in number of constituting agents."""
-        min_known_size = min(self._known_sizes)
+        min_known_size = min(self._species_sizes)
         return self.get_complexes_of_size(min_known_size)
 
     def get_most_abundant_complexes(self) -> List[KappaComplex]:
@@ -207,8 +368,7 @@ class KappaSnapshot(KappaEntity):
         that size. For example, {1:3, 4:5} indicates the mixture contains only three monomers and five tetramers.
         Dictionary is sorted by increasing complex size."""
         size_dist = dict()
-        for complex_expression, complex_abundance in self.get_all_complexes_and_abundances():
-            current_size = complex_expression.get_size_of_complex()
+        for current_size, complex_abundance in zip(self._species_sizes, self._species_abundances):
             if current_size in size_dist:
                 size_dist[current_size] += complex_abundance
             else:
@@ -242,6 +402,37 @@ class KappaSnapshot(KappaEntity):
         """Returns the token names present in the snapshot."""
         return list(self._tokens.keys())
 
+    def to_arrays(self) -> SnapshotArrays:
+        """Returns the SnapshotArrays holding this snapshot's species, agents, sites, and bonds as contiguous NumPy
+        arrays. Built from the species records on first use, so it does not require the complexes to be parsed."""
+        if self._arrays is None:
+            self._arrays = SnapshotArrays.from_species(
+                zip(self._species_abundances, self._species_sizes, self._species_expressions))
+            if self._use_cache:
+                self._write_cache()
+        return self._arrays
+
+    def get_species_index(self) -> SpeciesIndex:
+        """Returns the SpeciesIndex of this snapshot, an inverted index from agent names, and from their sites' names,
+        states, and bond states, to the species holding them. Built from the SnapshotArrays on first use; once built,
+        single-agent queries like get_abundance_of_agent only inspect the candidate species it yields."""
+        if self._species_index is None:
+            self._species_index = SpeciesIndex.from_arrays(self.to_arrays())
+        return self._species_index
+
+    def to_edge_array(self, with_sites: bool = False) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """Returns the bonds of the snapshot as an int32 array of agent index pairs, one row per bond; an int32 array
+        with the type code of each agent, into to_arrays().agent_type_names; and, if with_sites, an int32 array with the
+        codes of the two sites each bond links, into to_arrays().site_name_table, else None. Each species is repeated
+        as many times as its abundance; agents are numbered species after species, copy after copy, in order of
+        declaration. Built with NumPy from the SnapshotArrays, without networkx nor any KappaAgent."""
+        return self.to_arrays().get_edge_array(with_sites)
+
+    def to_sparse_adjacency(self) -> csr_matrix:
+        """Returns the adjacency matrix of the snapshot, agents numbered as in to_edge_array, as a symmetric SciPy
+        sparse matrix holding the number of bonds between each pair of agents."""
+        return self.to_arrays().get_sparse_adjacency()
+
     def to_networkx(self) -> nx.MultiGraph:
         """Returns a Multigraph representation of the snapshot, abstracting away binding site data. Nodes represent
         agents, edges their bonds. Nodes have an attribute dictionary where the key 'kappa' holds the KappaAgent.
@@ -251,26 +442,23 @@ class KappaSnapshot(KappaEntity):
         identifiers as well as the kappa identifiers."""
         agent_node_id = 0
         snapshot_network = nx.MultiGraph()
-        # iterate over all molecular species
-        # then iterate over the number of times that species appears in the mix
         for molecular_species, species_abundance in self.get_all_complexes_and_abundances():
-            for species_copy in range(species_abundance):
-                # reconstruct the species, assign identifiers
-                dangle_bond_list = {}  # store unpaired bonds here
-                paired_bond_list = []  # store tuples of (agent index 1, agent index 2, bond identifier)
-                for agent in molecular_species.get_all_agents():
-                    snapshot_network.add_node(agent_node_id, kappa=agent)
-                    for bond in agent.get_bond_identifiers():
-                        if bond in dangle_bond_list:
-                            paired_bond_list.append((dangle_bond_list[bond], agent_node_id, {'bond id': bond}))
-                            del dangle_bond_list[bond]
-                        else:
-                            dangle_bond_list[bond] = agent_node_id
-                    agent_node_id += 1
-                if dangle_bond_list:
-                    raise ValueError('Dangling bonds <' + ','.join(dangle_bond_list.keys()) +
-                                     '> found in: ' + self._raw_expression)
-                snapshot_network.add_edges_from(paired_bond_list)
+            # build the species' template once: its agents, and its bonds as pairs of agent indexes, then stamp a copy
+            # of it for each time that species appears in the mix, offsetting the node identifiers
+            agents = molecular_species.get_all_agents()
+            species_size = len(agents)
+            bond_list = [(agent_index_1, agent_index_2, bond_data['bond id'])
+                         for agent_index_1, agent_index_2, bond_data in molecular_species._get_bond_list()]
+            first_node_id = agent_node_id
+            agent_node_id += species_size * species_abundance
+            # nodes and edges of all copies are streamed into the graph in one call each, every copy getting its own
+            # attribute dictionaries, so the graph can be edited later
+            copy_offsets = range(first_node_id, agent_node_id, species_size)
+            snapshot_network.add_nodes_from((copy_offset + agent_index, {'kappa': agent}) for copy_offset in
+                                            copy_offsets for agent_index, agent in enumerate(agents))
+            snapshot_network.add_edges_from((copy_offset + agent_index_1, copy_offset + agent_index_2,
+                                             {'bond id': bond_id}) for copy_offset in copy_offsets
+                                            for agent_index_1, agent_index_2, bond_id in bond_list)
         if snapshot_network.number_of_nodes() != self.get_total_mass():
             raise SnapshotParseError('Mismatch between snapshot mass <' + str(self.get_total_mass()) +
                                      '> and number of nodes in network <' + str(snapshot_network.number_of_nodes()) +
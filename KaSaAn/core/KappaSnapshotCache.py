@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import hashlib
+import os
+import warnings
+import zipfile
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from .AtomicWrite import atomic_write
+from .SnapshotArrays import SnapshotArrays
+
+# Bumped whenever the layout of the cache changes; caches of other versions are ignored, and overwritten.
+CACHE_VERSION = 1
+_array_fields = ['species_offsets', 'species_abundances', 'agent_types', 'site_offsets', 'site_names', 'site_states',
+                 'site_bond_partners', 'bonds']
+_table_fields = ['agent_type_names', 'site_name_table', 'site_state_table']
+
+
+def get_cache_file_name(snapshot_file_name: str) -> str:
+    """Returns the name of the sidecar cache of a snapshot, kept next to it, e.g. 'snap_4.ka.cache.npz' for
+    'snap_4.ka'."""
+    return snapshot_file_name + '.cache.npz'
+
+
+def _hash_file(file_name: str) -> str:
+    """Returns the hex digest of the contents of a file."""
+    file_hash = hashlib.blake2b(digest_size=16)
+    with open(file_name, 'rb') as f:
+        for chunk in iter(lambda: f.read(2 ** 20), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def _pack_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Packs a list of strings into a byte array of their UTF-8 encodings, and the array of their offsets into it."""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded], dtype=np.int64)
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(packed: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """Inverse of _pack_strings."""
+    buffer = packed.tobytes()
+    bounds = offsets.tolist()
+    return [buffer[start:end].decode('utf-8') for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def get_snapshot_fingerprint(snapshot_file_name: str) -> Tuple[int, int, str]:
+    """Returns the fingerprint of a snapshot file: its size, modification time in nanoseconds, and content hash. Taken
+    before the snapshot is read, so that a file changed while being parsed leaves a cache that no longer matches it."""
+    stat = os.stat(snapshot_file_name)
+    return stat.st_size, stat.st_mtime_ns, _hash_file(snapshot_file_name)
+
+
+def _save_cache(cache_file_name: str, data: Dict):
+    """Replaces the cache file atomically with the given arrays; failures to write it, e.g. in a read-only directory,
+    are warned about and otherwise ignored."""
+    try:
+        with atomic_write(cache_file_name) as temp_file:
+            np.savez_compressed(temp_file, **data)
+    except OSError as e:
+        warnings.warn('Could not write snapshot cache <' + cache_file_name + '>: ' + str(e))
+
+
+def read_snapshot_cache(snapshot_file_name: str) -> Optional[Dict]:
+    """Returns the contents of a snapshot's sidecar cache, or None if there is no cache, or if it is stale, corrupt,
+    or of another version, the latter three being warned about. The cache is valid if the snapshot's size, and the
+    hash of its contents, match those recorded; the contents are always hashed, as a snapshot rewritten with the same
+    size and modification time, e.g. copied with its timestamps kept, or edited within the timestamp resolution of its
+    filesystem, would otherwise be taken for the one cached. The returned records include the fingerprint the cache
+    was validated against, under 'fingerprint'."""
+    cache_file_name = get_cache_file_name(snapshot_file_name)
+    if not os.path.isfile(cache_file_name):
+        return None
+    try:
+        with np.load(cache_file_name, allow_pickle=False) as cache:
+            if int(cache['version']) != CACHE_VERSION:
+                warnings.warn('Ignoring snapshot cache <' + cache_file_name + '> of version ' +
+                              str(int(cache['version'])) + ', expected ' + str(CACHE_VERSION))
+                return None
+            stat = os.stat(snapshot_file_name)
+            file_hash = str(cache['file_hash'])
+            if int(cache['file_size']) != stat.st_size or file_hash != _hash_file(snapshot_file_name):
+                warnings.warn('Ignoring stale snapshot cache <' + cache_file_name + '>: snapshot has changed')
+                return None
+            records = {
+                'fingerprint': (stat.st_size, stat.st_mtime_ns, file_hash),
+                'event': int(cache['event']),
+                'uuid': str(cache['uuid']),
+                'time': float(cache['time']),
+                'species_abundances': cache['species_abundances'].tolist(),
+                'species_sizes': cache['species_sizes'].tolist(),
+                'species_expressions': _unpack_strings(cache['species_expressions'],
+                                                       cache['species_expressions_offsets']),
+                'token_expressions': _unpack_strings(cache['token_expressions'], cache['token_expressions_offsets']),
+                'arrays': None}
+            if 'arrays_species_offsets' in cache:
+                fields = dict([(field, cache['arrays_' + field]) for field in _array_fields])
+                for field in _table_fields:
+                    fields[field] = _unpack_strings(cache['arrays_' + field], cache['arrays_' + field + '_offsets'])
+                records['arrays'] = SnapshotArrays(**fields)
+    except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        warnings.warn('Ignoring unreadable snapshot cache <' + cache_file_name + '>: ' + str(e))
+        return None
+    return records
+
+
+def write_snapshot_cache(snapshot_file_name: str, fingerprint: Tuple[int, int, str], event: int, uuid: str,
+                         time: float, species_abundances: List[int], species_sizes: List[int],
+                         species_expressions: List[str], token_expressions: List[str], arrays: SnapshotArrays = None):
+    """Writes the sidecar cache of a snapshot, under the fingerprint taken by get_snapshot_fingerprint before the
+    snapshot was read. The file is replaced atomically; failures to write it, e.g. in a read-only directory, are warned
+    about and otherwise ignored."""
+    cache_file_name = get_cache_file_name(snapshot_file_name)
+    file_size, file_mtime_ns, file_hash = fingerprint
+    data = {
+        'version': np.array(CACHE_VERSION),
+        'file_size': np.array(file_size, dtype=np.int64),
+        'file_mtime_ns': np.array(file_mtime_ns, dtype=np.int64),
+        'file_hash': np.array(file_hash),
+        'event': np.array(event, dtype=np.int64),
+        'uuid': np.array(uuid),
+        'time': np.array(time, dtype=np.float64),
+        'species_abundances': np.array(species_abundances, dtype=np.int64),
+        'species_sizes': np.array(species_sizes, dtype=np.int64)}
+    data['species_expressions'], data['species_expressions_offsets'] = _pack_strings(species_expressions)
+    data['token_expressions'], data['token_expressions_offsets'] = _pack_strings(token_expressions)
+    if arrays is not None:
+        for field in _array_fields:
+            data['arrays_' + field] = getattr(arrays, field)
+        for field in _table_fields:
+            data['arrays_' + field], data['arrays_' + field + '_offsets'] = _pack_strings(getattr(arrays, field))
+    _save_cache(cache_file_name, data)
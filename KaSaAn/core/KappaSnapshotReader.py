@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+import os
+from typing import Dict, Iterator, List, Set, Tuple, Union
+
+from .KappaAgent import KappaAgent, KappaToken
+from .AgentPatternBatch import AgentPatternBatch
+from .KappaComplex import KappaComplex
+from .KappaError import SnapshotParseError
+from .KappaScanner import split_snapshot, scan_snapshot_header, scan_species_entry, scan_token_entry
+from .SnapshotArrays import SnapshotArrays
+
+
+def _build_complex(species_data: Tuple[int, int, str], snapshot_file_name: str) -> Tuple[KappaComplex, int]:
+    """Turns a scanned complex entry into its KappaComplex & abundance, cross-checking its declared size."""
+    abundance, size, expression = species_data
+    species = KappaComplex(expression)
+    if not size == species.get_size_of_complex():
+        raise ValueError(
+            'Size mismatch: snapshot declares <' + str(size) + '>, I counted <' +
+            str(species.get_size_of_complex()) + '> in <' + snapshot_file_name + '>')
+    return species, abundance
+
+
+class KappaSnapshotReader:
+    """Class for reading Kappa snapshots incrementally. The header is read on initialization; the complexes and tokens
+    are parsed one entry at a time, from a buffered file handle, and handed out as they are read. Neither the file's
+    text nor the collection of complexes is ever held in memory, so aggregations run in bounded memory regardless of
+    the size of the snapshot. Each pass re-reads the file."""
+
+    def __init__(self, snapshot_file_name: str):
+        self._file_path: str
+        self._file_name: str
+        self._snapshot_event: int
+        self._snapshot_uuid: str
+        self._snapshot_time: float
+
+        self._file_path = snapshot_file_name
+        self._file_name = os.path.split(snapshot_file_name)[1]
+        # read up to the first "%init:" entry, and parse the header for event, uuid, time
+        with open(snapshot_file_name, 'r') as kf:
+            header = next(split_snapshot(kf))
+        header_data = scan_snapshot_header(header)
+        if not header_data:
+            raise SnapshotParseError('Header <' + header + '> not be parsed in <' + snapshot_file_name + '>')
+        self._snapshot_event, self._snapshot_uuid, self._snapshot_time = header_data
+
+    def __repr__(self) -> str:
+        return '{0}("{1}")'.format(self.__class__.__name__, self._file_path)
+
+    def _iter_raw_entries(self) -> Iterator[Tuple[str, Union[Tuple[int, int, str], str]]]:
+        """Yields tuples of the entry type, 'complex' or 'token', and the scanned entry: the abundance, declared size,
+        and expression for complexes, or the value & name expression for tokens. Nothing is parsed into entities."""
+        with open(self._file_path, 'r') as kf:
+            digest = split_snapshot(kf)
+            next(digest)    # skip header
+            for entry in digest:
+                species_data = scan_species_entry(entry)
+                if species_data:
+                    yield 'complex', species_data
+                    continue
+                token_expression = scan_token_entry(entry)
+                if token_expression:
+                    yield 'token', token_expression
+                    continue
+                raise SnapshotParseError(
+                    'Complex and token parse failed for <' + entry + '> in <' + self._file_path + '>')
+
+    def iter_entries(self) -> Iterator[Tuple[Union[KappaComplex, KappaToken], Union[int, float]]]:
+        """Yields the entries of the snapshot in file order: tuples of a KappaComplex and its abundance (int), or of a
+        KappaToken and its value (float)."""
+        for entry_type, entry_data in self._iter_raw_entries():
+            if entry_type == 'complex':
+                yield _build_complex(entry_data, self._file_path)
+            else:
+                tk = KappaToken(entry_data)
+                yield tk, float(tk.get_token_operation())
+
+    def iter_complexes_and_abundances(self) -> Iterator[Tuple[KappaComplex, int]]:
+        """Yields tuples of a KappaComplex and its abundance, for each complex in the snapshot. Token entries are
+        skipped without being parsed."""
+        for entry_type, entry_data in self._iter_raw_entries():
+            if entry_type == 'complex':
+                yield _build_complex(entry_data, self._file_path)
+
+    def get_all_complexes_and_abundances(self) -> Iterator[Tuple[KappaComplex, int]]:
+        """Alias of iter_complexes_and_abundances, with the name used by KappaSnapshot, so functions written against a
+        KappaSnapshot can stream from the reader. The returned iterator can only be consumed once."""
+        return self.iter_complexes_and_abundances()
+
+    def get_snapshot_file_name(self) -> str:
+        """Returns a string with the name of the file this snapshot comes from."""
+        return self._file_name
+
+    def get_snapshot_time(self) -> float:
+        """Returns a float with the time at which this snapshot was taken."""
+        return self._snapshot_time
+
+    def get_snapshot_uuid(self) -> str:
+        """Returns the UUID (Universally unique identifier) of the snapshot."""
+        return self._snapshot_uuid
+
+    def get_snapshot_event(self) -> int:
+        """Returns an integer with the event number the snapshot was taken at."""
+        return self._snapshot_event
+
+    def get_size_distribution(self) -> Dict[int, int]:
+        """Returns a dictionary where the key is the size of a complex and the value is the amount of complexes with
+        that size, sorted by increasing complex size. Uses the sizes declared by the snapshot, so complexes are not
+        parsed."""
+        size_dist = dict()
+        for entry_type, entry_data in self._iter_raw_entries():
+            if entry_type == 'complex':
+                abundance, size, _ = entry_data
+                if size in size_dist:
+                    size_dist[size] += abundance
+                else:
+                    size_dist[size] = abundance
+        return dict(sorted(size_dist.items(), key=lambda item: item[0]))
+
+    def get_total_mass(self) -> int:
+        """Returns an int with the total mass of the snapshot, measured in number of agents. Uses the sizes declared by
+        the snapshot, so complexes are not parsed."""
+        total_mass = 0
+        for entry_type, entry_data in self._iter_raw_entries():
+            if entry_type == 'complex':
+                abundance, size, _ = entry_data
+                total_mass += size * abundance
+        return total_mass
+
+    def get_agent_types_present(self) -> Set[KappaAgent]:
+        """Returns a set with the names of the agents present in the snapshot."""
+        agent_types = set()
+        for kappa_complex, _ in self.iter_complexes_and_abundances():
+            agent_types.update(kappa_complex.get_agent_types())
+        return agent_types
+
+    def get_composition(self) -> Dict[KappaAgent, int]:
+        """Return a dictionary where the keys are KappaAgents, their names, and their value is the abundance in the
+        snapshot of those agents."""
+        composition = dict()
+        for kappa_complex, abundance in self.iter_complexes_and_abundances():
+            for agent_type, local_abundance in kappa_complex.get_complex_composition().items():
+                if agent_type in composition:
+                    composition[agent_type] += abundance * local_abundance
+                else:
+                    composition[agent_type] = abundance * local_abundance
+        return composition
+
+    def get_abundance_of_agent(self, query_agent) -> int:
+        """Returns an int with the abundance of the given agent. Supports passing a string with the agent expression, or
+        and instance of a KappaAgent. Supports passing agents with signature, e.g. Bob(site{state})."""
+        if type(query_agent) is not KappaAgent:
+            query_agent = KappaAgent(query_agent)
+        abundance = 0
+        for cx, cx_ab in self.iter_complexes_and_abundances():
+            abundance += cx.get_number_of_embeddings_of_agent(query_agent) * cx_ab
+        return abundance
+
+    def get_abundances_of_agents(self, queries) -> List[int]:
+        """Returns the abundance of each of the query agents, in the order of the queries, computed in a single pass
+        over the complexes. The queries can be an AgentPatternBatch, reused across snapshots, or an iterable of
+        KappaAgents or of strings with agent expressions, with signatures, e.g. Bob(site{state})."""
+        if not type(queries) is AgentPatternBatch:
+            queries = AgentPatternBatch(queries)
+        return queries.count_in_snapshot(self)
+
+    def to_arrays(self) -> SnapshotArrays:
+        """Returns the SnapshotArrays of the snapshot, built in a single pass without parsing complexes."""
+        return SnapshotArrays.from_species(
+            entry_data for entry_type, entry_data in self._iter_raw_entries() if entry_type == 'complex')
+
+    def get_all_tokens_and_values(self) -> Dict[str, float]:
+        """Returns a dictionary with the tokens present in the snapshot in the form of [name]:[value]. Complex entries
+        are skipped without being parsed."""
+        d = dict()
+        for entry_type, entry_data in self._iter_raw_entries():
+            if entry_type == 'token':
+                tk = KappaToken(entry_data)
+                d[tk.get_token_name()] = float(tk.get_token_operation())
+        return d
+
+
+def iter_snapshot(snapshot_file_name: str) -> Iterator[Tuple[Union[KappaComplex, KappaToken], Union[int, float]]]:
+    """Yields the entries of a snapshot file one at a time, in file order: tuples of a KappaComplex and its abundance,
+    or of a KappaToken and its value. See KappaSnapshotReader."""
+    return KappaSnapshotReader(snapshot_file_name).iter_entries()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .KappaAgent import KappaAgent
+from .KappaScanner import scan_agent_signatures, scan_agent_type, scan_site_parts
+
+
+class SnapshotArrays:
+    """Class for representing the contents of a snapshot as contiguous NumPy arrays, in compressed sparse row layout.
+    Agents are numbered in order of declaration, species after species; sites are numbered in the same way, agent after
+    agent, sorted within each agent as in its KappaAgent. Names and states are stored as integer codes into sorted
+    tables. The bond partner of a site is the index of the site at the other end of the bond, or one of the negative
+    codes FREE, BOUND_TO_ANY, WILDCARD, or NOT_A_PORT. Reductions over the snapshot are computed on the arrays, without
+    looping over KappaComplexes."""
+
+    FREE = -1           # [.]
+    BOUND_TO_ANY = -2   # [_]
+    WILDCARD = -3       # [#]
+    NOT_A_PORT = -4     # counters
+
+    def __init__(self, species_offsets: np.ndarray, species_abundances: np.ndarray, agent_types: np.ndarray,
+                 agent_type_names: List[str], site_offsets: np.ndarray, site_names: np.ndarray,
+                 site_name_table: List[str], site_states: np.ndarray, site_state_table: List[str],
+                 site_bond_partners: np.ndarray, bonds: np.ndarray):
+        self.species_offsets: np.ndarray
+        self.species_abundances: np.ndarray
+        self.agent_types: np.ndarray
+        self.agent_type_names: List[str]
+        self.site_offsets: np.ndarray
+        self.site_names: np.ndarray
+        self.site_name_table: List[str]
+        self.site_states: np.ndarray
+        self.site_state_table: List[str]
+        self.site_bond_partners: np.ndarray
+        self.bonds: np.ndarray
+
+        # species i spans agents species_offsets[i] to species_offsets[i+1]
+        self.species_offsets = species_offsets
+        self.species_abundances = species_abundances
+        # agent j is of type agent_type_names[agent_types[j]], and spans sites site_offsets[j] to site_offsets[j+1]
+        self.agent_types = agent_types
+        self.agent_type_names = agent_type_names
+        self.site_offsets = site_offsets
+        # site k is named site_name_table[site_names[k]], with state site_state_table[site_states[k]]
+        self.site_names = site_names
+        self.site_name_table = site_name_table
+        self.site_states = site_states
+        self.site_state_table = site_state_table
+        self.site_bond_partners = site_bond_partners
+        # one row per bond, with the indexes of the two sites it links, the lowest first
+        self.bonds = bonds
+
+    @classmethod
+    def from_species(cls, species_data: Iterable[Tuple[int, int, str]]) -> 'SnapshotArrays':
+        """Builds the arrays from an iterable of scanned species entries: tuples of abundance, declared size, and complex
+        expression, as stored by a KappaSnapshot or yielded by a KappaSnapshotReader. The expressions are scanned
+        straight into the arrays, without building any KappaComplex nor KappaAgent."""
+        species_offsets = [0]
+        species_abundances = []
+        agent_types = []
+        site_offsets = [0]
+        site_names = []
+        site_states = []
+        site_bond_partners = []
+        bonds = []
+        type_codes = {}
+        name_codes = {}
+        state_codes = {}
+        bond_partner_codes = {'.': cls.FREE, '_': cls.BOUND_TO_ANY, '#': cls.WILDCARD, None: cls.NOT_A_PORT}
+        # site expressions repeat across agents, so each is decoded once into its name code, state code, and bond
+        # partner code; bond identifiers are kept, to be resolved once their whole species has been scanned
+        site_codes = {}
+        for abundance, size, expression in species_data:
+            agent_signatures = scan_agent_signatures(expression)
+            if not size == len(agent_signatures):
+                raise ValueError('Size mismatch: snapshot declares <' + str(size) + '>, I counted <' +
+                                 str(len(agent_signatures)) + '> in <' + expression + '>')
+            bond_ends = {}
+            for agent_name, site_expressions in agent_signatures:
+                agent_types.append(type_codes.setdefault(agent_name, len(type_codes)))
+                for site_expression in site_expressions:
+                    codes = site_codes.get(site_expression)
+                    if codes is None:
+                        site_name, site_state, bond_state = scan_site_parts(site_expression)
+                        if bond_state in bond_partner_codes:
+                            partner, bond_id = bond_partner_codes[bond_state], None
+                        elif bond_state.isdigit():
+                            partner, bond_id = cls.FREE, bond_state
+                        else:
+                            raise ValueError('Unsupported bond state <' + bond_state + '> in <' + expression + '>')
+                        codes = (name_codes.setdefault(site_name, len(name_codes)),
+                                 state_codes.setdefault(site_state, len(state_codes)), partner, bond_id)
+                        site_codes[site_expression] = codes
+                    if codes[3] is not None:
+                        bond_ends.setdefault(codes[3], []).append(len(site_names))
+                    site_names.append(codes[0])
+                    site_states.append(codes[1])
+                    site_bond_partners.append(codes[2])
+                site_offsets.append(len(site_names))
+            for bond_id, ends in bond_ends.items():
+                if len(ends) != 2:
+                    raise ValueError('Bond <' + bond_id + '> has ' + str(len(ends)) + ' ends in <' + expression + '>')
+                site_bond_partners[ends[0]] = ends[1]
+                site_bond_partners[ends[1]] = ends[0]
+                bonds.append(ends)
+            species_offsets.append(len(agent_types))
+            species_abundances.append(abundance)
+        # re-code names and states so their tables are sorted, independently of the order they were found in
+        agent_type_names, agent_type_recode = _sorted_table(type_codes)
+        site_name_table, site_name_recode = _sorted_table(name_codes)
+        site_state_table, site_state_recode = _sorted_table(state_codes)
+        return cls(species_offsets=np.array(species_offsets, dtype=np.int64),
+                   species_abundances=np.array(species_abundances, dtype=np.int64),
+                   agent_types=agent_type_recode[np.array(agent_types, dtype=np.int32)],
+                   agent_type_names=agent_type_names,
+                   site_offsets=np.array(site_offsets, dtype=np.int64),
+                   site_names=site_name_recode[np.array(site_names, dtype=np.int32)],
+                   site_name_table=site_name_table,
+                   site_states=site_state_recode[np.array(site_states, dtype=np.int32)],
+                   site_state_table=site_state_table,
+                   site_bond_partners=np.array(site_bond_partners, dtype=np.int64),
+                   bonds=np.array(bonds, dtype=np.int64).reshape(-1, 2))
+
+    def __repr__(self) -> str:
+        return '{0}({1} species, {2} agents, {3} sites, {4} bonds)'.format(
+            self.__class__.__name__, self.get_number_of_species(), len(self.agent_types), len(self.site_names),
+            len(self.bonds))
+
+    def get_number_of_species(self) -> int:
+        """Returns the number of species, or distinct complexes, in the snapshot."""
+        return len(self.species_abundances)
+
+    def get_species_sizes(self) -> np.ndarray:
+        """Returns an array with the size, in agents, of each species."""
+        return np.diff(self.species_offsets)
+
+    def get_agent_species(self) -> np.ndarray:
+        """Returns an array with the index of the species each agent belongs to."""
+        return np.repeat(np.arange(self.get_number_of_species()), self.get_species_sizes())
+
+    def get_site_agents(self) -> np.ndarray:
+        """Returns an array with the index of the agent each site belongs to."""
+        return np.repeat(np.arange(len(self.agent_types)), np.diff(self.site_offsets))
+
+    def get_total_mass(self) -> int:
+        """Returns an int with the total mass of the snapshot, measured in number of agents."""
+        return int(np.dot(self.get_species_sizes(), self.species_abundances))
+
+    def get_size_distribution(self) -> Dict[int, int]:
+        """Returns a dictionary where the key is the size of a complex and the value is the amount of complexes with
+        that size, sorted by increasing complex size."""
+        sizes, size_index = np.unique(self.get_species_sizes(), return_inverse=True)
+        counts = np.bincount(size_index, weights=self.species_abundances, minlength=len(sizes))
+        return dict(zip(sizes.tolist(), counts.astype(np.int64).tolist()))
+
+    def get_agent_counts(self) -> np.ndarray:
+        """Returns an array with the abundance in the snapshot of each agent type, aligned with agent_type_names."""
+        agent_abundances = np.repeat(self.species_abundances, self.get_species_sizes())
+        counts = np.bincount(self.agent_types, weights=agent_abundances, minlength=len(self.agent_type_names))
+        return counts.astype(np.int64)
+
+    def get_composition_matrix(self) -> csr_matrix:
+        """Returns a sparse matrix with one row per species and one column per agent type, aligned with
+        agent_type_names, holding the number of agents of that type in that species."""
+        return csr_matrix((np.ones(len(self.agent_types), dtype=np.int64), (self.get_agent_species(), self.agent_types)),
+                          shape=(self.get_number_of_species(), len(self.agent_type_names)))
+
+    def get_composition(self) -> Dict[KappaAgent, int]:
+        """Return a dictionary where the keys are KappaAgents, their names, and their value is the abundance in the
+        snapshot of those agents."""
+        return dict([(scan_agent_type(agent_name), count) for agent_name, count in
+                     zip(self.agent_type_names, self.get_agent_counts().tolist())])
+
+    def get_species_bond_counts(self) -> np.ndarray:
+        """Returns an array with the number of bonds within each species."""
+        bond_species = self.get_agent_species()[self.get_site_agents()[self.bonds[:, 0]]]
+        return np.bincount(bond_species, minlength=self.get_number_of_species())
+
+    def _get_expanded_offsets(self) -> np.ndarray:
+        """Returns the offsets of each species in the expanded mixture, where each species is repeated as many times as
+        its abundance, copy after copy."""
+        expanded_offsets = np.zeros(self.get_number_of_species() + 1, dtype=np.int64)
+        np.cumsum(self.get_species_sizes() * self.species_abundances, out=expanded_offsets[1:])
+        if expanded_offsets[-1] > np.iinfo(np.int32).max:
+            raise ValueError('Mixture of <' + str(expanded_offsets[-1]) + '> agents exceeds 32-bit agent indexes')
+        return expanded_offsets
+
+    def get_expanded_agent_types(self) -> np.ndarray:
+        """Returns an int32 array with the type code, into agent_type_names, of each agent of the expanded mixture:
+        each species is repeated as many times as its abundance, and its agents numbered in order of declaration, copy
+        after copy, species after species."""
+        expanded_offsets = self._get_expanded_offsets()
+        species_sizes = self.get_species_sizes()
+        expanded_species = np.repeat(np.arange(self.get_number_of_species()), np.diff(expanded_offsets))
+        positions = np.arange(expanded_offsets[-1], dtype=np.int64) - expanded_offsets[expanded_species]
+        agents = self.species_offsets[expanded_species] + positions % species_sizes[expanded_species]
+        return self.agent_types[agents].astype(np.int32)
+
+    def get_edge_array(self, with_sites: bool = False) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """Returns the bonds of the expanded mixture, as an int32 array with one row per bond, holding the indexes of
+        the two agents it links, numbered as in get_expanded_agent_types; that array of agent type codes; and, if
+        with_sites, an int32 array with the codes, into site_name_table, of the two sites each bond links, else None.
+        Bonds are replicated from each species with NumPy, copy after copy, so time and memory are linear in the size
+        of the mixture."""
+        expanded_offsets = self._get_expanded_offsets()
+        species_sizes = self.get_species_sizes()
+        site_agents = self.get_site_agents()
+        bond_agents = site_agents[self.bonds]
+        bond_species = self.get_agent_species()[bond_agents[:, 0]]
+        # bonds are stored species after species, so each species' bonds are a contiguous block
+        bonds_per_species = np.bincount(bond_species, minlength=self.get_number_of_species())
+        bond_offsets = np.zeros(self.get_number_of_species() + 1, dtype=np.int64)
+        np.cumsum(bonds_per_species, out=bond_offsets[1:])
+        expanded_bonds_per_species = bonds_per_species * self.species_abundances
+        expanded_species = np.repeat(np.arange(self.get_number_of_species()), expanded_bonds_per_species)
+        expanded_bond_offsets = np.zeros(self.get_number_of_species() + 1, dtype=np.int64)
+        np.cumsum(expanded_bonds_per_species, out=expanded_bond_offsets[1:])
+        positions = np.arange(expanded_bond_offsets[-1], dtype=np.int64) - expanded_bond_offsets[expanded_species]
+        # within a species, position p is bond p % bonds, of copy p // bonds
+        species_bond_counts = bonds_per_species[expanded_species]
+        copies = positions // species_bond_counts
+        bonds = bond_offsets[expanded_species] + positions % species_bond_counts
+        local_agents = bond_agents[bonds] - self.species_offsets[bond_species[bonds]][:, np.newaxis]
+        copy_offsets = expanded_offsets[expanded_species] + copies * species_sizes[expanded_species]
+        edges = (local_agents + copy_offsets[:, np.newaxis]).astype(np.int32).reshape(-1, 2)
+        edge_sites = self.site_names[self.bonds[bonds]].astype(np.int32).reshape(-1, 2) if with_sites else None
+        return edges, self.get_expanded_agent_types(), edge_sites
+
+    def get_sparse_adjacency(self) -> csr_matrix:
+        """Returns the adjacency matrix of the expanded mixture, agents numbered as in get_edge_array, as a symmetric
+        sparse matrix holding the number of bonds between each pair of agents; a bond from an agent to itself counts
+        once, on the diagonal."""
+        edges, agent_types, _ = self.get_edge_array()
+        loops = edges[:, 0] == edges[:, 1]
+        rows = np.concatenate([edges[:, 0], edges[~loops, 1]])
+        columns = np.concatenate([edges[:, 1], edges[~loops, 0]])
+        adjacency = csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, columns)),
+                               shape=(len(agent_types), len(agent_types)))
+        adjacency.sum_duplicates()
+        return adjacency
+
+
+def _sorted_table(codes: Dict[str, int]) -> Tuple[List[str], np.ndarray]:
+    """Returns the sorted list of the keys of a dictionary of codes, and the array mapping each original code to its
+    position in that list."""
+    table = sorted(codes)
+    recode = np.empty(len(codes), dtype=np.int32)
+    for new_code, key in enumerate(table):
+        recode[codes[key]] = new_code
+    return table, recode
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import numpy as np
+from typing import Dict, Iterable, List, Tuple
+
+from .AtomicWrite import atomic_write
+from .KappaComplex import KappaComplex
+from .KappaSnapshot import KappaSnapshot
+from .KappaSnapshotReader import _build_complex
+from .KappaSnapshotCache import _pack_strings, _unpack_strings
+
+# The trace file starts with a magic string, the byte length of a JSON header, and the header itself; the header gives
+# the dtype, shape, and byte offset of each column. Columns are stored raw, aligned, so they can be memory-mapped.
+TRACE_MAGIC = b'KaSaAnTr'
+TRACE_VERSION = 1
+_column_alignment = 64
+
+
+class SnapshotTrace:
+    """Class for representing a series of snapshots, e.g. those of a single simulation, consolidated into one
+    memory-mapped columnar file. The trace holds a table of the species seen across the series, their expressions
+    and sizes; the abundance vector of each snapshot, in compressed sparse row layout over that table; the time, event,
+    UUID, and file name of each snapshot; and the values of the tokens. Opening a trace maps its columns without reading
+    them, and per-snapshot accessors return zero-copy slices, so analyses over the series never reopen nor re-parse the
+    snapshots. Species are identified by their expression, as written by the simulator, or, if the trace was built with
+    canonical_species, by their canonical expression, so the same species written with other bond identifiers is one
+    entry of the table."""
+
+    def __init__(self, trace_file_name: str):
+        self._file_path: str
+        self._columns: Dict[str, np.ndarray]
+        self._strings: Dict[str, List[str]]
+
+        self._file_path = trace_file_name
+        self._columns = dict()
+        self._strings = dict()
+        with open(trace_file_name, 'rb') as trace_file:
+            magic = trace_file.read(len(TRACE_MAGIC))
+            if magic != TRACE_MAGIC:
+                raise ValueError('File <' + trace_file_name + '> is not a snapshot trace')
+            header_size = int.from_bytes(trace_file.read(8), 'little')
+            header = json.loads(trace_file.read(header_size).decode('utf-8'))
+        if header['version'] != TRACE_VERSION:
+            raise ValueError('Trace <' + trace_file_name + '> is of version <' + str(header['version']) +
+                             '>, I read version <' + str(TRACE_VERSION) + '>')
+        for column_name, (dtype, shape, offset) in header['columns'].items():
+            if np.prod(shape) == 0:
+                # empty columns can not be mapped
+                self._columns[column_name] = np.empty(shape, dtype=dtype)
+            else:
+                self._columns[column_name] = np.memmap(trace_file_name, dtype=dtype, mode='r', offset=offset,
+                                                       shape=tuple(shape))
+
+    @classmethod
+    def from_snapshots(cls, snapshot_file_names: Iterable[str], trace_file_name: str, use_cache: bool = False,
+                       verbosity: bool = False, canonical_species: bool = False) -> 'SnapshotTrace':
+        """Consolidates a series of snapshots, in the order given, into a trace file, and returns it opened. Snapshots
+        are read one at a time, without parsing their complexes; with use_cache, through their sidecar caches. With
+        canonical_species, each distinct expression is parsed once, and the species table holds canonical expressions,
+        merging isomorphic species."""
+        species_codes = dict()
+        canonical_expressions = dict()
+        species_sizes = []
+        token_codes = dict()
+        snapshot_file_names = list(snapshot_file_names)
+        snapshot_times = []
+        snapshot_events = []
+        snapshot_uuids = []
+        snapshot_offsets = [0]
+        entry_species = []
+        entry_abundances = []
+        snapshot_tokens = []
+        for snap_index, snap_name in enumerate(snapshot_file_names):
+            if verbosity:
+                print('Now consolidating file <{}>, {} of {}'.format(snap_name, snap_index, len(snapshot_file_names)))
+            snap = KappaSnapshot(snap_name, lazy=True, use_cache=use_cache)
+            snapshot_times.append(snap.get_snapshot_time())
+            snapshot_events.append(snap.get_snapshot_event())
+            snapshot_uuids.append(snap.get_snapshot_uuid())
+            species_indexes = []
+            for expression, size in zip(snap._species_expressions, snap._species_sizes):
+                if canonical_species:
+                    if expression not in canonical_expressions:
+                        canonical_expressions[expression] = KappaComplex(expression).get_canonical_expression()
+                    expression = canonical_expressions[expression]
+                species_index = species_codes.setdefault(expression, len(species_codes))
+                if species_index == len(species_sizes):
+                    species_sizes.append(size)
+                species_indexes.append(species_index)
+            species_indexes = np.array(species_indexes, dtype=np.int64)
+            species_abundances = np.array(snap._species_abundances, dtype=np.int64)
+            if canonical_species:
+                # isomorphic entries of a snapshot are merged, keeping the entries sorted by first appearance
+                unique_species, first_entries, entry_codes = np.unique(species_indexes, return_index=True,
+                                                                       return_inverse=True)
+                species_abundances = np.bincount(entry_codes, weights=species_abundances,
+                                                 minlength=len(unique_species)).astype(np.int64)
+                entry_order = np.argsort(first_entries, kind='stable')
+                species_indexes = unique_species[entry_order]
+                species_abundances = species_abundances[entry_order]
+            entry_species.append(species_indexes)
+            entry_abundances.append(species_abundances)
+            snapshot_offsets.append(snapshot_offsets[-1] + len(species_indexes))
+            tokens = snap.get_all_tokens_and_values()
+            for token_name in tokens:
+                token_codes.setdefault(token_name, len(token_codes))
+            snapshot_tokens.append(tokens)
+        token_values = np.full((len(snapshot_file_names), len(token_codes)), np.nan, dtype=np.float64)
+        for snap_index, tokens in enumerate(snapshot_tokens):
+            for token_name, token_value in tokens.items():
+                token_values[snap_index, token_codes[token_name]] = token_value
+        columns = {
+            'snapshot_times': np.array(snapshot_times, dtype=np.float64),
+            'snapshot_events': np.array(snapshot_events, dtype=np.int64),
+            'snapshot_offsets': np.array(snapshot_offsets, dtype=np.int64),
+            'entry_species': np.concatenate(entry_species) if entry_species else np.empty(0, dtype=np.int64),
+            'entry_abundances': np.concatenate(entry_abundances) if entry_abundances else np.empty(0, dtype=np.int64),
+            'species_sizes': np.array(species_sizes, dtype=np.int64),
+            'token_values': token_values}
+        strings = {
+            'snapshot_file_names': [os.path.split(snap_name)[1] for snap_name in snapshot_file_names],
+            'snapshot_uuids': snapshot_uuids,
+            'species_expressions': list(species_codes.keys()),
+            'token_names': list(token_codes.keys())}
+        for column_name, column_strings in strings.items():
+            columns[column_name], columns[column_name + '_offsets'] = _pack_strings(column_strings)
+        _write_columns(trace_file_name, columns)
+        return cls(trace_file_name)
+
+    def __repr__(self) -> str:
+        return '{0}("{1}")'.format(self.__class__.__name__, self._file_path)
+
+    def _get_strings(self, column_name: str) -> List[str]:
+        """Returns the decoded list of strings stored in a column, decoding it on first use."""
+        if column_name not in self._strings:
+            self._strings[column_name] = _unpack_strings(self._columns[column_name],
+                                                         self._columns[column_name + '_offsets'])
+        return self._strings[column_name]
+
+    def _get_entry_snapshots(self) -> np.ndarray:
+        """Returns an array with the index of the snapshot each abundance entry belongs to."""
+        return np.repeat(np.arange(self.get_number_of_snapshots()), np.diff(self._columns['snapshot_offsets']))
+
+    def get_number_of_snapshots(self) -> int:
+        """Returns the number of snapshots in the trace."""
+        return len(self._columns['snapshot_times'])
+
+    def get_number_of_species(self) -> int:
+        """Returns the number of distinct species seen across the trace."""
+        return len(self._columns['species_sizes'])
+
+    def get_snapshot_file_names(self) -> List[str]:
+        """Returns the names of the files the snapshots came from, in trace order."""
+        return list(self._get_strings('snapshot_file_names'))
+
+    def get_snapshot_uuids(self) -> List[str]:
+        """Returns the UUIDs of the snapshots, in trace order."""
+        return list(self._get_strings('snapshot_uuids'))
+
+    def get_snapshot_times(self) -> np.ndarray:
+        """Returns a read-only array with the time each snapshot was taken at."""
+        return self._columns['snapshot_times']
+
+    def get_snapshot_events(self) -> np.ndarray:
+        """Returns a read-only array with the event number each snapshot was taken at."""
+        return self._columns['snapshot_events']
+
+    def get_species_expressions(self) -> List[str]:
+        """Returns the expressions of the species in the trace's species table."""
+        return list(self._get_strings('species_expressions'))
+
+    def get_species_sizes(self) -> np.ndarray:
+        """Returns a read-only array with the size, in agents, of each species in the trace's species table."""
+        return self._columns['species_sizes']
+
+    def get_species_complex(self, species_index: int) -> KappaComplex:
+        """Returns the KappaComplex of a species of the trace's species table, parsing its expression."""
+        kappa_complex, _ = _build_complex((0, int(self._columns['species_sizes'][species_index]),
+                                           self._get_strings('species_expressions')[species_index]), self._file_path)
+        return kappa_complex
+
+    def get_snapshot_entries(self, snapshot_index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the species present in a snapshot, as indexes into the species table, and their abundances. Both are
+        read-only slices of the mapped file, in the snapshot's order."""
+        start, end = self._columns['snapshot_offsets'][snapshot_index:snapshot_index + 2]
+        return self._columns['entry_species'][start:end], self._columns['entry_abundances'][start:end]
+
+    def get_abundance_vector(self, snapshot_index: int) -> np.ndarray:
+        """Returns an array, aligned with the species table, with the abundance of each species in a snapshot; zero for
+        species absent from it."""
+        species, abundances = self.get_snapshot_entries(snapshot_index)
+        vector = np.zeros(self.get_number_of_species(), dtype=np.int64)
+        vector[species] = abundances
+        return vector
+
+    def get_series_sum(self, species_values: np.ndarray) -> np.ndarray:
+        """Returns an array with, for each snapshot, the sum over its species of a per-species value times the species'
+        abundance. The values are aligned with the species table, so per-species quantities, like a species' catalytic
+        potential, are computed once for the whole series."""
+        species_values = np.asarray(species_values)
+        weights = species_values[self._columns['entry_species']] * self._columns['entry_abundances']
+        return np.bincount(self._get_entry_snapshots(), weights=weights, minlength=self.get_number_of_snapshots())
+
+    def get_total_masses(self) -> np.ndarray:
+        """Returns an array with the total mass of each snapshot, measured in number of agents."""
+        return self.get_series_sum(self.get_species_sizes()).astype(np.int64)
+
+    def get_size_distribution(self, snapshot_index: int) -> Dict[int, int]:
+        """Returns a dictionary where the key is the size of a complex and the value is the amount of complexes with
+        that size in a snapshot, sorted by increasing complex size."""
+        species, abundances = self.get_snapshot_entries(snapshot_index)
+        sizes, size_index = np.unique(self.get_species_sizes()[species], return_inverse=True)
+        counts = np.bincount(size_index, weights=abundances, minlength=len(sizes))
+        return dict(zip(sizes.tolist(), counts.astype(np.int64).tolist()))
+
+    def get_mean_size_distribution(self) -> Dict[int, float]:
+        """Returns a dictionary where the key is the size of a complex and the value is the mean amount of complexes with
+        that size, averaged over the snapshots of the trace, sorted by increasing complex size."""
+        entry_sizes = self.get_species_sizes()[self._columns['entry_species']]
+        sizes, size_index = np.unique(entry_sizes, return_inverse=True)
+        counts = np.bincount(size_index, weights=self._columns['entry_abundances'], minlength=len(sizes))
+        return dict(zip(sizes.tolist(), (counts / max(self.get_number_of_snapshots(), 1)).tolist()))
+
+    def get_token_names(self) -> List[str]:
+        """Returns the names of the tokens seen across the trace."""
+        return list(self._get_strings('token_names'))
+
+    def get_token_values(self) -> np.ndarray:
+        """Returns a read-only array, of one row per snapshot and one column per token, aligned with get_token_names(),
+        with the value of each token; NaN where a snapshot does not declare the token."""
+        return self._columns['token_values']
+
+
+def _write_columns(trace_file_name: str, columns: Dict[str, np.ndarray]):
+    """Writes the columns of a trace: magic, header length, JSON header, and the aligned raw columns. The file is written
+    under a temporary name, then moved into place."""
+    column_layout = dict()
+    position = 0
+    for column_name, column in columns.items():
+        column_layout[column_name] = [column.dtype.str, list(column.shape), position]
+        position += -(-column.nbytes // _column_alignment) * _column_alignment
+    # the header's own size shifts the columns, so its offsets are fixed up once it is encoded
+    header = json.dumps({'version': TRACE_VERSION, 'columns': column_layout}).encode('utf-8')
+    preamble_size = len(TRACE_MAGIC) + 8 + len(header) + 20 * len(column_layout)
+    data_start = -(-preamble_size // _column_alignment) * _column_alignment
+    for layout in column_layout.values():
+        layout[2] += data_start
+    header = json.dumps({'version': TRACE_VERSION, 'columns': column_layout}).encode('utf-8')
+    if len(TRACE_MAGIC) + 8 + len(header) > data_start:
+        raise RuntimeError('Trace header outgrew its reserved space')
+    with atomic_write(trace_file_name) as temp_file:
+        temp_file.write(TRACE_MAGIC)
+        temp_file.write(len(header).to_bytes(8, 'little'))
+        temp_file.write(header)
+        for column_name, column in columns.items():
+            temp_file.seek(column_layout[column_name][2])
+            temp_file.write(np.ascontiguousarray(column).tobytes())
+        temp_file.truncate(data_start + position)
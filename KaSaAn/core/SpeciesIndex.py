@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from typing import Dict, List, Tuple, Union
+
+from .KappaAgent import KappaAgent
+from .KappaSite import KappaPort, KappaSite
+from .KappaScanner import scan_site
+from .SnapshotArrays import SnapshotArrays
+
+# bond classes of indexed sites: a port bound through an identifier is filed with those bound to anything, [_]
+_bond_classes = ['.', '_', '#', None]
+
+
+def _compatible_bond_classes(query_bond: str) -> List[str]:
+    """Returns the bond classes of the ports a query port with that bond state may embed in, with the semantics of
+    KappaPort containment. A query naming a bond identifier may only embed in ports of the '_' class, or in wildcards;
+    whether the identifiers agree is left for the caller to check."""
+    if query_bond == '#':
+        return ['.', '_', '#']
+    elif query_bond == '.':
+        return ['.', '#']
+    else:
+        return ['_', '#']
+
+
+def _merge_postings(postings: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the union of posting lists of species identifiers, with the multiplicities of each species summed."""
+    if not postings:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    if len(postings) == 1:
+        return postings[0]
+    species, species_index = np.unique(np.concatenate([ids for ids, _ in postings]), return_inverse=True)
+    multiplicities = np.bincount(species_index, weights=np.concatenate([mults for _, mults in postings]),
+                                 minlength=len(species))
+    return species, multiplicities.astype(np.int64)
+
+
+class SpeciesIndex:
+    """Class for an inverted index over the species of a snapshot. Each agent type maps to the identifiers of the
+    species that contain it, and each site of that type, as its name, internal state, and bond class, maps to the
+    species holding agents with that site; both come with per-species multiplicities, i.e. the number of agents
+    concerned in each species. Species identifiers are the positions of the species in the snapshot. Posting lists are
+    sorted NumPy arrays, so a single-agent pattern narrows the mixture to its candidate species by intersecting the
+    posting lists of its sites, and only those need to be inspected further.
+
+    Ports bound through an identifier are indexed as bound to anything, [_]; counters are indexed with their value
+    expression, and a bond class of None."""
+
+    def __init__(self, species_abundances: np.ndarray, agent_postings: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                 site_postings: Dict[Tuple[str, str], List[Tuple[str, str, np.ndarray, np.ndarray]]]):
+        self._species_abundances: np.ndarray
+        self._agent_postings: Dict[str, Tuple[np.ndarray, np.ndarray]]
+        self._site_postings: Dict[Tuple[str, str], List[Tuple[str, str, np.ndarray, np.ndarray]]]
+
+        self._species_abundances = species_abundances
+        # agent name -> species identifiers, number of agents of that name in each
+        self._agent_postings = agent_postings
+        # (agent name, site name) -> list of (internal state, bond class, species identifiers, multiplicities)
+        self._site_postings = site_postings
+
+    @classmethod
+    def from_arrays(cls, arrays: SnapshotArrays) -> 'SpeciesIndex':
+        """Builds the index from the SnapshotArrays of a snapshot, grouping its agents and sites with NumPy, without
+        building any KappaComplex nor KappaAgent."""
+        # keys are strided by the number of species, so that sorting them also sorts each posting list
+        number_of_species = max(arrays.get_number_of_species(), 1)
+        agent_species = arrays.get_agent_species()
+        # agents, keyed by type and species
+        agent_keys, agent_counts = np.unique(arrays.agent_types.astype(np.int64) * number_of_species + agent_species,
+                                             return_counts=True)
+        agent_postings = dict()
+        for type_code, start, end in _runs(agent_keys // number_of_species):
+            agent_postings[arrays.agent_type_names[type_code]] = (
+                agent_keys[start:end] % number_of_species, agent_counts[start:end].astype(np.int64))
+        # sites, keyed by agent type, site name, state, bond class, and species
+        site_agents = arrays.get_site_agents()
+        bond_class_codes = np.select(
+            [arrays.site_bond_partners == SnapshotArrays.FREE, arrays.site_bond_partners == SnapshotArrays.WILDCARD,
+             arrays.site_bond_partners == SnapshotArrays.NOT_A_PORT], [0, 2, 3], default=1)
+        key_shape = (len(arrays.agent_type_names), len(arrays.site_name_table), len(arrays.site_state_table),
+                     len(_bond_classes))
+        site_keys = np.ravel_multi_index((arrays.agent_types[site_agents], arrays.site_names, arrays.site_states,
+                                          bond_class_codes), key_shape)
+        site_keys, site_counts = np.unique(site_keys.astype(np.int64) * number_of_species + agent_species[site_agents],
+                                           return_counts=True)
+        site_postings = dict()
+        for key, start, end in _runs(site_keys // number_of_species):
+            type_code, name_code, state_code, bond_class_code = np.unravel_index(key, key_shape)
+            site_postings.setdefault(
+                (arrays.agent_type_names[type_code], arrays.site_name_table[name_code]), []).append(
+                (arrays.site_state_table[state_code], _bond_classes[bond_class_code],
+                 site_keys[start:end] % number_of_species, site_counts[start:end].astype(np.int64)))
+        return cls(np.asarray(arrays.species_abundances, dtype=np.int64), agent_postings, site_postings)
+
+    def __repr__(self) -> str:
+        return '{0}({1} species, {2} agent types, {3} site keys)'.format(
+            self.__class__.__name__, len(self._species_abundances), len(self._agent_postings),
+            sum([len(postings) for postings in self._site_postings.values()]))
+
+    def get_agent_names(self) -> List[str]:
+        """Returns the sorted names of the agent types indexed."""
+        return sorted(self._agent_postings)
+
+    def get_species_with_agent(self, agent_name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the sorted identifiers of the species that contain agents of that name, and the number of such
+        agents in each."""
+        return self._agent_postings.get(
+            agent_name, (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)))
+
+    def get_species_with_site(self, agent_name: str, query_site: Union[str, KappaSite]) -> \
+            Tuple[np.ndarray, np.ndarray]:
+        """Returns the sorted identifiers of the species that contain agents of that name whose site embeds the query
+        site, e.g. 'y{p}', 'l[.]', or 'c{=2}', and the number of such agents in each. Ports match with the semantics of
+        KappaPort containment, counters by equality. For a port naming a bond identifier, e.g. 'l[1]', the result is a
+        superset: every port bound to something is counted."""
+        if not isinstance(query_site, KappaSite):
+            query_site = scan_site(query_site)
+        postings = []
+        if type(query_site) is KappaPort:
+            query_state = query_site.get_port_current_state()
+            bond_classes = _compatible_bond_classes(query_site.get_port_current_bond())
+            for state, bond_class, species, multiplicities in \
+                    self._site_postings.get((agent_name, query_site.get_port_name()), []):
+                if bond_class in bond_classes and (query_state == '#' or state == '#' or state == query_state):
+                    postings.append((species, multiplicities))
+        else:
+            for state, bond_class, species, multiplicities in \
+                    self._site_postings.get((agent_name, query_site.get_counter_name()), []):
+                if bond_class is None and state == query_site.get_counter_state():
+                    postings.append((species, multiplicities))
+        return _merge_postings(postings)
+
+    def is_exact(self, query: Union[str, KappaAgent]) -> bool:
+        """Returns true if the multiplicities given for a query agent are its exact numbers of embeddings, i.e. if the
+        query has at most one site, and that site does not name a bond identifier."""
+        if not type(query) is KappaAgent:
+            query = KappaAgent(query)
+        signature = query.get_agent_signature()
+        return len(signature) == 0 or (len(signature) == 1 and not (
+            type(signature[0]) is KappaPort and signature[0].get_port_current_bond().isdigit()))
+
+    def get_candidate_species(self, query: Union[str, KappaAgent]) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the sorted identifiers of the species a single-agent query may embed in, e.g. 'S(y{p})' or
+        'EGFR(l[.] r[_])', by intersecting the posting lists of its sites, and per species an upper bound on the number
+        of agents it embeds in: the least of the multiplicities of its sites. If is_exact holds for the query, those
+        are its numbers of embeddings; otherwise, the candidates must be checked, e.g. with
+        KappaComplex.get_number_of_embeddings_of_agent."""
+        if not type(query) is KappaAgent:
+            query = KappaAgent(query)
+        species, multiplicities = self.get_species_with_agent(query.get_agent_name())
+        for query_site in query.get_agent_signature():
+            site_species, site_multiplicities = self.get_species_with_site(query.get_agent_name(), query_site)
+            species, kept, site_kept = np.intersect1d(species, site_species, assume_unique=True, return_indices=True)
+            multiplicities = np.minimum(multiplicities[kept], site_multiplicities[site_kept])
+            if len(species) == 0:
+                break
+        return species, multiplicities
+
+    def get_abundance_of_agent(self, query: Union[str, KappaAgent]) -> int:
+        """Returns the abundance of a single-agent query in the snapshot, weighing each candidate species by its
+        abundance. Only valid if is_exact holds for the query."""
+        if not self.is_exact(query):
+            raise ValueError('Query <' + str(query) + '> can not be answered by the index alone.')
+        species, multiplicities = self.get_candidate_species(query)
+        return int(np.dot(multiplicities, self._species_abundances[species]))
+
+
+def _runs(keys: np.ndarray) -> List[Tuple[int, int, int]]:
+    """Returns the value, start, and end of each run of equal values in a sorted array."""
+    if len(keys) == 0:
+        return []
+    starts = np.flatnonzero(np.diff(keys)) + 1
+    bounds = np.concatenate([[0], starts, [len(keys)]])
+    return list(zip(keys[bounds[:-1]].tolist(), bounds[:-1].tolist(), bounds[1:].tolist()))
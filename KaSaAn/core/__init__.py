@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 
 from .KappaSnapshot import KappaSnapshot
+from .KappaSnapshotReader import KappaSnapshotReader, iter_snapshot
+from .SnapshotArrays import SnapshotArrays
+from .SpeciesIndex import SpeciesIndex
+from .SnapshotTrace import SnapshotTrace
 from .KappaComplex import KappaComplex
 from .KappaAgent import KappaAgent, KappaToken
+from .AgentPatternBatch import AgentPatternBatch
+from .ComplexPattern import ComplexPattern
 from .KappaSite import KappaPort, KappaCounter
 from .KappaRule import KappaRule
 from .KappaContactMap import KappaContactMap
+from .AtomicWrite import atomic_write
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 
-from .catalytic_potential import get_potential_of_snapshot, get_potential_of_folder
-from .observable_plotter import observable_file_reader, observable_list_axis_annotator
-from .observable_coplotter import observable_coplot_axis_annotator, observable_multi_data_axis_annotator
+from .catalytic_potential import get_potential_of_snapshot, get_potential_of_folder, get_potential_of_trace
+from .observable_plotter import observable_file_reader, observable_file_tail_reader, observable_legend_reader, \
+    observable_list_axis_annotator, observable_follow_axis_annotator
+from .observable_coplotter import observable_coplot_axis_annotator, observable_multi_data_axis_annotator, \
+    observable_ensemble_axis_annotator, get_ensemble_statistics
 from .numerical_sort import numerical_sort
 from .plot_filtered_distributions import plot_filtered_dist
 from .prefixed_snapshot_analyzer import prefixed_snapshot_analyzer
 from .snapshot_visualizer_patchwork import render_snapshot_as_patchwork
 from .snapshot_visualizer_network import render_snapshot_as_plain_graph
 from .snapshot_visualizer_subcomponent import render_complexes_as_plain_graph
+from .snapshot_trace_builder import build_snapshot_trace
+from .size_distribution_matrix import build_size_distribution_matrix, load_size_distribution_matrix
+from .species_statistics import get_complex_statistics, get_snapshot_statistics
 from .trace_movie_maker import movie_from_snapshots
@@ -2,41 +2,54 @@
 
 import glob
 import warnings
+import numpy as np
+from functools import partial
 from typing import List
 
-from KaSaAn.core import KappaSnapshot, KappaAgent
+from KaSaAn.core import KappaSnapshot, KappaSnapshotReader, KappaAgent, SnapshotTrace
 from .numerical_sort import numerical_sort
+from .snapshot_pool import map_snapshots
 
 
-def get_potential_of_snapshot(snapshot, enzyme, substrate) -> int:
+def get_potential_of_snapshot(snapshot, enzyme, substrate, use_cache: bool = False) -> int:
     """"The catalytic potential of a snapshot is a number. Each molecular species will contain a (possibly zero)
     quantity of enzymes, and another of substrates. Their product is the catalytic potential of the species. The sum
-    over the species in a snapshot yields the catalytic potential of the snapshot."""
+    over the species in a snapshot yields the catalytic potential of the snapshot. The snapshot can be a KappaSnapshot,
+    a KappaSnapshotReader (streamed in a single pass, in bounded memory), or a file name, which will be streamed, or
+    read through its sidecar cache if use_cache is set."""
     # If not already KappaEntities, try to convert them into ones, i.e. from strings for expressions or filenames
     if not type(enzyme) is KappaAgent:
         enzyme = KappaAgent(enzyme)
     if not type(substrate) is KappaAgent:
         substrate = KappaAgent(substrate)
-    if not type(snapshot) is KappaSnapshot:
-        snapshot = KappaSnapshot(snapshot)
-    # Sanity check: both requested agent names are present in the snapshot
-    if enzyme not in snapshot.get_agent_types_present():
-        warnings.warn(
-            'Agent name <' + enzyme.get_agent_name() + '> + not in <' + snapshot.get_snapshot_file_name() + '>')
-    if substrate not in snapshot.get_agent_types_present():
-        warnings.warn(
-            'Agent name <' + substrate.get_agent_name() + '> + not in <' + snapshot.get_snapshot_file_name() + '>')
-    # Iterate over each complex and calculate its catalytic potential, q
+    if not type(snapshot) is KappaSnapshot and not type(snapshot) is KappaSnapshotReader:
+        if use_cache:
+            snapshot = KappaSnapshot(snapshot, lazy=True, use_cache=True)
+        else:
+            snapshot = KappaSnapshotReader(snapshot)
+    # Iterate over each complex and calculate its catalytic potential, q; collect the agent names seen along the way
     cat_pot = 0
+    agent_types = set()
     for mol_spec, ab in snapshot.get_all_complexes_and_abundances():
+        agent_types.update(mol_spec.get_agent_types())
         e = mol_spec.get_number_of_embeddings_of_agent(enzyme)
         s = mol_spec.get_number_of_embeddings_of_agent(substrate)
         cat_pot += e * s * ab
+    # Sanity check: both requested agent names are present in the snapshot
+    if enzyme not in agent_types:
+        warnings.warn(
+            'Agent name <' + enzyme.get_agent_name() + '> + not in <' + snapshot.get_snapshot_file_name() + '>')
+    if substrate not in agent_types:
+        warnings.warn(
+            'Agent name <' + substrate.get_agent_name() + '> + not in <' + snapshot.get_snapshot_file_name() + '>')
     return cat_pot
 
 
 def get_potential_of_folder(base_directory: str, enzyme: KappaAgent, substrate: KappaAgent,
-                            verbosity: bool, snap_name_prefix: str) -> List[int]:
+                            verbosity: bool, snap_name_prefix: str, use_cache: bool = False,
+                            workers: int = 1) -> List[int]:
+    """Returns the catalytic potential of each snapshot in a directory sharing a prefix, in numerical order. With more
+    than one worker, snapshots are analyzed in parallel, by a pool of processes."""
     if base_directory[-1] != '/':
         base_directory += '/'
     # Get the file names of snapshots in specified directory
@@ -48,11 +61,38 @@ def get_potential_of_folder(base_directory: str, enzyme: KappaAgent, substrate:
         warnings.warn('Found less than two snapshots.')
     # Iterate over the files and calculate each's catalytic potential
     cat_pot_dist = []
-    snap_num = len(snap_names)
+    potentials = map_snapshots(partial(get_potential_of_snapshot, enzyme=enzyme, substrate=substrate,
+                                       use_cache=use_cache), snap_names, workers)
     for snap_index in range(snap_num):
         snap_name = snap_names[snap_index]
         if verbosity:
             print('Now parsing file <{}>, {} of {}, {}%'.format(
                 snap_name, snap_index, snap_num, 100*snap_index/snap_num))
-        cat_pot_dist.append(get_potential_of_snapshot(snap_name, enzyme, substrate))
+        cat_pot_dist.append(next(potentials))
     return cat_pot_dist
+
+
+def get_potential_of_trace(trace, enzyme: KappaAgent, substrate: KappaAgent) -> List[int]:
+    """Returns the catalytic potential of each snapshot of a SnapshotTrace, or of the trace file of that name. The
+    potential of each distinct species is computed once, from the trace's species table, then weighed by the species'
+    abundance in each snapshot."""
+    if not type(enzyme) is KappaAgent:
+        enzyme = KappaAgent(enzyme)
+    if not type(substrate) is KappaAgent:
+        substrate = KappaAgent(substrate)
+    if not type(trace) is SnapshotTrace:
+        trace = SnapshotTrace(trace)
+    species_potentials = np.zeros(trace.get_number_of_species(), dtype=np.int64)
+    agent_types = set()
+    for species_index in range(trace.get_number_of_species()):
+        mol_spec = trace.get_species_complex(species_index)
+        agent_types.update(mol_spec.get_agent_types())
+        e = mol_spec.get_number_of_embeddings_of_agent(enzyme)
+        s = mol_spec.get_number_of_embeddings_of_agent(substrate)
+        species_potentials[species_index] = e * s
+    # Sanity check: both requested agent names are present in the trace
+    if enzyme not in agent_types:
+        warnings.warn('Agent name <' + enzyme.get_agent_name() + '> + not in <' + str(trace) + '>')
+    if substrate not in agent_types:
+        warnings.warn('Agent name <' + substrate.get_agent_name() + '> + not in <' + str(trace) + '>')
+    return trace.get_series_sum(species_potentials).astype(np.int64).tolist()
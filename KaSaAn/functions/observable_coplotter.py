@@ -1,11 +1,15 @@
 #! /usr/bin/env python3
 
 import glob
+import os
 import warnings
 import numpy as np
-from typing import List, Tuple
-from .observable_plotter import observable_file_reader
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from .observable_plotter import observable_file_reader, decimate_min_max, _get_axis_pixel_width, \
+    _read_observable_legend
 from .numerical_sort import numerical_sort
+from .snapshot_pool import map_snapshots
 
 
 def find_data_files(pattern: str) -> List[str]:
@@ -18,10 +22,12 @@ def find_data_files(pattern: str) -> List[str]:
 
 
 def observable_multi_data_axis_annotator(co_plot_axis, file_data_list: List[Tuple[List[str], np.array, str]],
-                                         var_to_coplot: int, diff_toggle: bool):
-    """Co-plot the same variable from a list of files."""
+                                         var_to_coplot: int, diff_toggle: bool, decimation: bool = True):
+    """Co-plot the same variable from a list of files. Unless decimation is turned off, series longer than the axis is
+    wide are reduced with decimate_min_max to one bin per pixel, after taking derivatives if diff_toggle is set."""
     var_index = var_to_coplot - 1
     legend_entries = []
+    number_of_bins = _get_axis_pixel_width(co_plot_axis)
     for file_data in file_data_list:
         legend_data, numeric_data, file_name = file_data
         data_x = numeric_data[:, 0]
@@ -39,6 +45,8 @@ def observable_multi_data_axis_annotator(co_plot_axis, file_data_list: List[Tupl
             plot_drawstyle = 'steps-post'
         else:
             plot_drawstyle = 'default'
+        if decimation:
+            data_x, data_y = decimate_min_max(data_x, data_y, number_of_bins)
         co_plot_axis.plot(data_x, data_y, label=legend_entry, drawstyle=plot_drawstyle)
     co_plot_axis.set_xlabel('Time')
     if diff_toggle:
@@ -52,13 +60,139 @@ def observable_multi_data_axis_annotator(co_plot_axis, file_data_list: List[Tupl
     return co_plot_axis
 
 
-def observable_coplot_axis_annotator(target_axis, file_pattern: str, plot_variable: int, differential_toggle: bool):
+def observable_coplot_axis_annotator(target_axis, file_pattern: str, plot_variable: int, differential_toggle: bool,
+                                     decimation: bool = True):
     file_names = find_data_files(file_pattern)
     file_data_list = []
     for file_name in file_names:
-        legend_data, numeric_data = observable_file_reader(file_name)
+        # only time and the variable are read, so the variable is the second column of the data
+        legend_data, numeric_data = observable_file_reader(file_name, columns=[1, plot_variable])
         if numeric_data.shape[0] <= 1:
             warnings.warn('Only one time point in file ' + file_name)
         file_data_list.append((legend_data, numeric_data, file_name))
-    observable_multi_data_axis_annotator(target_axis, file_data_list, plot_variable, differential_toggle)
+    observable_multi_data_axis_annotator(target_axis, file_data_list, 2, differential_toggle, decimation)
     return target_axis
+
+
+def resample_step(times: np.ndarray, values: np.ndarray, time_grid: np.ndarray) -> np.ndarray:
+    """Resample a series onto a time grid, holding each value until the next time point, as a step plot would draw it.
+    Grid points before the first time point, or after the last, are NaN."""
+    indexes = np.searchsorted(times, time_grid, side='right') - 1
+    resampled = values[np.maximum(indexes, 0)].astype(float)
+    resampled[(indexes < 0) | (time_grid > times[-1])] = np.nan
+    return resampled
+
+
+def read_observable_time_span(file_name: str) -> Optional[Tuple[float, float]]:
+    """Returns the times of the first and last rows of a kappa output file, e.g. <data.csv>, or None if it has no rows.
+    Only the header, the first row, and the end of the file are read, however long the file is."""
+    with open(file_name, 'rb') as data_file:
+        _read_observable_legend(data_file)
+        data_start = data_file.tell()
+        first_line = data_file.readline().strip()
+        if not first_line:
+            return None
+        # the last line is searched for in blocks from the end of the file, each twice the size of the previous
+        file_size = os.fstat(data_file.fileno()).st_size
+        block_size = 1 << 12
+        while True:
+            block_start = max(data_start, file_size - block_size)
+            data_file.seek(block_start)
+            block = data_file.read(file_size - block_start).rstrip()
+            if b'\n' in block or block_start == data_start:
+                break
+            block_size *= 2
+        last_line = block[block.rfind(b'\n') + 1:]
+    return float(first_line.split(b',')[0]), float(last_line.split(b',')[0])
+
+
+def resample_observable_file(file_name: str, column: int, time_grid: np.ndarray) -> Tuple[str, np.ndarray, int]:
+    """Reads the time and one column, as a 1-based index into the legend, of a kappa output file, and resamples the
+    column onto a time grid with resample_step. Returns the legend entry of the column, the resampled values, and the
+    number of rows read; a file with no rows is NaN throughout."""
+    legend_data, numeric_data = observable_file_reader(file_name, columns=[1, column])
+    if numeric_data.shape[0] == 0:
+        return legend_data[1], np.full(len(time_grid), np.nan), 0
+    return legend_data[1], resample_step(numeric_data[:, 0], numeric_data[:, 1], time_grid), numeric_data.shape[0]
+
+
+def _reduce_ensemble(ensemble: np.ndarray, time_grid: np.ndarray, quantiles: Tuple[float, float],
+                     diff_toggle: bool) -> Dict[str, np.ndarray]:
+    """Reduces replicates resampled onto a shared time grid, one per row, as get_ensemble_statistics does."""
+    if diff_toggle:
+        ensemble = np.diff(ensemble, axis=1) / np.diff(time_grid)
+        time_grid = time_grid[1:]
+    covered = np.count_nonzero(~np.isnan(ensemble), axis=0)
+    statistics = {'time': time_grid, 'replicates': covered}
+    with warnings.catch_warnings():
+        # grid points no replicate covers are NaN, and need no warning
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        statistics['mean'] = np.nanmean(ensemble, axis=0)
+        statistics['std'] = np.nanstd(ensemble, axis=0)
+        statistics['lower quantile'], statistics['upper quantile'] = np.nanquantile(ensemble, quantiles, axis=0)
+    return statistics
+
+
+def get_ensemble_statistics(series_list: List[Tuple[np.ndarray, np.ndarray]], time_grid: np.ndarray,
+                            quantiles: Tuple[float, float] = (0.05, 0.95), diff_toggle: bool = False) -> \
+        Dict[str, np.ndarray]:
+    """Resample each (times, values) series onto a shared time grid, with resample_step, and reduce them across
+    replicates into the mean, standard deviation, and the two quantiles given, at each grid point. Grid points outside
+    the time span of a replicate ignore it. With diff_toggle, each resampled series is derived over the grid, so the
+    statistics are of the rate of change between consecutive grid points, which are then the time of the later one.
+    Returns a dictionary with keys 'time', 'mean', 'std', 'lower quantile', 'upper quantile', and 'replicates', the
+    number of replicates covering each grid point."""
+    ensemble = np.vstack([resample_step(times, values, time_grid) for times, values in series_list])
+    return _reduce_ensemble(ensemble, time_grid, quantiles, diff_toggle)
+
+
+def observable_ensemble_axis_annotator(target_axis, file_pattern: str, plot_variable: int, differential_toggle: bool,
+                                       workers: int = 1, quantiles: Tuple[float, float] = (0.05, 0.95),
+                                       grid_points: int = None) -> Dict[str, np.ndarray]:
+    """Plot the same variable from a set of replicate files as an ensemble: the mean, a band of one standard deviation
+    around it, and a band between the two quantiles given, instead of one line per file. Files are read by a pool of
+    workers, and resampled onto a shared, evenly spaced time grid spanning every file; by default it has one point
+    per pixel of the axis. The grid's span is found from the first and last rows of each file; each worker then
+    reads a whole file and resamples it, so only resampled series are ever held together. Returns the statistics, as
+    computed by get_ensemble_statistics."""
+    file_names = find_data_files(file_pattern)
+    time_spans = [read_observable_time_span(file_name) for file_name in file_names]
+    for file_name, time_span in zip(file_names, time_spans):
+        if time_span is None:
+            warnings.warn('No time points in file ' + file_name)
+    file_names = [file_name for file_name, time_span in zip(file_names, time_spans) if time_span is not None]
+    time_spans = [time_span for time_span in time_spans if time_span is not None]
+    if not file_names:
+        raise ValueError('No data found in files matching: ' + str(file_pattern))
+    time_start = min([first_time for first_time, _ in time_spans])
+    time_end = max([last_time for _, last_time in time_spans])
+    if time_end <= time_start:
+        raise ValueError('Files matching ' + str(file_pattern) + ' span no time.')
+    if grid_points is None:
+        grid_points = _get_axis_pixel_width(target_axis)
+    time_grid = np.linspace(time_start, time_end, max(grid_points, 2))
+    resampled_files = map_snapshots(partial(resample_observable_file, column=plot_variable, time_grid=time_grid),
+                                    file_names, workers)
+    ensemble = np.zeros((len(file_names), len(time_grid)))
+    legend_entry = None
+    for file_index, (legend_entry, resampled, number_of_rows) in enumerate(resampled_files):
+        if number_of_rows == 1:
+            warnings.warn('Only one time point in file ' + file_names[file_index])
+        ensemble[file_index] = resampled
+    statistics = _reduce_ensemble(ensemble, time_grid, quantiles, differential_toggle)
+    mean_line, = target_axis.plot(statistics['time'], statistics['mean'], drawstyle='steps-post',
+                                  label='Mean of ' + str(len(file_names)) + ' replicates')
+    target_axis.fill_between(statistics['time'], statistics['mean'] - statistics['std'],
+                             statistics['mean'] + statistics['std'], step='post', alpha=0.3,
+                             color=mean_line.get_color(), linewidth=0, label=r'Mean $\pm$ standard deviation')
+    target_axis.fill_between(statistics['time'], statistics['lower quantile'], statistics['upper quantile'],
+                             step='post', alpha=0.15, color=mean_line.get_color(), linewidth=0,
+                             label='Quantiles {:g} to {:g}'.format(*quantiles))
+    target_axis.set_xlabel('Time')
+    if differential_toggle:
+        target_axis.set_ylabel(r'$\frac{\Delta \mathrm{x}}{\Delta t}$', rotation='horizontal')
+    else:
+        target_axis.set_ylabel('Value')
+    target_axis.set_title(legend_entry)
+    target_axis.legend()
+    return statistics
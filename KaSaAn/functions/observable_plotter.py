@@ -1,26 +1,145 @@
 #!/usr/bin/env python3
 
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import csv
+import io
+import os
 import numpy as np
+from matplotlib.animation import FuncAnimation
 
+# the numeric block is read, and converted, in chunks of about this many bytes
+_OBSERVABLE_CHUNK_BYTES = 1 << 22
 
-def observable_file_reader(file_name: str = 'data.csv') -> Tuple[list, np.ndarray]:
-    """Function parses a kappa output file, e.g. <data.csv>, and returns the legend and numeric data."""
-    # read the header, skipping UUID and command recipe, extract legend entries
-    with open(file_name, 'r', newline='') as csv_file:
-        legend_reader = csv.reader(csv_file, dialect='excel')
-        _ = next(legend_reader)         # recipe line
-        _ = next(legend_reader)         # UUID line
-        leg_data = next(legend_reader)  # legend line
-    num_data = np.loadtxt(file_name, delimiter=',', skiprows=3)
-    leg_data = [entry.replace("'", "").replace('"', '') for entry in leg_data]
-    return leg_data, num_data
+
+def _read_observable_legend(data_file) -> List[str]:
+    """Reads the three header lines of a kappa output file opened in binary mode, leaving it at the numeric block, and
+    returns the legend entries."""
+    # skip the command recipe and UUID lines, extract legend entries
+    header_lines = [data_file.readline().decode() for _ in range(3)]
+    leg_data = list(csv.reader(header_lines, dialect='excel'))[2]
+    return [entry.replace("'", "").replace('"', '') for entry in leg_data]
+
+
+def _read_complete_observable_legend(data_file) -> Optional[List[str]]:
+    """As _read_observable_legend, but returns None if the header is not complete yet, i.e. its three lines have not all
+    been written out, e.g. by a simulation that only just started."""
+    header_lines = [data_file.readline() for _ in range(3)]
+    if not header_lines[2].endswith(b'\n'):
+        return None
+    data_file.seek(0)
+    return _read_observable_legend(data_file)
+
+
+def observable_legend_reader(file_name: str = 'data.csv') -> List[str]:
+    """Function parses the header of a kappa output file, e.g. <data.csv>, and returns the legend, without reading the
+    numeric data."""
+    with open(file_name, 'rb') as data_file:
+        return _read_observable_legend(data_file)
+
+
+def _get_column_indexes(leg_data: List[str], columns: List[int]) -> List[int]:
+    """Returns the 0-based indexes of columns given as 1-based indexes into the legend, all of them by default."""
+    if columns is None:
+        columns = range(1, len(leg_data) + 1)
+    for column in columns:
+        if column not in range(1, len(leg_data) + 1):
+            raise ValueError('Variable <' + str(column) + '> not in observables present: 1-' + str(len(leg_data)))
+    return [column - 1 for column in columns]
+
+
+def _read_observable_rows(data_file, column_indexes: List[int], partial_last_line: bool = True) -> \
+        Tuple[np.ndarray, int]:
+    """Reads the numeric block of a kappa output file opened in binary mode, from its current position to its end, in
+    chunks of complete lines, each converted in bulk by NumPy's tokenizer. Returns the requested columns of the rows,
+    and the number of bytes consumed. Unless partial_last_line, a last line lacking its newline, e.g. one still being
+    written, is left unread."""
+    chunks = []
+    consumed = 0
+    pending = b''
+    while True:
+        data_bytes = data_file.read(_OBSERVABLE_CHUNK_BYTES)
+        block = pending + data_bytes
+        if data_bytes or not partial_last_line:
+            # only complete lines are converted; the rest is carried over to the next chunk
+            cut = block.rfind(b'\n') + 1
+            block, pending = block[:cut], block[cut:]
+        consumed += len(block)
+        if block.strip():
+            chunks.append(np.loadtxt(io.BytesIO(block), delimiter=',', usecols=column_indexes, ndmin=2))
+        if not data_bytes:
+            break
+    num_data = np.concatenate(chunks) if chunks else np.zeros((0, len(column_indexes)))
+    return num_data, consumed
+
+
+def observable_file_reader(file_name: str = 'data.csv', columns: List[int] = None) -> Tuple[list, np.ndarray]:
+    """Function parses a kappa output file, e.g. <data.csv>, and returns the legend and numeric data. The file is
+    opened once: the header is parsed, then the numeric block is read in chunks of complete lines, each converted in
+    bulk by NumPy's tokenizer. If columns are given, as 1-based indexes into the legend, only those are converted and
+    kept, in that order, so plotting a few observables out of many does not materialize the rest."""
+    with open(file_name, 'rb') as data_file:
+        leg_data = _read_observable_legend(data_file)
+        column_indexes = _get_column_indexes(leg_data, columns)
+        num_data, _ = _read_observable_rows(data_file, column_indexes)
+    return [leg_data[index] for index in column_indexes], num_data
+
+
+def observable_file_tail_reader(file_name: str = 'data.csv', offset: int = 0, columns: List[int] = None) -> \
+        Tuple[list, np.ndarray, int]:
+    """Function parses the rows appended to a kappa output file, e.g. the <data.csv> of a running simulation, since
+    a byte offset; returns the legend, the numeric data of the new rows, and the offset to resume from. An offset of
+    zero, or one within the header, reads every row. A last line lacking its newline is left for the next call, as it
+    may still be being written; so is a header not yet complete, in which case the legend is empty, and the offset
+    returned zero. If the file is now shorter than offset, e.g. as a new simulation overwrote it, it is read from its
+    start again. Columns are selected as in observable_file_reader."""
+    with open(file_name, 'rb') as data_file:
+        leg_data = _read_complete_observable_legend(data_file)
+        if leg_data is None:
+            return [], np.zeros((0, 0 if columns is None else len(columns))), 0
+        column_indexes = _get_column_indexes(leg_data, columns)
+        if offset > os.fstat(data_file.fileno()).st_size:
+            offset = 0
+        offset = max(offset, data_file.tell())
+        data_file.seek(offset)
+        num_data, consumed = _read_observable_rows(data_file, column_indexes, partial_last_line=False)
+    return [leg_data[index] for index in column_indexes], num_data, offset + consumed
+
+
+def decimate_min_max(x_data: np.ndarray, y_data: np.ndarray, number_of_bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Function reduces a series, sorted by x, for drawing it as a line that spans number_of_bins pixels. The x range is
+    split into that many bins, and of the points in each, only the first, last, lowest, and highest are kept, in their
+    original order; a line through them covers the same pixels as one through all points, so peaks and step edges are
+    preserved. Series with no more than four points per bin are returned as they are."""
+    if len(x_data) <= 4 * number_of_bins:
+        return x_data, y_data
+    x_span = x_data[-1] - x_data[0]
+    if x_span > 0:
+        point_bins = np.minimum(((x_data - x_data[0]) * (number_of_bins / x_span)).astype(np.int64), number_of_bins - 1)
+    else:
+        point_bins = np.zeros(len(x_data), dtype=np.int64)
+    # x is sorted, so each bin is a run of consecutive points
+    bin_starts = np.flatnonzero(np.diff(point_bins, prepend=-1))
+    bin_ends = np.append(bin_starts[1:], len(x_data)) - 1
+    run_of_point = np.repeat(np.arange(len(bin_starts)), np.diff(np.append(bin_starts, len(x_data))))
+    kept = [bin_starts, bin_ends]
+    for reduction in [np.fmin, np.fmax]:
+        # the first point of each bin that holds its extreme value; bins of NaNs keep their first and last only
+        extreme_points = np.flatnonzero(y_data == reduction.reduceat(y_data, bin_starts)[run_of_point])
+        kept.append(extreme_points[np.unique(run_of_point[extreme_points], return_index=True)[1]])
+    kept = np.unique(np.concatenate(kept))
+    return x_data[kept], y_data[kept]
+
+
+def _get_axis_pixel_width(axis) -> int:
+    """Returns the width of an axis, in pixels of its figure."""
+    return max(1, int(np.ceil(axis.get_window_extent().width)))
 
 
 def observable_list_axis_annotator(obs_axis, data: Tuple[list, np.ndarray], vars_to_plot: List[int],
-                                   diff_toggle: bool):
-    """Function plots a parsed kappa output file, e.g. <data.csv>, and returns a matplotlib figure object."""
+                                   diff_toggle: bool, decimation: bool = True):
+    """Function plots a parsed kappa output file, e.g. <data.csv>, and returns a matplotlib figure object. Unless
+    decimation is turned off, series longer than the axis is wide are reduced with decimate_min_max to one bin per
+    pixel, after taking derivatives if diff_toggle is set."""
     leg_data, num_data = data
     # determine what observables to plot
     # by default, plot all observables except the first, which plots [T]
@@ -37,6 +156,7 @@ def observable_list_axis_annotator(obs_axis, data: Tuple[list, np.ndarray], vars
         if np.any(d_t == 0.0):
             raise ValueError('Time difference of zero found in input data.')
     # plot
+    number_of_bins = _get_axis_pixel_width(obs_axis)
     for variable in vars_to_plot:
         y_data = num_data[:, variable - 1]
         if diff_toggle:
@@ -46,7 +166,11 @@ def observable_list_axis_annotator(obs_axis, data: Tuple[list, np.ndarray], vars
             plot_drawstyle = 'steps-post'
         else:
             plot_drawstyle = 'default'
-        obs_axis.plot(x_data, y_data, label=leg_data[variable - 1], drawstyle=plot_drawstyle)
+        if decimation:
+            x_plot, y_plot = decimate_min_max(x_data, y_data, number_of_bins)
+        else:
+            x_plot, y_plot = x_data, y_data
+        obs_axis.plot(x_plot, y_plot, label=leg_data[variable - 1], drawstyle=plot_drawstyle)
     obs_axis.legend()
     obs_axis.set_xlabel('Time')
     if diff_toggle:
@@ -54,3 +178,78 @@ def observable_list_axis_annotator(obs_axis, data: Tuple[list, np.ndarray], vars
     else:
         obs_axis.set_ylabel('Value')
     return obs_axis
+
+
+def observable_follow_axis_annotator(obs_axis, file_name: str, vars_to_plot: List[int], diff_toggle: bool,
+                                     refresh_interval: float = 1.0):
+    """Function plots a kappa output file that is still being written, e.g. the <data.csv> of a running simulation, and
+    keeps following it: every refresh_interval seconds, only the rows appended since the last refresh are parsed,
+    from the byte offset reached, and the lines of the plot are updated in place. The history of each line is kept
+    decimated with decimate_min_max to the width of the axis, so memory stays bounded however long the simulation
+    runs. If the file shrinks, e.g. as a new simulation overwrites it, it is followed from its start again. The file, or
+    its header, need not exist yet: lines are added once the header is complete. Returns the matplotlib animation
+    driving the refreshes, which must be kept referenced for as long as the figure is shown."""
+    number_of_bins = _get_axis_pixel_width(obs_axis)
+    lines = []
+    # columns read, byte offset reached, rows seen, last row seen (needed to derive the next one), and the decimated
+    # histories; columns are only known once the header is
+    state = {'columns': None, 'offset': 0, 'rows': 0, 'last row': None, 'histories': []}
+
+    def start():
+        with open(file_name, 'rb') as data_file:
+            leg_data = _read_complete_observable_legend(data_file)
+        if leg_data is None:
+            return False
+        # by default, plot all observables except the first, which plots [T]
+        variables = vars_to_plot if vars_to_plot else range(2, len(leg_data) + 1)
+        state['columns'] = [1] + list(variables)
+        _get_column_indexes(leg_data, state['columns'])
+        lines.extend([obs_axis.plot([], [], label=leg_data[variable - 1])[0] for variable in variables])
+        state['histories'] = [(np.zeros(0), np.zeros(0)) for _ in lines]
+        obs_axis.legend()
+        return True
+
+    def refresh(_):
+        if not os.path.isfile(file_name):
+            return lines
+        if os.path.getsize(file_name) < state['offset']:
+            state.update({'offset': 0, 'rows': 0, 'last row': None,
+                          'histories': [(np.zeros(0), np.zeros(0)) for _ in lines]})
+        if state['columns'] is None and not start():
+            return lines
+        _, new_rows, state['offset'] = observable_file_tail_reader(file_name, state['offset'], state['columns'])
+        if len(new_rows) == 0:
+            return lines
+        state['rows'] += len(new_rows)
+        if diff_toggle:
+            rows = new_rows if state['last row'] is None else np.vstack([state['last row'], new_rows])
+            state['last row'] = new_rows[-1]
+            d_t = np.diff(rows[:, 0])
+            if np.any(d_t == 0.0):
+                raise ValueError('Time difference of zero found in input data.')
+            x_new = rows[1:, 0]
+            y_new = np.diff(rows[:, 1:], axis=0) / d_t[:, None]
+        else:
+            x_new = new_rows[:, 0]
+            y_new = new_rows[:, 1:]
+        for line_index, line in enumerate(lines):
+            x_data, y_data = state['histories'][line_index]
+            x_data = np.concatenate([x_data, x_new])
+            y_data = np.concatenate([y_data, y_new[:, line_index]])
+            # histories are decimated once they hold twice the points a decimation leaves at most
+            if len(x_data) > 8 * number_of_bins:
+                x_data, y_data = decimate_min_max(x_data, y_data, number_of_bins)
+            state['histories'][line_index] = (x_data, y_data)
+            line.set_data(x_data, y_data)
+            line.set_drawstyle('steps-post' if state['rows'] < 1000 else 'default')
+        obs_axis.relim()
+        obs_axis.autoscale_view()
+        return lines
+
+    refresh(0)
+    obs_axis.set_xlabel('Time')
+    if diff_toggle:
+        obs_axis.set_ylabel(r'$\frac{\Delta \mathrm{x}}{\Delta t}$', rotation='horizontal')
+    else:
+        obs_axis.set_ylabel('Value')
+    return FuncAnimation(obs_axis.figure, refresh, interval=refresh_interval * 1000, cache_frame_data=False)
@@ -2,40 +2,115 @@
 
 import csv
 import glob
+import json
+import os
 import warnings
-from typing import List, Tuple
-from KaSaAn.core import KappaSnapshot
+from functools import partial
+from typing import Dict, List, Tuple
+from KaSaAn.core import KappaSnapshot, atomic_write
+from .numerical_sort import numerical_sort
+from .snapshot_pool import map_snapshots
+
+# Bumped whenever the layout of the manifest changes; manifests of other versions are ignored, and overwritten.
+MANIFEST_VERSION = 2
 
 
 def find_snapshots(directory: str, prefix: str) -> List[str]:
     """Get the file names of snapshots in specified directory that fit the pattern [dir][prefix][number].ka"""
     if directory[-1] != '/':
         directory += '/'
-    snap_names = glob.glob(directory + prefix + '*.ka')
+    snap_names = sorted(glob.glob(directory + prefix + '*.ka'), key=numerical_sort)
     return snap_names
 
 
-def process_snapshots(snap_names: List[str], verbosity: bool) -> Tuple[dict, dict, dict]:
-    """For each snapshot, get size distribution, number of complexes, size of largest complex."""
+def reduce_snapshot(snap_name: str, use_cache: bool = False) -> Tuple[int, int, Dict[int, int]]:
+    """For a single snapshot, get number of complexes, size of largest complex, and size distribution."""
+    # only sizes and abundances are needed, so complexes are never parsed
+    current_snapshot = KappaSnapshot(snap_name, lazy=True, use_cache=use_cache)
+    return sum(current_snapshot.get_all_abundances()), max(current_snapshot.get_all_sizes()), \
+        current_snapshot.get_size_distribution()
+
+
+def get_snapshot_stat_key(snap_name: str) -> List[int]:
+    """Returns the size and modification time of a snapshot file, used to tell whether it changed since it was
+    recorded in a manifest. Unlike the fingerprint of the snapshot cache, the contents are not hashed."""
+    stat = os.stat(snap_name)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def load_manifest(manifest_file_name: str) -> dict:
+    """Load the manifest of already processed snapshots, mapping each file name to its stat key and its partial
+    results. A missing or unreadable manifest yields an empty one, so every snapshot gets processed."""
+    if not os.path.isfile(manifest_file_name):
+        return {}
+    try:
+        with open(manifest_file_name, 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest['version'] != MANIFEST_VERSION:
+            return {}
+        return manifest['snapshots']
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        warnings.warn('Ignoring unreadable manifest <' + manifest_file_name + '>: ' + str(e))
+        return {}
+
+
+def save_manifest(manifest: dict, manifest_file_name: str, verbosity: bool) -> int:
+    """Save the manifest of processed snapshots to file; the file is replaced atomically."""
+    with atomic_write(manifest_file_name, 'w') as temp_file:
+        json.dump({'version': MANIFEST_VERSION, 'snapshots': manifest}, temp_file)
+    if verbosity:
+        print('Manifest of processed snapshots written to file: ' + manifest_file_name)
+    return 0
+
+
+def process_snapshots(snap_names: List[str], verbosity: bool, use_cache: bool = False,
+                      workers: int = 1, manifest: dict = None) -> Tuple[dict, dict, dict]:
+    """For each snapshot, get size distribution, number of complexes, size of largest complex. With more than one
+    worker, snapshots are reduced in parallel, by a pool of processes, and merged in the order of snap_names. If a
+    manifest is given, snapshots it holds unchanged results for are not parsed again; the manifest is updated in place
+    to hold exactly the snapshots in snap_names."""
     # For each snapshot, get the size distribution & update the results dictionary {size: abundance}
     # Also get the number of complexes in that snapshot and save it to another dictionary {snapshot name: number of complexes}
     cum_dist = {}
     total_complexes = {}
     lc_size = {}
     snap_num = len(snap_names)
+    # snapshots without a matching manifest entry are new, or changed since, and need parsing
+    stat_keys = dict([(snap_name, get_snapshot_stat_key(snap_name)) for snap_name in snap_names]) \
+        if manifest is not None else {}
+    pending_names = [snap_name for snap_name in snap_names
+                     if manifest is None or snap_name not in manifest or
+                     manifest[snap_name]['stat key'] != stat_keys[snap_name]]
+    if verbosity and manifest is not None:
+        print('Reusing manifest results for ' + str(snap_num - len(pending_names)) + ' of ' + str(snap_num) +
+              ' snapshots')
+    reductions = map_snapshots(partial(reduce_snapshot, use_cache=use_cache), pending_names, workers)
+    pending_names = set(pending_names)
     for snap_index, snap_name in enumerate(snap_names):
-        if verbosity:
-            print('Now parsing file <{}>, {} of {}, {:.2%}'.format(
-                snap_name, snap_index, snap_num, snap_index/snap_num), end='\r')
-        current_snapshot = KappaSnapshot(snap_name)
-        total_complexes[snap_name] = sum(current_snapshot.get_all_abundances())
-        lc_size[snap_name] = current_snapshot.get_largest_complexes()[0].get_size_of_complex()
-        size_dist = current_snapshot.get_size_distribution()
+        if snap_name in pending_names:
+            if verbosity:
+                print('Now parsing file <{}>, {} of {}, {:.2%}'.format(
+                    snap_name, snap_index, snap_num, snap_index/snap_num), end='\r')
+            total_complexes[snap_name], lc_size[snap_name], size_dist = next(reductions)
+            if manifest is not None:
+                # JSON keys are strings, so the distribution is kept as a list of [size, abundance] pairs
+                manifest[snap_name] = {'stat key': stat_keys[snap_name],
+                                       'total complexes': total_complexes[snap_name],
+                                       'largest complex': lc_size[snap_name],
+                                       'size distribution': list(size_dist.items())}
+        else:
+            total_complexes[snap_name] = manifest[snap_name]['total complexes']
+            lc_size[snap_name] = manifest[snap_name]['largest complex']
+            size_dist = dict(manifest[snap_name]['size distribution'])
         for key in size_dist.keys():
             if key in cum_dist:
                 cum_dist[key] += size_dist[key]
             else:
                 cum_dist[key] = size_dist[key]
+    if manifest is not None:
+        # forget snapshots that are gone
+        for snap_name in set(manifest.keys()) - set(snap_names):
+            del manifest[snap_name]
     return cum_dist, total_complexes, lc_size
 
 
@@ -91,8 +166,11 @@ def save_largest_complex(lc_size, base_directory, snap_prefix, verbosity) -> int
     return 0
 
 
-def prefixed_snapshot_analyzer(base_directory: str, snap_prefix: str, verbosity: bool):
-    """Process snapshots located in a directory, grouped by their prefix. Obtain key statistics about them."""
+def prefixed_snapshot_analyzer(base_directory: str, snap_prefix: str, verbosity: bool, use_cache: bool = False,
+                               workers: int = 1, incremental: bool = False):
+    """Process snapshots located in a directory, grouped by their prefix. Obtain key statistics about them. If
+    incremental, the per-snapshot results are kept in a manifest file, [prefix]manifest.json, and later runs only parse
+    the snapshots that are new or changed since."""
     # get snapshot names
     snap_names = find_snapshots(base_directory, snap_prefix)
     snap_num = len(snap_names)
@@ -100,10 +178,14 @@ def prefixed_snapshot_analyzer(base_directory: str, snap_prefix: str, verbosity:
         print("Found " + str(snap_num) + " snapshots in " + base_directory + ' with prefix <' + snap_prefix + '>')
     if snap_num < 2:
         warnings.warn('Found less than 2 snapshots.')
-    # process snapshots
-    cum_dist, total_complexes, lc_size = process_snapshots(snap_names, verbosity)
+    # process snapshots, reusing previous results if incremental
+    manifest_file_name = base_directory + snap_prefix + 'manifest.json'
+    manifest = load_manifest(manifest_file_name) if incremental else None
+    cum_dist, total_complexes, lc_size = process_snapshots(snap_names, verbosity, use_cache, workers, manifest)
     # save to files
     save_cumulative(cum_dist, base_directory, snap_prefix, verbosity)
     save_mean(cum_dist, base_directory, snap_prefix, verbosity, snap_num)
     save_complex_numbers(total_complexes, base_directory, snap_prefix, verbosity)
     save_largest_complex(lc_size, base_directory, snap_prefix, verbosity)
+    if incremental:
+        save_manifest(manifest, manifest_file_name, verbosity)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import warnings
+from functools import partial
+from typing import List, Tuple, Union
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from KaSaAn.core import KappaSnapshot, atomic_write
+from .prefixed_snapshot_analyzer import find_snapshots
+from .snapshot_pool import map_snapshots
+
+
+def reduce_snapshot_to_sizes(snap_name: str, use_cache: bool = False) -> Tuple[float, int, np.ndarray, np.ndarray]:
+    """For a single snapshot, get its time, its event, and its size distribution, as the sorted distinct complex sizes
+    and the number of complexes of each."""
+    # only sizes and abundances are needed, so complexes are never parsed
+    current_snapshot = KappaSnapshot(snap_name, lazy=True, use_cache=use_cache)
+    sizes, size_index = np.unique(np.asarray(current_snapshot.get_all_sizes(), dtype=np.int64), return_inverse=True)
+    abundances = np.bincount(size_index, weights=current_snapshot.get_all_abundances(), minlength=len(sizes))
+    return current_snapshot.get_snapshot_time(), current_snapshot.get_snapshot_event(), sizes, \
+        abundances.astype(np.int64)
+
+
+def save_size_distribution_matrix(matrix_file_name: str, times: np.ndarray, events: np.ndarray, sizes: np.ndarray,
+                                  matrix: Union[np.ndarray, csr_matrix], snap_names: List[str]) -> int:
+    """Save a size distribution matrix, and the times, events, sizes, and snapshot names labeling its rows and columns,
+    to a NumPy .npz file; the file is replaced atomically. Sparse matrices are kept in their CSR layout."""
+    arrays = {'times': times, 'events': events, 'sizes': sizes, 'snapshot_names': np.array(snap_names, dtype=str)}
+    if isinstance(matrix, csr_matrix):
+        arrays.update({'data': matrix.data, 'indices': matrix.indices, 'indptr': matrix.indptr,
+                       'shape': np.array(matrix.shape, dtype=np.int64)})
+    else:
+        arrays['matrix'] = matrix
+    # saved through a file object, so that NumPy does not append a suffix to the temporary name
+    with atomic_write(matrix_file_name) as temp_file:
+        np.savez_compressed(temp_file, **arrays)
+    return 0
+
+
+def load_size_distribution_matrix(matrix_file_name: str) -> \
+        Tuple[np.ndarray, np.ndarray, np.ndarray, Union[np.ndarray, csr_matrix], List[str]]:
+    """Load a size distribution matrix saved by save_size_distribution_matrix, as the times and events of its rows, the
+    sizes of its columns, the matrix itself, dense or sparse as it was saved, and the snapshot names of its rows."""
+    with np.load(matrix_file_name, allow_pickle=False) as arrays:
+        if 'matrix' in arrays:
+            matrix = arrays['matrix']
+        else:
+            matrix = csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(arrays['shape']))
+        return arrays['times'], arrays['events'], arrays['sizes'], matrix, arrays['snapshot_names'].tolist()
+
+
+def build_size_distribution_matrix(base_directory: str, snap_name_prefix: str, matrix_file_name: str = None,
+                                   sparse: bool = False, verbosity: bool = False, use_cache: bool = False,
+                                   workers: int = 1) -> \
+        Tuple[np.ndarray, np.ndarray, np.ndarray, Union[np.ndarray, csr_matrix], List[str]]:
+    """Builds the size distribution matrix of the snapshots in a directory sharing a prefix: one row per snapshot,
+    ordered by the snapshot time read from its header, and one column per complex size seen across the series, in
+    increasing order, each entry holding the number of complexes of that size. Snapshots are streamed, only their size
+    distribution being kept, and with more than one worker they are read in parallel. Returns the times and events of
+    the rows, the sizes of the columns, the matrix, as a dense NumPy array or, if sparse, a SciPy CSR matrix, and the
+    snapshot names of the rows. Unless specified, the matrix is saved in the same directory, as
+    [prefix]size_distribution.npz, so later plots and fits can load it instead of re-parsing the series."""
+    if base_directory[-1] != '/':
+        base_directory += '/'
+    snap_names = find_snapshots(base_directory, snap_name_prefix)
+    snap_num = len(snap_names)
+    if verbosity:
+        print('Found ' + str(snap_num) + ' snapshots in directory ' + base_directory)
+    if not snap_names:
+        warnings.warn('Found no snapshots.')
+    times = np.zeros(snap_num, dtype=np.float64)
+    events = np.zeros(snap_num, dtype=np.int64)
+    row_sizes = []
+    row_abundances = []
+    reductions = map_snapshots(partial(reduce_snapshot_to_sizes, use_cache=use_cache), snap_names, workers)
+    for snap_index, (snap_time, snap_event, sizes, abundances) in enumerate(reductions):
+        if verbosity:
+            print('Now parsing file <{}>, {} of {}, {:.2%}'.format(
+                snap_names[snap_index], snap_index, snap_num, snap_index / snap_num), end='\r')
+        times[snap_index] = snap_time
+        events[snap_index] = snap_event
+        row_sizes.append(sizes)
+        row_abundances.append(abundances)
+    # rows by time, then event; snapshots taken at the same point keep the numerical order of their names
+    row_order = np.lexsort((np.arange(snap_num), events, times))
+    row_sizes = [row_sizes[row] for row in row_order]
+    row_abundances = [row_abundances[row] for row in row_order]
+    all_sizes = np.unique(np.concatenate(row_sizes)) if row_sizes else np.zeros(0, dtype=np.int64)
+    indptr = np.zeros(snap_num + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(sizes) for sizes in row_sizes])
+    # each row's sizes are sorted, so their columns are too
+    indices = np.searchsorted(all_sizes, np.concatenate(row_sizes)) if row_sizes else np.zeros(0, dtype=np.int64)
+    data = np.concatenate(row_abundances) if row_abundances else np.zeros(0, dtype=np.int64)
+    matrix = csr_matrix((data, indices, indptr), shape=(snap_num, len(all_sizes)))
+    if not sparse:
+        matrix = matrix.toarray()
+    times = times[row_order]
+    events = events[row_order]
+    snap_names = [snap_names[row] for row in row_order]
+    if matrix_file_name is None:
+        matrix_file_name = base_directory + snap_name_prefix + 'size_distribution.npz'
+    save_size_distribution_matrix(matrix_file_name, times, events, all_sizes, matrix, snap_names)
+    if verbosity:
+        print('Size distribution matrix of ' + str(snap_num) + ' snapshots by ' + str(len(all_sizes)) +
+              ' sizes written to file: ' + matrix_file_name)
+    return times, events, all_sizes, matrix, snap_names
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List
+
+
+def get_worker_count(workers: int) -> int:
+    """Returns the number of worker processes to use: all available cores for None or values below one."""
+    if workers is None or workers < 1:
+        return os.cpu_count() or 1
+    return workers
+
+
+def map_snapshots(function: Callable, snap_names: List[str], workers: int = 1) -> Iterator:
+    """Yields the result of applying function to each snapshot file name, in the order of snap_names. With more than
+    one worker, the calls are fanned out to a pool of processes; function must then be picklable, e.g. a module-level
+    function or a functools.partial of one, and so must its results. Results are identical to those of serial mode.
+    Only twice as many snapshots as there are workers are in flight at once, so results are not buffered beyond those
+    however long the series is, and a slow consumer, e.g. one drawing each result, keeps memory bounded."""
+    workers = min(get_worker_count(workers), len(snap_names))
+    if workers <= 1:
+        for snap_name in snap_names:
+            yield function(snap_name)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+            for snap_name in snap_names:
+                if len(in_flight) >= 2 * workers:
+                    yield in_flight.popleft().result()
+                in_flight.append(pool.submit(function, snap_name))
+            while in_flight:
+                yield in_flight.popleft().result()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+import glob
+import warnings
+
+from KaSaAn.core import SnapshotTrace
+from .numerical_sort import numerical_sort
+
+
+def build_snapshot_trace(base_directory: str, snap_name_prefix: str, trace_file_name: str = None,
+                         verbosity: bool = False, use_cache: bool = False,
+                         canonical_species: bool = False) -> SnapshotTrace:
+    """Consolidates the snapshots in a directory sharing a prefix, in numerical order, into a single memory-mapped
+    SnapshotTrace. Unless specified, the trace is saved in the same directory, as [prefix]trace.bin. With
+    canonical_species, isomorphic species are merged, e.g. the same species written with other bond identifiers."""
+    if base_directory[-1] != '/':
+        base_directory += '/'
+    snap_names = sorted(glob.glob(base_directory + snap_name_prefix + '*.ka'), key=numerical_sort)
+    if verbosity:
+        print('Found ' + str(len(snap_names)) + ' snapshots in directory ' + base_directory)
+    if not snap_names:
+        warnings.warn('Found no snapshots.')
+    if trace_file_name is None:
+        trace_file_name = base_directory + snap_name_prefix + 'trace.bin'
+    trace = SnapshotTrace.from_snapshots(snap_names, trace_file_name, use_cache=use_cache, verbosity=verbosity,
+                                         canonical_species=canonical_species)
+    if verbosity:
+        print('Consolidated ' + str(trace.get_number_of_species()) + ' distinct species into ' + trace_file_name)
+    return trace
@@ -12,9 +12,9 @@ from KaSaAn.functions.snapshot_visualizer_patchwork import colorize_agents
 
 def render_snapshot_as_plain_graph(snapshot_file_name: str, highlight_patterns: List[str],
                                    color_scheme_file_name: str, node_size: int, edge_width: float,
-                                   fig_size: Tuple[float, float]) -> List[plt.figure]:
+                                   fig_size: Tuple[float, float], use_cache: bool = False) -> List[plt.figure]:
     """"Take a KappaSnapshot and render it as a plain graph, optionally highlighting certain patterns."""
-    snapshot = KappaSnapshot(snapshot_file_name)
+    snapshot = KappaSnapshot(snapshot_file_name, use_cache=use_cache)
     snapshot_agents = snapshot.get_agent_types_present()
     snapshot_composition = snapshot.get_composition()
     snapshot_graph = snapshot.to_networkx()
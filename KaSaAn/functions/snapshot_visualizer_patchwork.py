@@ -17,10 +17,13 @@ from KaSaAn.core import KappaSnapshot, KappaAgent
 
 def process_snapshot(snapshot: KappaSnapshot) -> List[dict]:
     # Extract the relevant information from a snapshot: size, abundance, & compositions
+    # Compositions are read off the snapshot's species-by-agent-type matrix, so complexes need not be parsed
+    composition_matrix, agent_types = snapshot.get_composition_matrix()
     data = []
-    for kappa_complex, abundance in snapshot.get_all_complexes_and_abundances():
-        size = kappa_complex.get_size_of_complex()
-        composition = kappa_complex.get_complex_composition()
+    for species_index, (size, abundance) in enumerate(zip(snapshot.get_all_sizes(), snapshot.get_all_abundances())):
+        row = slice(composition_matrix.indptr[species_index], composition_matrix.indptr[species_index + 1])
+        composition = dict(zip([agent_types[j] for j in composition_matrix.indices[row]],
+                               composition_matrix.data[row].tolist()))
         data.append({'size': size, 'count': abundance, 'mass': size * abundance, 'composition': composition})
     if len(data) < 1:
         warnings.warn('Empty snapshot <<' + str(snapshot) + '>>')
@@ -172,9 +175,9 @@ def snapshot_legend_maximum(max_data: int, vis_mode: str) -> matplotlib.text.Tex
 
 def render_snapshot_as_patchwork(snapshot_file: str, color_scheme: Dict[KappaAgent, Any] = None, vis_mode: str = 'all',
                                  fig_size: Tuple[float, float] = mpl.rcParams['figure.figsize'],
-                                 fig_res: float = mpl.rcParams['figure.dpi']) -> plt.figure:
-    # Process the snapshot
-    my_snapshot = KappaSnapshot(snapshot_file)
+                                 fig_res: float = mpl.rcParams['figure.dpi'], use_cache: bool = False) -> plt.figure:
+    # Process the snapshot; only sizes, abundances, and compositions are needed, so complexes are never parsed
+    my_snapshot = KappaSnapshot(snapshot_file, lazy=True, use_cache=use_cache)
     my_data = process_snapshot(my_snapshot)
     if len(my_data) < 1:
         warnings.warn('Empty snapshot <<' + snapshot_file + '>>')
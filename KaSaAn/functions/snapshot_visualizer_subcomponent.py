@@ -15,10 +15,12 @@ from KaSaAn.functions.snapshot_visualizer_patchwork import colorize_agents
 
 def render_complexes_as_plain_graph(snapshot_file_name: str, sizes_requested: List[int], highlight_patterns: List[str],
                                     color_scheme_file_name: str, node_size: int, edge_width: float,
-                                    fig_size: Tuple[float, float], print_distro: bool) -> List[plt.figure]:
+                                    fig_size: Tuple[float, float], print_distro: bool,
+                                    use_cache: bool = False) -> List[plt.figure]:
     """"Take a KappaSnapshot, get complexes of a given size, render them as plain graphs, optionally highlighting
      certain patterns."""
-    snapshot = KappaSnapshot(snapshot_file_name)
+    # lazy: only the complexes selected for rendering get parsed
+    snapshot = KappaSnapshot(snapshot_file_name, lazy=True, use_cache=use_cache)
     if print_distro:
         print("Snapshot's distribution, size:abundance\n" + str(snapshot.get_size_distribution()))
     snapshot_agents = snapshot.get_agent_types_present()
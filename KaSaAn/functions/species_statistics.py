@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from typing import Dict
+from KaSaAn.core import KappaComplex, KappaPort, KappaSnapshot
+
+# sources are searched from in blocks of this many 64-bit words, i.e. 64 times as many sources at once
+_DIAMETER_BLOCK_WORDS = 8
+
+
+def get_graph_diameter(edges: np.ndarray, number_of_nodes: int) -> int:
+    """Returns the diameter of a connected graph, given as an array with one row per edge, holding the indexes of the
+    two nodes it links: the greatest number of edges in a shortest path. Breadth-first searches are run from every node,
+    bit-parallel: each node holds one bit per source in a block of sources, and a level of the searches of the whole
+    block is a single vectorized OR over the edges, so the cost is the number of sources over 64, times the number of
+    levels, times the number of edges."""
+    if number_of_nodes < 2:
+        return 0
+    adjacency = csr_matrix((np.ones(2 * len(edges), dtype=np.int8),
+                            (np.concatenate([edges[:, 0], edges[:, 1]]), np.concatenate([edges[:, 1], edges[:, 0]]))),
+                           shape=(number_of_nodes, number_of_nodes))
+    neighbor_offsets, neighbors = adjacency.indptr[:-1], adjacency.indices
+    bits = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+    diameter = 0
+    for first_source in range(0, number_of_nodes, 64 * _DIAMETER_BLOCK_WORDS):
+        sources = np.arange(first_source, min(number_of_nodes, first_source + 64 * _DIAMETER_BLOCK_WORDS))
+        source_bits = sources - first_source
+        frontier = np.zeros((number_of_nodes, _DIAMETER_BLOCK_WORDS), dtype=np.uint64)
+        frontier[sources, source_bits // 64] = bits[source_bits % 64]
+        visited = frontier.copy()
+        level = 0
+        while True:
+            # a node is reached if any of its neighbors is in the frontier; every node has neighbors, as it is connected
+            frontier = np.bitwise_or.reduceat(frontier[neighbors], neighbor_offsets, axis=0) & ~visited
+            if not frontier.any():
+                break
+            visited |= frontier
+            level += 1
+        diameter = max(diameter, level)
+    return diameter
+
+
+def get_complex_statistics(kappa_complex: KappaComplex) -> Dict:
+    """For a single complex, get its size, number of bonds, cycle rank (bonds - agents + 1, the number of independent
+    cycles), diameter (longest shortest path between two agents, in bonds), degree distribution (number of agents
+    with each number of bonds), and bond type counts (number of bonds between each pair of sites, named as
+    'Agent.site')."""
+    agents = kappa_complex.get_all_agents()
+    bond_ends = dict()
+    for agent_index, agent in enumerate(agents):
+        for site in agent.get_agent_signature():
+            if type(site) is KappaPort and site.get_port_current_bond().isdigit():
+                bond_ends.setdefault(site.get_port_current_bond(), []).append(
+                    (agent_index, agent.get_agent_name() + '.' + site.get_port_name()))
+    degrees = [0] * len(agents)
+    bond_types = dict()
+    edges = []
+    for bond_id, ends in bond_ends.items():
+        if len(ends) != 2:
+            raise ValueError('Bond <' + bond_id + '> has ' + str(len(ends)) + ' ends in <' + str(kappa_complex) + '>')
+        (agent_1, site_1), (agent_2, site_2) = ends
+        degrees[agent_1] += 1
+        degrees[agent_2] += 1
+        bond_type = tuple(sorted([site_1, site_2]))
+        bond_types[bond_type] = bond_types.get(bond_type, 0) + 1
+        edges.append((agent_1, agent_2))
+    degree_distribution = dict()
+    for degree in degrees:
+        degree_distribution[degree] = degree_distribution.get(degree, 0) + 1
+    return {'size': len(agents),
+            'bonds': len(bond_ends),
+            'cycle rank': len(bond_ends) - len(agents) + 1,
+            'diameter': get_graph_diameter(np.array(edges, dtype=np.int64).reshape(-1, 2), len(agents)),
+            'degree distribution': dict(sorted(degree_distribution.items())),
+            'bond type counts': dict(sorted(bond_types.items()))}
+
+
+def _add_weighted(distribution: Dict, key, weight: int):
+    """Adds weight to the entry of a distribution."""
+    distribution[key] = distribution.get(key, 0) + weight
+
+
+def get_snapshot_statistics(snapshot: KappaSnapshot, species_statistics: Dict[KappaComplex, Dict] = None) -> Dict:
+    """For a snapshot, get the distributions of complex-level statistics across its molecules: degree distribution
+    (number of agents with each number of bonds), cycle rank and diameter distributions (number of complexes with each
+    value), and bond type counts (number of bonds of each type). The statistics are computed once per distinct species,
+    with get_complex_statistics, then weighed by the species' abundance, so the cost grows with the number of species,
+    not of molecules. Statistics already computed can be passed, and are extended, in species_statistics, keyed by
+    complex, to reuse them across the snapshots of a series."""
+    if species_statistics is None:
+        species_statistics = dict()
+    degree_distribution = dict()
+    cycle_rank_distribution = dict()
+    diameter_distribution = dict()
+    bond_type_counts = dict()
+    for kappa_complex, abundance in snapshot.get_all_complexes_and_abundances():
+        if kappa_complex not in species_statistics:
+            species_statistics[kappa_complex] = get_complex_statistics(kappa_complex)
+        stats = species_statistics[kappa_complex]
+        for degree, count in stats['degree distribution'].items():
+            _add_weighted(degree_distribution, degree, count * abundance)
+        _add_weighted(cycle_rank_distribution, stats['cycle rank'], abundance)
+        _add_weighted(diameter_distribution, stats['diameter'], abundance)
+        for bond_type, count in stats['bond type counts'].items():
+            _add_weighted(bond_type_counts, bond_type, count * abundance)
+    return {'number of species': len(snapshot.get_all_abundances()),
+            'degree distribution': dict(sorted(degree_distribution.items())),
+            'cycle rank distribution': dict(sorted(cycle_rank_distribution.items())),
+            'diameter distribution': dict(sorted(diameter_distribution.items())),
+            'bond type counts': dict(sorted(bond_type_counts.items()))}
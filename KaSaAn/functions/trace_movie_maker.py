@@ -1,30 +1,57 @@
 #!/usr/bin/env python3
 
 import glob
+import io
+import os
+import numpy as np
+import matplotlib
 import matplotlib.animation as animation
 import matplotlib.pyplot as plt
+from functools import partial
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.collections import PatchCollection
+from matplotlib.figure import Figure
+from PIL import Image
 from typing import List, Tuple, Set
 
 from .numerical_sort import numerical_sort
+from .snapshot_pool import map_snapshots
 from .snapshot_visualizer_patchwork import process_snapshot, snapshot_composition_simple, colorize_agents, \
     snapshot_legend_simple
 from KaSaAn.core import KappaSnapshot, KappaAgent
 
 
 # Get & sort the file names
-def find_snapshot_files(base_dir: str = './') -> List[KappaSnapshot]:
+def find_snapshot_names(base_dir: str = './') -> List[str]:
     # In case we're fed a directory name, without the trailing slash, append it
     if base_dir[-1] != '/':
         base_dir += '/'
-    snap_names = sorted(glob.glob(base_dir + 'snapshot.*.ka'), key=numerical_sort)
+    return sorted(glob.glob(base_dir + 'snapshot.*.ka'), key=numerical_sort)
+
+
+def find_snapshot_files(base_dir: str = './') -> List[KappaSnapshot]:
     snapshot_list = []
-    for file_name in snap_names:
+    for file_name in find_snapshot_names(base_dir):
         snapshot_list.append(KappaSnapshot(file_name))
 
     return snapshot_list
 
 
+# Read a snapshot, and keep only what a frame needs; this is what worker processes hand back
+def summarize_snapshot(file_name: str) -> dict:
+    snap = KappaSnapshot(file_name, lazy=True)
+    return {'file name': snap.get_snapshot_file_name(), 'time': snap.get_snapshot_time(),
+            'mass': snap.get_total_mass(), 'agent types': snap.get_agent_types_present(),
+            'data': process_snapshot(snap)}
+
+
+# Read a snapshot for the pre-pass: only its time, mass, and agent types, which complexes need not be parsed for
+def survey_snapshot(file_name: str) -> dict:
+    snap = KappaSnapshot(file_name, lazy=True)
+    return {'file name': snap.get_snapshot_file_name(), 'time': snap.get_snapshot_time(),
+            'mass': snap.get_total_mass(), 'agent types': snap.get_agent_types_present()}
+
+
 # Define consistent coloring scheme & maximum mass
 def define_agent_list_and_max_mass(snap_list: List[KappaSnapshot]) -> Tuple[Set[KappaAgent], int]:
     max_mass = 0
@@ -37,50 +64,31 @@ def define_agent_list_and_max_mass(snap_list: List[KappaSnapshot]) -> Tuple[Set[
     return agent_set, max_mass
 
 
-# Master function
-def movie_from_snapshots(directory: str, vis_mode: str, fig_width: int, xy_ratio: float, dont_scale_mass: bool,
-                         legend_cols: int, frame_int: int, verbose: bool):
-    # Find the snapshots in the directory; determine agent set; colorize it
-    snapshots = find_snapshot_files(directory)
-    if verbose:
-        print('Found ' + str(len(snapshots)) + ' snapshots in directory ' + directory)
-    my_agent_list, my_max_mass = define_agent_list_and_max_mass(snapshots)
-    if verbose:
-        print('Trace contains ' + str(len(my_agent_list)) + ' agents in total.')
-    color_scheme = colorize_agents(my_agent_list)
+# Draw the frame of a summarized snapshot on the data axis, returning the artists added
+def draw_frame(data_ax, snap: dict, color_scheme: dict, vis_mode: str, x_res: float, y_res: float, max_mass: int,
+               final_time: float, dont_scale_mass: bool) -> list:
+    snap_scale = snap['mass'] / max_mass if not dont_scale_mass else 1
+    rectangles, maxi = snapshot_composition_simple(data=snap['data'], color_scheme=color_scheme, vis_mode=vis_mode,
+                                                   x_res=x_res * snap_scale, y_res=y_res * snap_scale)
+    ars = [data_ax.add_patch(r) for r in rectangles]
+    ars.append(data_ax.text(0, y_res,
+                            'Time ' + str(snap['time']) + ' ; final time ' + str(final_time),
+                            horizontalalignment='left', verticalalignment='bottom'))
+    ars.append(data_ax.text(x_res, y_res, 'Mass present ' + str(snap['mass']),
+                            horizontalalignment='right', verticalalignment='bottom'))
+    return ars
+
 
-    # Define figure & sizes
+# Lay out the figure of a movie on an empty figure: the data axis, returned, and the legend, i.e. the right axis
+def layout_movie_figure(fig, color_scheme: dict, xy_ratio: float, legend_cols: int):
     x_res = 1000
     y_res = x_res * xy_ratio
-    fig = plt.figure(figsize=[fig_width, fig_width/2])
     data_ax = fig.add_subplot(121, aspect=1)
     legend_ax = fig.add_subplot(122)
     data_ax.set_xlim(left=0, right=x_res)
     data_ax.set_ylim(bottom=0, top=y_res)
     data_ax.axis('off')
 
-    # Define the animation, i.e. the left axis
-    artist_list = []
-    final_time = snapshots[-1].get_snapshot_time()
-    for snap in snapshots:
-        ars = []
-        snap_scale = snap.get_total_mass() / my_max_mass if not dont_scale_mass else 1
-        if verbose:
-            print('Now processing snapshot ' + snap.get_snapshot_file_name())
-        data = process_snapshot(snap)
-        rectangles, maxi = snapshot_composition_simple(data=data, color_scheme=color_scheme, vis_mode=vis_mode,
-                                                       x_res=x_res * snap_scale, y_res=y_res * snap_scale)
-        for r in rectangles:
-            ar = data_ax.add_patch(r)
-            ars.append(ar)
-        ars.append(data_ax.text(0, y_res,
-                                'Time ' + str(snap.get_snapshot_time()) + ' ; final time ' + str(final_time),
-                                horizontalalignment='left', verticalalignment='bottom'))
-        ars.append(data_ax.text(x_res, y_res, 'Mass present ' + str(snap.get_total_mass()),
-                                horizontalalignment='right', verticalalignment='bottom'))
-        artist_list.append(ars)
-
-    # Define the legend, i.e. the right axis
     # This legend will have legend_cols number of columns for writing the agents. This helps with scaling for systems
     # with a large number of agents. The limits of this section are determined based on the number of agents to draw.
     legend_squares, legend_texts = snapshot_legend_simple(color_scheme=color_scheme, col_num=legend_cols)
@@ -90,10 +98,132 @@ def movie_from_snapshots(directory: str, vis_mode: str, fig_width: int, xy_ratio
     legend_ax.set_xlim(left=0, right=legend_cols)
     legend_ax.set_ylim(top=1, bottom=-divmod(len(color_scheme), legend_cols)[0] - 1)
     legend_ax.axis('off')
+    return data_ax
+
+
+# The figure a worker process renders frames on, kept across frames, along with the settings it was laid out for
+_frame_canvas = {'settings': None, 'figure': None, 'data axis': None, 'artists': []}
 
-    # Make movie out of list
+
+# Drop the figure frames were rendered on; rendering in the main process, it would otherwise outlive the movie
+def release_frame_canvas():
+    _frame_canvas.update({'settings': None, 'figure': None, 'data axis': None, 'artists': []})
+
+
+# Render the frame of a snapshot with the Agg backend, in a worker process, as raw RGBA bytes, or as a numbered PNG
+def render_frame(file_name: str, settings: dict, frame_files: dict = None):
+    if _frame_canvas['settings'] != settings:
+        fig = Figure(figsize=[settings['fig width'], settings['fig width'] / 2], dpi=settings['dpi'])
+        FigureCanvasAgg(fig)
+        _frame_canvas.update({'settings': settings, 'figure': fig, 'artists': [],
+                              'data axis': layout_movie_figure(fig, settings['color scheme'], settings['xy ratio'],
+                                                               settings['legend cols'])})
+    for artist in _frame_canvas['artists']:
+        artist.remove()
+    data_ax = _frame_canvas['data axis']
+    _frame_canvas['artists'] = draw_frame(data_ax, summarize_snapshot(file_name), settings['color scheme'],
+                                          settings['vis mode'], data_ax.get_xlim()[1], data_ax.get_ylim()[1],
+                                          settings['max mass'], settings['final time'], settings['dont scale mass'])
+    # the same call movie writers grab frames with, at the resolution the movie is saved at
+    fig = _frame_canvas['figure']
+    if frame_files is None:
+        frame_buffer = io.BytesIO()
+        fig.savefig(frame_buffer, format='rgba', dpi=settings['dpi'])
+        return frame_buffer.getvalue()
+    fig.savefig(frame_files[file_name], format='png', dpi=settings['dpi'])
+    return frame_files[file_name]
+
+
+# Master function
+def movie_from_snapshots(directory: str, vis_mode: str, fig_width: int, xy_ratio: float, dont_scale_mass: bool,
+                         legend_cols: int, frame_int: int, verbose: bool, workers: int = 1,
+                         frame_rendering: str = 'serial', frame_directory: str = None, dpi: float = None):
+    # Find the snapshots in the directory; a cheap pre-pass, in parallel if asked to, yields the agent set and the
+    # maximum mass, so frames can then be streamed: each is parsed, drawn, handed over, and discarded
+    snap_names = find_snapshot_names(directory)
+    if verbose:
+        print('Found ' + str(len(snap_names)) + ' snapshots in directory ' + directory)
+    my_agent_list = set()
+    my_max_mass = 0
+    final_time = None
+    for snap in map_snapshots(survey_snapshot, snap_names, workers):
+        my_agent_list.update(snap['agent types'])
+        my_max_mass = max(my_max_mass, snap['mass'])
+        final_time = snap['time']
     if verbose:
-        print('Now collecting rectangles into an animation.')
-    ani = animation.ArtistAnimation(fig=fig, artists=artist_list, interval=frame_int, repeat_delay=2000)
+        print('Trace contains ' + str(len(my_agent_list)) + ' agents in total.')
+    # agents are colored in order of their names: a set's order can differ once it went through a worker process, which
+    # would change the colors with the number of workers
+    color_scheme = colorize_agents(sorted(my_agent_list, key=str))
+    # by default, the resolution Animation.save uses when given none; frames rendered ahead are only pixel-exact if the
+    # animation is saved at this resolution
+    if dpi is None:
+        dpi = matplotlib.rcParams['savefig.dpi']
+        if dpi == 'figure':
+            dpi = matplotlib.rcParams['figure.dpi']
+    fig = plt.figure(figsize=[fig_width, fig_width/2], dpi=dpi)
+
+    if frame_rendering == 'serial':
+        # Define the animation, i.e. the left axis, as a stream of frames: the artists of a frame replace those of the
+        # previous one, so only one frame is ever held, however long the trace
+        data_ax = layout_movie_figure(fig, color_scheme, xy_ratio, legend_cols)
+        frame_artists = []
+
+        def stream_frames():
+            yield from map_snapshots(summarize_snapshot, snap_names, workers)
+
+        def update_frame(snap: dict) -> list:
+            for artist in frame_artists:
+                artist.remove()
+            if verbose:
+                print('Now processing snapshot ' + snap['file name'])
+            frame_artists[:] = draw_frame(data_ax, snap, color_scheme, vis_mode, data_ax.get_xlim()[1],
+                                          data_ax.get_ylim()[1], my_max_mass, final_time, dont_scale_mass)
+            return frame_artists
+    elif frame_rendering in ['rgba', 'png']:
+        # Frames are rendered by the workers, on an identical figure, as the raw RGBA bytes a movie writer would grab,
+        # or as numbered PNG files; the figure then only shows each frame as an image, unresampled, pixel for pixel
+        settings = {'color scheme': color_scheme, 'vis mode': vis_mode, 'fig width': fig_width, 'xy ratio': xy_ratio,
+                    'legend cols': legend_cols, 'max mass': my_max_mass, 'final time': final_time,
+                    'dont scale mass': dont_scale_mass, 'dpi': dpi}
+        frame_files = None
+        if frame_rendering == 'png':
+            if frame_directory is None:
+                frame_directory = os.path.join(directory, 'frames')
+            os.makedirs(frame_directory, exist_ok=True)
+            frame_files = dict([(snap_name, os.path.join(frame_directory, 'frame_{:06d}.png'.format(frame_index)))
+                                for frame_index, snap_name in enumerate(snap_names)])
+        width, height = fig.canvas.get_width_height()
+        frame_image = fig.figimage(np.zeros((height, width, 4), dtype=np.uint8))
+
+        def stream_frames():
+            frames = map_snapshots(partial(render_frame, settings=settings, frame_files=frame_files), snap_names,
+                                   workers)
+            try:
+                for snap_name, frame in zip(snap_names, frames):
+                    if verbose:
+                        print('Now showing rendered snapshot ' + snap_name)
+                    if frame_files is None:
+                        frame = np.frombuffer(frame, dtype=np.uint8)
+                    else:
+                        with Image.open(frame) as frame_file:
+                            frame = np.asarray(frame_file.convert('RGBA'))
+                    # frames are shown pixel for pixel, so one of another size would be cropped, or leave a margin
+                    if frame.size != height * width * 4 or (frame.ndim == 3 and frame.shape[:2] != (height, width)):
+                        raise ValueError('Rendered frame of snapshot <' + snap_name + '> does not match the ' +
+                                         str(width) + 'x' + str(height) + ' pixels of the movie figure')
+                    yield frame.reshape(height, width, 4)
+            finally:
+                release_frame_canvas()
+
+        def update_frame(frame: np.ndarray) -> list:
+            frame_image.set_data(frame)
+            return [frame_image]
+    else:
+        raise ValueError('Frame rendering <' + str(frame_rendering) + '> not one of: serial, rgba, png')
+
+    ani = animation.FuncAnimation(fig=fig, func=update_frame, frames=stream_frames, init_func=lambda: [],
+                                  save_count=len(snap_names), cache_frame_data=False, interval=frame_int,
+                                  repeat_delay=2000)
 
     return ani
@@ -3,7 +3,7 @@
 import argparse
 import sys
 
-from KaSaAn.functions import get_potential_of_folder
+from KaSaAn.functions import get_potential_of_folder, get_potential_of_trace
 
 
 def main(args=None):
@@ -30,12 +30,28 @@ def main(args=None):
                         help='The name of the file where the list of catalytic potentials should be saved; one value'
                              ' per line, in the same order as the snapshots. If not specified, the list will be printed'
                              ' to the console.')
-    parser.add_argument('-p', '--snapshot_prefix', type=str, required=True,
-                        help='The prefix by which the snapshots are named; e.g. <snap_4.ka> would have <snap_>.')
+    parser.add_argument('-p', '--snapshot_prefix', type=str,
+                        help='The prefix by which the snapshots are named; e.g. <snap_4.ka> would have <snap_>. Required'
+                             ' unless reading from a trace.')
+    parser.add_argument('-t', '--trace_file', type=str,
+                        help='A trace file, as made by snapshot_trace_builder. If specified, the snapshots are read from'
+                             ' it, instead of from the directory, and each distinct species is analyzed only once.')
 
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes used to parse the snapshots; 0 uses all available cores.'
+                             ' Results are the same as in serial mode. Default value is 1.')
+    parser.add_argument('--cache', action='store_true',
+                        help='If set, keep a binary cache of each parsed snapshot next to it, and read from it in later'
+                             ' runs for as long as the snapshot is unchanged.')
     args = parser.parse_args()
+    if args.trace_file is None and args.snapshot_prefix is None:
+        parser.error('one of the arguments -p/--snapshot_prefix -t/--trace_file is required')
 
-    q = get_potential_of_folder(args.directory, args.enzyme_name, args.substrate_name, args.verbose, args.snapshot_prefix)
+    if args.trace_file:
+        q = get_potential_of_trace(args.trace_file, args.enzyme_name, args.substrate_name)
+    else:
+        q = get_potential_of_folder(args.directory, args.enzyme_name, args.substrate_name, args.verbose,
+                                    args.snapshot_prefix, use_cache=args.cache, workers=args.jobs)
 
     if args.output_file:
         with open(args.output_file, 'w') as out_file:
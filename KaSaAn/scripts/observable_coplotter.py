@@ -2,7 +2,7 @@
 
 import argparse
 import matplotlib.pyplot as plt
-from KaSaAn.functions import observable_coplot_axis_annotator
+from KaSaAn.functions import observable_coplot_axis_annotator, observable_ensemble_axis_annotator
 
 
 def main():
@@ -22,9 +22,28 @@ def main():
     parser.add_argument('-d', '--differential', action='store_true',
                         help="If passed, variable will be derived using numpy's diff method; useful for getting a rate"
                              " out of a counter generated by a rule's firing.")
+    parser.add_argument('--no_decimation', action='store_true',
+                        help='If passed, every data point is drawn. By default, series with more points than the figure'
+                             ' has pixels across are reduced to the first, last, lowest, and highest point of each'
+                             ' pixel column, which preserves peaks and steps while drawing much faster.')
+    parser.add_argument('-e', '--ensemble', action='store_true',
+                        help='If passed, plot the files as an ensemble of replicates: they are resampled onto a shared'
+                             ' time grid, and their mean, a band of one standard deviation around it, and a band'
+                             ' between two quantiles are plotted, instead of one line per file.')
+    parser.add_argument('-q', '--quantiles', type=float, nargs=2, default=[0.05, 0.95],
+                        help='In ensemble mode, the lower and upper quantiles bounding the outer band. Default values'
+                             ' are 0.05 and 0.95.')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='In ensemble mode, the number of worker processes used to read the files; 0 uses all'
+                             ' available cores. Default value is 1.')
     args = parser.parse_args()
     fig, ax = plt.subplots()
-    observable_coplot_axis_annotator(ax, args.pattern, args.variable, args.differential)
+    if args.ensemble:
+        observable_ensemble_axis_annotator(ax, args.pattern, args.variable, args.differential, workers=args.jobs,
+                                           quantiles=tuple(args.quantiles))
+    else:
+        observable_coplot_axis_annotator(ax, args.pattern, args.variable, args.differential,
+                                         decimation=not args.no_decimation)
     if args.out_file:
         fig.savefig(args.out_file)
     else:
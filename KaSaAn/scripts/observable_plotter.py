@@ -3,7 +3,8 @@
 import argparse
 import matplotlib as mpl
 import matplotlib.pyplot as plt
-from KaSaAn.functions import observable_file_reader, observable_list_axis_annotator
+from KaSaAn.functions import observable_file_reader, observable_legend_reader, observable_list_axis_annotator, \
+    observable_follow_axis_annotator
 
 
 def main():
@@ -29,20 +30,48 @@ def main():
     parser.add_argument('-d', '--differential', action='store_true',
                         help="If passed, variables will be derived using numpy's diff method; useful for getting a rate"
                              " out of a counter generated by a rule's firing.")
+    parser.add_argument('--no_decimation', action='store_true',
+                        help='If passed, every data point is drawn. By default, series with more points than the figure'
+                             ' has pixels across are reduced to the first, last, lowest, and highest point of each'
+                             ' pixel column, which preserves peaks and steps while drawing much faster.')
+    parser.add_argument('-f', '--follow', action='store_true',
+                        help='If passed, keep following the file as a running simulation appends to it: only the new'
+                             ' rows are parsed at each refresh, and the plot is updated in place. The history is kept'
+                             ' decimated to the width of the figure, so memory stays bounded. Needs a display, so it'
+                             ' can not be combined with an output file.')
+    parser.add_argument('-r', '--refresh_interval', type=float, default=1.0,
+                        help='In follow mode, the number of seconds between refreshes. Default value is 1.')
     args = parser.parse_args()
-
-    # parse data
-    this_data = observable_file_reader(args.input_file_name)
-    fig, ax = plt.subplots(figsize=args.fig_size, dpi=args.dots_per_inch)
-    observable_list_axis_annotator(obs_axis=ax, data=this_data, vars_to_plot=args.variables_to_plot,
-                                   diff_toggle=args.differential)
+    if args.follow and args.output_file_name:
+        parser.error('follow mode displays the figure, and can not save it to a file')
 
     # print out observables
     if args.print_observables_to_file:
         with open(args.print_observables_to_file, 'w') as file:
-            for obs in this_data[0]:
+            for obs in observable_legend_reader(args.input_file_name):
                 file.write(obs + '\n')
 
+    # follow the file as it grows, until the figure is closed; the animation must be kept referenced until then
+    if args.follow:
+        fig, ax = plt.subplots(figsize=args.fig_size, dpi=args.dots_per_inch)
+        animation = observable_follow_axis_annotator(obs_axis=ax, file_name=args.input_file_name,  # noqa: F841
+                                                     vars_to_plot=args.variables_to_plot,
+                                                     diff_toggle=args.differential,
+                                                     refresh_interval=args.refresh_interval)
+        plt.show()
+        return
+
+    # parse data; if variables were specified, only time and those are read, and they are renumbered accordingly
+    if args.variables_to_plot:
+        this_data = observable_file_reader(args.input_file_name, columns=[1] + args.variables_to_plot)
+        vars_to_plot = list(range(2, len(args.variables_to_plot) + 2))
+    else:
+        this_data = observable_file_reader(args.input_file_name)
+        vars_to_plot = args.variables_to_plot
+    fig, ax = plt.subplots(figsize=args.fig_size, dpi=args.dots_per_inch)
+    observable_list_axis_annotator(obs_axis=ax, data=this_data, vars_to_plot=vars_to_plot,
+                                   diff_toggle=args.differential, decimation=not args.no_decimation)
+
     # save or display the figure
     if args.output_file_name:
         fig.savefig(fname=args.output_file_name)
@@ -23,8 +23,20 @@ def main(args=None):
     parser.add_argument('-v', '--verbosity', action='store_true',
                         help='Print extra information, like number of snapshots found, directory understood, and'
                              ' file names used for output.')
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        help='If set, keep the results of each snapshot in a manifest file, [prefix]manifest.json, and'
+                             ' only parse the snapshots that are new or changed since the last run, e.g. while a'
+                             ' simulation is still running, or as replicates are added.')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes used to parse the snapshots; 0 uses all available cores.'
+                             ' Results are the same as in serial mode. Default value is 1.')
+    parser.add_argument('--cache', action='store_true',
+                        help='If set, keep a binary cache of each parsed snapshot next to it, and read from it in later'
+                             ' runs for as long as the snapshot is unchanged.')
     args = parser.parse_args()
-    prefixed_snapshot_analyzer(base_directory=args.working_directory, snap_prefix=args.prefix, verbosity=args.verbosity)
+    prefixed_snapshot_analyzer(base_directory=args.working_directory, snap_prefix=args.prefix, verbosity=args.verbosity,
+                               use_cache=args.cache, workers=args.jobs,
+                               incremental=args.incremental)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+
+from KaSaAn.functions import build_size_distribution_matrix
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    parser = argparse.ArgumentParser(description='Build the size distribution matrix of a series of snapshots sharing'
+                                                 ' a common prefix, with one row per snapshot, ordered by snapshot'
+                                                 ' time, and one column per complex size, and save it as a NumPy .npz'
+                                                 ' file. Plots and fits over the series can then load the matrix,'
+                                                 ' instead of re-parsing every snapshot.')
+    parser.add_argument('-d', '--directory', type=str, default='./',
+                        help='The directory containing the snapshots to be analyzed.')
+    parser.add_argument('-p', '--snapshot_prefix', type=str, default='',
+                        help='The prefix by which the snapshots are named; e.g. <snap_4.ka> would have <snap_>.')
+    parser.add_argument('-o', '--output_file', type=str,
+                        help='The name of the matrix file. If not specified, it will be saved in the same directory as'
+                             ' the snapshots, as [prefix]size_distribution.npz')
+    parser.add_argument('-s', '--sparse', action='store_true',
+                        help='If set, build and save the matrix in a sparse, CSR layout, instead of a dense array.'
+                             ' Recommended for long series with many distinct sizes.')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='If set, print additional information, like number of snapshots found, and current'
+                             ' snapshot being parsed.')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes used to parse the snapshots; 0 uses all available cores.'
+                             ' Results are the same as in serial mode. Default value is 1.')
+    parser.add_argument('--cache', action='store_true',
+                        help='If set, keep a binary cache of each parsed snapshot next to it, and read from it in later'
+                             ' runs for as long as the snapshot is unchanged.')
+    args = parser.parse_args()
+
+    build_size_distribution_matrix(args.directory, args.snapshot_prefix, args.output_file, sparse=args.sparse,
+                                   verbosity=args.verbose, use_cache=args.cache, workers=args.jobs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+
+from KaSaAn.functions import build_snapshot_trace
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    parser = argparse.ArgumentParser(description='Consolidate a series of snapshots, sharing a common prefix, into a'
+                                                 ' single memory-mapped trace file, holding the table of species seen'
+                                                 ' across the series, the abundances of each snapshot, and their times'
+                                                 ' and events. Analyses over the series can then read the trace,'
+                                                 ' instead of re-parsing every snapshot.')
+    parser.add_argument('-d', '--directory', type=str, default='./',
+                        help='The directory containing the snapshots to be consolidated.')
+    parser.add_argument('-p', '--snapshot_prefix', type=str, default='',
+                        help='The prefix by which the snapshots are named; e.g. <snap_4.ka> would have <snap_>.')
+    parser.add_argument('-o', '--output_file', type=str,
+                        help='The name of the trace file. If not specified, it will be saved in the same directory as'
+                             ' the snapshots, as [prefix]trace.bin')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='If set, print additional information, like number of snapshots found, and current'
+                             ' snapshot being consolidated.')
+    parser.add_argument('--cache', action='store_true',
+                        help='If set, keep a binary cache of each parsed snapshot next to it, and read from it in later'
+                             ' runs for as long as the snapshot is unchanged.')
+    parser.add_argument('--canonical', action='store_true',
+                        help='If set, identify species by their canonical form, merging those that only differ in the'
+                             ' numbering of their bonds or the order of their agents. Slower, as every distinct species'
+                             ' is parsed.')
+    args = parser.parse_args()
+
+    build_snapshot_trace(args.directory, args.snapshot_prefix, args.output_file, args.verbose, use_cache=args.cache,
+                         canonical_species=args.canonical)
+
+
+if __name__ == '__main__':
+    main()
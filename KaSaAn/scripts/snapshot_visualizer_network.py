@@ -37,6 +37,9 @@ def main():
                         help='Size of nodes; default of 300 as used by NetworkX.')
     parser.add_argument('-ew', '--edge_width', type=float, default=1.0,
                         help='Width of edges; default of 1.0 as used by NetworkX.')
+    parser.add_argument('--cache', action='store_true',
+                        help='If set, keep a binary cache of each parsed snapshot next to it, and read from it in later'
+                             ' runs for as long as the snapshot is unchanged.')
     args = parser.parse_args()
 
     # render graph
@@ -45,7 +48,8 @@ def main():
                                                  highlight_patterns=args.highlight_patterns,
                                                  fig_size=args.figure_size,
                                                  node_size=args.node_size,
-                                                 edge_width=args.edge_width)
+                                                 edge_width=args.edge_width,
+                                                 use_cache=args.cache)
 
     # save or display the figure(s)
     if args.output_file:
@@ -41,6 +41,9 @@ def main(args=None):
                              ' elements).')
     parser.add_argument('-dpi', '--dots_per_inch', type=float, default=mpl.rcParams['figure.dpi'],
                         help='Resolution of the figure, specified as dots per inch.')
+    parser.add_argument('--cache', action='store_true',
+                        help='If set, keep a binary cache of each parsed snapshot next to it, and read from it in later'
+                             ' runs for as long as the snapshot is unchanged.')
     args = parser.parse_args()
 
     # for user-defined coloring schemes, read the dictionary from a file, convert keys to KappaAgent
@@ -57,7 +60,8 @@ def main(args=None):
                                        color_scheme=coloring_scheme,
                                        vis_mode=args.visualization_mode,
                                        fig_size=args.fig_size,
-                                       fig_res=args.dots_per_inch)
+                                       fig_res=args.dots_per_inch,
+                                       use_cache=args.cache)
     # Either save figure to file, or plot it
     if args.output_file:
         fig.savefig(args.output_file, bbox_inches='tight')
@@ -43,6 +43,9 @@ def main():
                         help='Width of edges; default of 1.0 as used by NetworkX.')
     parser.add_argument('-d', '--print_size_distribution', action='store_true', default=False,
                         help='If given, program will print to std-out the size distribution in the snapshot.')
+    parser.add_argument('--cache', action='store_true',
+                        help='If set, keep a binary cache of each parsed snapshot next to it, and read from it in later'
+                             ' runs for as long as the snapshot is unchanged.')
     args = parser.parse_args()
 
     # render graph
@@ -53,7 +56,8 @@ def main():
                                                   fig_size=args.figure_size,
                                                   node_size=args.node_size,
                                                   edge_width=args.edge_width,
-                                                  print_distro=args.print_size_distribution)
+                                                  print_distro=args.print_size_distribution,
+                                                  use_cache=args.cache)
 
     # save or display the figure(s)
     if args.output_file:
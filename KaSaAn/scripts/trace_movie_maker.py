@@ -38,6 +38,18 @@ def main(args=None):
                         help='Number of mili-seconds between frames in the animation.')
     parser.add_argument('-v', '--verbose', action='store_true',
                         help='Display information about number of snapshots found.')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes used to parse the snapshots; 0 uses all available cores.'
+                             ' Results are the same as in serial mode. Default value is 1.')
+    parser.add_argument('--render', type=str, default='serial', choices=['serial', 'rgba', 'png'],
+                        help='How frames are drawn. With "serial", the default, they are drawn one after the other in'
+                             ' this process. With "rgba" or "png", they are rendered in parallel by the worker'
+                             ' processes set with -j, with the Agg backend, and handed back as raw RGBA buffers or'
+                             ' written as numbered PNG files; the movie is then assembled from them in order, and is'
+                             ' identical to a serial one, pixel for pixel.')
+    parser.add_argument('--frame_directory', type=str, default=None,
+                        help='With "--render png", the directory the numbered frames are written to. Default is a'
+                             ' "frames" directory within the snapshot directory.')
     args = parser.parse_args()
     # make the animation
     my_animation = movie_from_snapshots(directory=args.directory,
@@ -47,7 +59,10 @@ def main(args=None):
                                         dont_scale_mass=args.do_not_scale_mass,
                                         legend_cols=args.legend_columns,
                                         frame_int=args.frame_interval,
-                                        verbose=args.verbose)
+                                        verbose=args.verbose,
+                                        workers=args.jobs,
+                                        frame_rendering=args.render,
+                                        frame_directory=args.frame_directory)
     # Save to file, or show the figure
     if args.output_file:
         # Use the ImageMagick writer if a gif was requested; else use the default mpeg writer
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+
+import argparse
+import gc
+import glob
+import tracemalloc
+
+from KaSaAn.core import KappaSnapshot
+from KaSaAn.core.KappaScanner import clear_intern_tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the memory held by fully parsed KappaSnapshots; reports the'
+                                                 ' bytes allocated per agent, per file.')
+    parser.add_argument('-p', '--pattern', type=str, default='./models/*_snap.ka',
+                        help='Pattern, passed to glob.glob, matching the snapshots to parse.')
+    args = parser.parse_args()
+    for file_name in sorted(glob.glob(args.pattern)):
+        # start from empty intern tables, so the entities they hold are counted against this snapshot
+        clear_intern_tables()
+        gc.collect()
+        tracemalloc.start()
+        snap = KappaSnapshot(file_name)
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print('{}: {:.2f} MB, {} agents, {:.0f} bytes per agent'.format(
+            file_name, held / 1e6, snap.get_total_mass(), held / snap.get_total_mass()))
+
+
+if __name__ == '__main__':
+    main()
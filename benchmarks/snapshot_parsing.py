@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+import argparse
+import glob
+import timeit
+
+from KaSaAn.core import KappaSnapshot
+from KaSaAn.core.KappaScanner import clear_intern_tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the parsing of snapshot files into KappaSnapshots; reports the'
+                                                 ' best of several runs, per file.')
+    parser.add_argument('-p', '--pattern', type=str, default='./models/*_snap.ka',
+                        help='Pattern, passed to glob.glob, matching the snapshots to parse.')
+    parser.add_argument('-r', '--repeats', type=int, default=5,
+                        help='Number of times each snapshot is parsed; the fastest time is reported.')
+    parser.add_argument('-w', '--warm', action='store_true',
+                        help='Keep the intern tables of sites & agents between runs, instead of emptying them before'
+                             ' each one.')
+    args = parser.parse_args()
+    for file_name in sorted(glob.glob(args.pattern)):
+        setup = (lambda: None) if args.warm else clear_intern_tables
+        best = min(timeit.repeat(lambda: KappaSnapshot(file_name), setup=setup, number=1, repeat=args.repeats))
+        snap = KappaSnapshot(file_name)
+        print('{}: {:.4f} s, {} agents, {:.2f} us per agent'.format(
+            file_name, best, snap.get_total_mass(), 1e6 * best / snap.get_total_mass()))
+
+
+if __name__ == '__main__':
+    main()
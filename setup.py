@@ -19,6 +19,7 @@ setup(
         'numpy>=1.16<1.17',
         'squarify>=0.3.0<0.5.0',
         'networkx>=2.4<2.5',
+        'scipy>=1.3',
     ],
     python_requires='>=3.7<3.9',
     entry_points={
@@ -29,6 +30,8 @@ setup(
             'kappa_snapshot_visualizer_patchwork = KaSaAn.scripts.snapshot_visualizer_patchwork:main',
             'kappa_snapshot_visualizer_network = KaSaAn.scripts.snapshot_visualizer_network:main',
             'kappa_snapshot_visualizer_subcomponent = KaSaAn.scripts.snapshot_visualizer_subcomponent:main',
+            'kappa_snapshot_trace_builder = KaSaAn.scripts.snapshot_trace_builder:main',
+            'kappa_size_distribution_matrix_builder = KaSaAn.scripts.size_distribution_matrix_builder:main',
             'kappa_trace_movie_maker = KaSaAn.scripts.trace_movie_maker:main',
         ]
     }
@@ -5,5 +5,20 @@ from .test_KappaComplex import TestKappaComplex
 from .test_KappaCounter import TestKappaCounter
 from .test_KappaPort import TestKappaPort
 from .test_KappaRule import TestKappaRule
+from .test_KappaScanner import TestKappaScanner
 from .test_KappaSnapshot import TestKappaSnapshot
+from .test_KappaSnapshotReader import TestKappaSnapshotReader
 from .test_KappaToken import TestKappaToken
+from .test_SnapshotArrays import TestSnapshotArrays
+from .test_SnapshotTrace import TestSnapshotTrace
+from .test_AgentPatternBatch import TestAgentPatternBatch
+from .test_SpeciesIndex import TestSpeciesIndex
+from .test_ComplexPattern import TestComplexPattern
+from .test_snapshot_pool import TestSnapshotPool
+from .test_species_statistics import TestSpeciesStatistics
+from .test_AtomicWrite import TestAtomicWrite
+from .test_size_distribution_matrix import TestSizeDistributionMatrix
+from .test_observable_plotter import TestObservablePlotter
+from .test_observable_coplotter import TestObservableCoplotter
+from .test_trace_movie_maker import TestTraceMovieMaker
+from .test_prefixed_snapshot_analyzer import TestPrefixedSnapshotAnalyzer
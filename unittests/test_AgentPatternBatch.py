@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import unittest
+from KaSaAn.core import AgentPatternBatch, KappaAgent, KappaComplex, KappaSnapshot, KappaSnapshotReader
+
+
+class TestAgentPatternBatch(unittest.TestCase):
+    """Testing batches of patterns agree with querying one pattern at a time."""
+    snap_kte = KappaSnapshot('./models/kite_snap.ka')
+    snap_dim = KappaSnapshot('./models/dimerization_with_tokens_snap.ka')
+    kte_queries = ['A()', 'A(a{ph})', 'B(c{ph})', 'A(c[_])', 'A(c[.])', 'A(a{ub}[_] c[.])', 'B(b[#] c{ub})', 'C()',
+                   'A(a[1])', 'Bob()', KappaAgent('A(b[_])'), 'A(c{#}[_])', 'A(a{ph})']
+
+    def test_snapshot(self, ref_snap_kte=snap_kte, ref_snap_dim=snap_dim):
+        self.assertEqual(ref_snap_kte.get_abundances_of_agents(self.kte_queries),
+                         [ref_snap_kte.get_abundance_of_agent(query) for query in self.kte_queries])
+        self.assertEqual(ref_snap_kte.get_abundances_of_agents(['A(a{ph})', 'B(c{ph})', 'A(c[_])']), [5, 3, 3])
+        self.assertEqual(ref_snap_dim.get_abundances_of_agents(['Bob()', 'A()', 'A(a[.])', 'A(a[_])']),
+                         [0, 500, 18, 482])
+        self.assertEqual(KappaSnapshotReader('./models/kite_snap.ka').get_abundances_of_agents(self.kte_queries),
+                         ref_snap_kte.get_abundances_of_agents(self.kte_queries))
+
+    def test_complex(self):
+        kappa_complex = KappaComplex('A(a{ph}[1] b[.]), A(a{ub}[1] b[2]), B(x[2] y{p}[.])')
+        queries = ['A()', 'A(a{ph})', 'A(a[_])', 'A(b[_])', 'B(y{p}[.] x[_])', 'B(z[_])', 'A(a[1])', 'A(a[.])']
+        self.assertEqual(kappa_complex.get_numbers_of_embeddings_of_agents(queries),
+                         [kappa_complex.get_number_of_embeddings_of_agent(query) for query in queries])
+        self.assertEqual(kappa_complex.get_numbers_of_embeddings_of_agents(queries), [2, 1, 2, 1, 1, 0, 2, 0])
+        # counters are only tested against counters of the same name
+        kappa_complex = KappaComplex('A(a{ph}[1] b[.] c{=3}), A(a{ub}[1] b[2] c{=4}), B(x[2] y{p}[.])')
+        self.assertEqual(kappa_complex.get_numbers_of_embeddings_of_agents(['A(c{=3})', 'A(c{=3} b[.])', 'A(b[_])']),
+                         [1, 1, 1])
+
+    def test_reuse(self, ref_snap_kte=snap_kte, ref_snap_dim=snap_dim):
+        batch = AgentPatternBatch(['A()', 'A(a[_])', 'B()'])
+        self.assertEqual(batch.get_patterns(), [KappaAgent('A()'), KappaAgent('A(a[_])'), KappaAgent('B()')])
+        self.assertEqual(ref_snap_kte.get_abundances_of_agents(batch), [12, 12, 6])
+        self.assertEqual(ref_snap_dim.get_abundances_of_agents(batch), [500, 482, 0])
+        self.assertEqual(ref_snap_kte.get_abundances_of_agents(batch), [12, 12, 6])
+        self.assertEqual(AgentPatternBatch([]).count_in_snapshot(ref_snap_kte), [])
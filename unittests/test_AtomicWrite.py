@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+from KaSaAn.core import atomic_write
+
+
+class TestAtomicWrite(unittest.TestCase):
+    """Testing files written atomically get the umask's permissions, and leave nothing behind on error."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.temp_dir.name, 'target.txt')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_replace(self):
+        old_umask = os.umask(0o022)
+        try:
+            with atomic_write(self.file_name, 'w') as temp_file:
+                temp_file.write('first')
+            with atomic_write(self.file_name, 'w') as temp_file:
+                temp_file.write('second')
+        finally:
+            os.umask(old_umask)
+        with open(self.file_name, 'r') as target_file:
+            self.assertEqual(target_file.read(), 'second')
+        self.assertEqual(stat.S_IMODE(os.stat(self.file_name).st_mode), 0o644)
+        self.assertEqual(os.listdir(self.temp_dir.name), ['target.txt'])
+
+    def test_umask_untouched(self):
+        # the process-wide umask is never set, not even for a moment, as other threads would create files under it
+        with mock.patch('os.umask', side_effect=AssertionError('umask changed')):
+            with atomic_write(self.file_name, 'w') as temp_file:
+                temp_file.write('written')
+        with open(self.file_name, 'r') as target_file:
+            self.assertEqual(target_file.read(), 'written')
+
+    def test_error(self):
+        with atomic_write(self.file_name, 'w') as temp_file:
+            temp_file.write('kept')
+        with self.assertRaises(RuntimeError):
+            with atomic_write(self.file_name, 'w') as temp_file:
+                temp_file.write('partial')
+                raise RuntimeError('interrupted')
+        with open(self.file_name, 'r') as target_file:
+            self.assertEqual(target_file.read(), 'kept')
+        self.assertEqual(os.listdir(self.temp_dir.name), ['target.txt'])
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+import unittest
+from KaSaAn.core import ComplexPattern, KappaComplex, KappaSnapshot, KappaSnapshotReader
+
+
+class TestComplexPattern(unittest.TestCase):
+    """Testing the rigid-embedding matcher for multi-agent patterns."""
+    snap_kte = KappaSnapshot('./models/kite_snap.ka')
+
+    def test_count_in_complex(self):
+        kappa_complex = KappaComplex('A(a{ph}[1] b[.]), A(a{ub}[1] b[2]), B(x[2] y{p}[.])')
+        self.assertEqual(kappa_complex.get_number_of_embeddings_of_complex('A(a[1]), A(a[1])'), 2)
+        self.assertEqual(kappa_complex.get_number_of_embeddings_of_complex('A(a{ph}[1]), A(a[1])'), 1)
+        self.assertEqual(kappa_complex.get_number_of_embeddings_of_complex('A(b[1]), B(x[1] y{p})'), 1)
+        self.assertEqual(kappa_complex.get_number_of_embeddings_of_complex('A(b[1]), B(x[1] y{u})'), 0)
+        self.assertEqual(kappa_complex.get_number_of_embeddings_of_complex('A(a[2] b[.]), A(a[2] b[1]), B(x[1])'), 1)
+        self.assertEqual(kappa_complex.get_number_of_embeddings_of_complex('A(b[_])'),
+                         kappa_complex.get_number_of_embeddings_of_agent('A(b[_])'))
+        # a bond in the pattern must be the same bond in the complex
+        self.assertEqual(kappa_complex.get_number_of_embeddings_of_complex(KappaComplex('A(a[1] b[.]), B(x[1])')), 0)
+        # cycles
+        self.assertEqual(KappaComplex('A(a[1] b[1])').get_number_of_embeddings_of_complex('A(a[1] b[1])'), 1)
+        self.assertEqual(KappaComplex('A(a[1] b[2]), A(a[2] b[1])').get_number_of_embeddings_of_complex('A(a[1] b[1])'),
+                         0)
+
+    def test_count_in_snapshot(self, ref_snap_kte=snap_kte):
+        pattern = ComplexPattern('A(b[1]), A(a[1])')
+        self.assertEqual(pattern.get_pattern_composition(), {'A': 2})
+        self.assertEqual(ref_snap_kte.get_number_of_embeddings_of_complex(pattern), 12)
+        self.assertEqual(pattern.count_in_snapshot(KappaSnapshotReader('./models/kite_snap.ka')), 12)
+        self.assertEqual(ref_snap_kte.get_number_of_embeddings_of_complex('A(a{ph}[1]), A(b[1])'), 5)
+        self.assertEqual(ref_snap_kte.get_number_of_embeddings_of_complex('C(b[1]), B(c[1])'), 1)
+        self.assertEqual(ref_snap_kte.get_number_of_embeddings_of_complex('C(b[1]), Bob(c[1])'), 0)
+        # the ring of four A, in each of its four rotations, in complexes of abundance 1 and 2
+        ring = 'A(a[4] b[1]), A(a[1] b[2]), A(a[2] b[3]), A(a[3] b[4])'
+        self.assertEqual(ref_snap_kte.get_number_of_embeddings_of_complex(ring), 12)
+        lazy_kte = KappaSnapshot('./models/kite_snap.ka', lazy=True)
+        self.assertEqual(lazy_kte.get_number_of_embeddings_of_complex('C(b[1]), B(c[1])'), 1)
+        self.assertEqual(lazy_kte._species_complexes[1], None)
+
+    def test_invalid_patterns(self):
+        with self.assertRaises(ValueError):
+            ComplexPattern('A(b[1]), B(a[.])')
+        with self.assertRaises(ValueError):
+            ComplexPattern('A(b[.]), B(a[.])')
@@ -58,3 +58,21 @@ class TestKappaComplex(unittest.TestCase):
                          get_number_of_embeddings_of_agent('bob(bob[#])'), 1)
         self.assertEqual(KappaComplex('Bob(bob[.]), bob(bob{ph}), jane(bob{un}[_])').
                          get_number_of_embeddings_of_agent('jane(bob{#})'), 1)
+
+    def test_canonical_form(self):
+        kappa_complex = KappaComplex('A(a{ph}[1] b[.] c{=3}), A(a{ub}[1] b[2]), B(x[2] y{p}[.])')
+        relabeled = KappaComplex('B(y{p}[.] x[7]), A(b[7] a{ub}[3]), A(a{ph}[3] b[.] c{=3})')
+        self.assertNotEqual(kappa_complex, relabeled)
+        self.assertTrue(kappa_complex.is_isomorphic(relabeled))
+        self.assertEqual(kappa_complex.get_canonical_hash(), relabeled.get_canonical_hash())
+        self.assertEqual(kappa_complex.get_canonical_expression(),
+                         'A(a[1]{ph} b[.]{#} c{=3}), A(a[1]{ub} b[2]{#}), B(x[2]{#} y[.]{p})')
+        self.assertEqual(KappaComplex(kappa_complex.get_canonical_expression()).get_canonical_expression(),
+                         kappa_complex.get_canonical_expression())
+        # same agents, other bonds
+        self.assertFalse(kappa_complex.is_isomorphic(
+            KappaComplex('A(a{ph}[1] b[2] c{=3}), A(a{ub}[1] b[.]), B(x[2] y{p}[.])')))
+        # rings are told apart from chains, whatever agent they are written from
+        ring = KappaComplex('A(l[1] r[2]), A(l[2] r[3]), A(l[3] r[1])')
+        self.assertTrue(ring.is_isomorphic(KappaComplex('A(r[9] l[4]), A(l[9] r[5]), A(r[4] l[5])')))
+        self.assertFalse(ring.is_isomorphic(KappaComplex('A(l[.] r[2]), A(l[2] r[3]), A(l[3] r[.])')))
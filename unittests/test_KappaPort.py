@@ -59,6 +59,14 @@ class TestKappaPort(unittest.TestCase):
         self.assertEqual(KappaPort('jane[1/.]').get_port_bond_operation(), 'deletion')
         self.assertEqual(KappaPort('jane[1/2]').get_port_bond_operation(), 'swap')
         self.assertEqual(KappaPort('jane[2]').get_port_bond_operation(), '')
+        self.assertEqual(KappaPort('jane[_/1]').get_port_bond_operation(), 'unknown')
+        self.assertEqual(KappaPort('jane[./.]').get_port_bond_operation(), '')
+        self.assertEqual(KappaPort('jane[./.]').get_port_bond_state(), './.')
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(KappaPort('jane[1/2]{ph/un}'), '__dict__'))
+        with self.assertRaises(AttributeError):
+            KappaPort('jane[2]').new_attribute = 'value'
 
     def test_has_bond_operation(self):
         self.assertTrue(KappaPort('_b[./1]{ph/un}').has_bond_operation())
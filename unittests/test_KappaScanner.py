@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import unittest
+from KaSaAn.core import KappaPort, KappaCounter, KappaAgent, KappaComplex
+from KaSaAn.core.KappaScanner import scan_site, scan_agents, scan_agent_type, clear_intern_tables, split_snapshot, \
+    scan_species_entry, scan_token_entry
+
+
+def slot_values(entity) -> dict:
+    """Returns the values of all the attributes an entity declares as __slots__, through its class hierarchy."""
+    return dict([(name, getattr(entity, name)) for cls in type(entity).__mro__ for name in getattr(cls, '__slots__', ())])
+
+
+class TestKappaScanner(unittest.TestCase):
+    """Test the single-pass scanner yields the same entities as the regular initializers."""
+    def test_scan_site(self):
+        for expression in ['a[.]', 'a{ph}[3]', 'a[3]{ph}', '~b[_]', '_c[#]{#}', 'd', 'e{ph/un}[./1]', 'f[x]']:
+            self.assertEqual(slot_values(scan_site(expression)), slot_values(KappaPort(expression)))
+        for expression in ['c{=5}', 'c{>=5}', 'c{=5/+=1}']:
+            self.assertEqual(slot_values(scan_site(expression)), slot_values(KappaCounter(expression)))
+        with self.assertRaises(ValueError):
+            scan_site('a[')
+
+    def test_scan_agents(self):
+        agents = scan_agents('A(b[1]  c{ph}[.],d{=2}), B(a[1])')
+        self.assertEqual([slot_values(agent)['_raw_expression'] for agent in agents], ['A(b[1] c{ph}[.],d{=2})', 'B(a[1])'])
+        self.assertEqual([str(agent) for agent in agents], ['A(b[1]{#} c[.]{ph} d{=2})', 'B(a[1]{#})'])
+        self.assertEqual(agents, [KappaAgent('A(b[1]  c{ph}[.],d{=2})'), KappaAgent('B(a[1])')])
+        self.assertEqual(scan_agents('no agents here'), [])
+
+    def test_interning(self):
+        clear_intern_tables()
+        cx_1 = KappaComplex('A(a[1] b{ph}[.]), A(a[1] b{ph}[.])')
+        cx_2 = KappaComplex('A(a[1] b{ph}[.]), B(a[1])')
+        # agents with bond identifiers are built anew, around the shared sites without bond identifiers
+        self.assertIsNot(cx_1.get_all_agents()[0], cx_1.get_all_agents()[1])
+        self.assertEqual(cx_1.get_all_agents()[0], cx_2.get_all_agents()[0])
+        self.assertIs(scan_site('b{ph}[.]'), cx_1.get_all_agents()[0].get_agent_signature()[1])
+        self.assertIs(scan_site('b{ph}[.]'), cx_2.get_all_agents()[0].get_agent_signature()[1])
+        self.assertIsNot(scan_site('a[1]'), cx_1.get_all_agents()[0].get_agent_signature()[0])
+        # agents without bond identifiers are shared whole, within and across complexes
+        cx_3 = KappaComplex('A(a[.] b{ph}[.])')
+        self.assertIs(scan_agents('A(a[.] b{ph}[.])')[0], cx_3.get_all_agents()[0])
+        self.assertIs(scan_agent_type('A'), list(cx_1.get_agent_types())[0])
+        self.assertEqual(slot_values(scan_agent_type('A')), slot_values(KappaAgent('A()')))
+        # emptying the tables does not alter the entities, only their sharing
+        clear_intern_tables()
+        self.assertIsNot(scan_agents('A(a[.] b{ph}[.])')[0], cx_3.get_all_agents()[0])
+        self.assertEqual(scan_agents('A(a[.] b{ph}[.])')[0], cx_3.get_all_agents()[0])
+        self.assertIsNot(scan_site('b{ph}[.]'), cx_1.get_all_agents()[0].get_agent_signature()[1])
+
+    def test_split_snapshot(self):
+        lines = ['// Snapshot [Event: 1]\n', '%init: 2 /*2 agents*/ A(a[1]),\n', '  A(a[1])\n', '%init: 3 X\n']
+        self.assertEqual(list(split_snapshot(lines)),
+                         ''.join(lines).replace('\n', '').split('%init: '))
+
+    def test_scan_entries(self):
+        self.assertEqual(scan_species_entry('2 /*2 agents*/ A(a[1]),  A(a[1])'), (2, 2, 'A(a[1]),  A(a[1])'))
+        self.assertIsNone(scan_species_entry('3 X'))
+        self.assertEqual(scan_token_entry('3.5 X'), '3.5 X')
+        self.assertIsNone(scan_token_entry('2 /*2 agents*/ A(a[1]),  A(a[1])'))
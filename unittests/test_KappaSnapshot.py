@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
 
+import os
+import shutil
+import tempfile
 import unittest
+import warnings
+import networkx as nx
 from KaSaAn.core import KappaSnapshot, KappaComplex, KappaAgent, KappaToken
 
 
@@ -125,6 +130,17 @@ class TestKappaSnapshot(unittest.TestCase):
         self.assertEqual(ref_snap_kte.get_composition(),
                          {KappaAgent('A()'): 12, KappaAgent('B()'): 6, KappaAgent('C()'): 1})
 
+    def test_get_composition_matrix(self, ref_snap_kte=snap_kte):
+        lazy_snap = KappaSnapshot('./models/kite_snap.ka', lazy=True)
+        for snap in [ref_snap_kte, lazy_snap]:
+            composition_matrix, agent_types = snap.get_composition_matrix()
+            self.assertEqual(agent_types, [KappaAgent('A()'), KappaAgent('B()'), KappaAgent('C()')])
+            self.assertEqual(composition_matrix.shape, (len(snap.get_all_abundances()), 3))
+            self.assertEqual(composition_matrix.sum(axis=1).A1.tolist(), snap.get_all_sizes())
+        self.assertEqual(lazy_snap.get_composition_matrix()[0].toarray().tolist(),
+                         ref_snap_kte.get_composition_matrix()[0].toarray().tolist())
+        self.assertFalse(lazy_snap.is_materialized())
+
     def test_get_complexes_with_abundance(self, ref_snap_abc=snap_abc, ref_snap_dim=snap_dim):
         self.assertEqual(ref_snap_abc.get_complexes_with_abundance(10), [])
         self.assertEqual(ref_snap_abc.get_complexes_with_abundance(190),
@@ -220,3 +236,83 @@ class TestKappaSnapshot(unittest.TestCase):
         self.assertEqual(ref_snap_dim.to_networkx().number_of_edges(), 241)
         self.assertEqual(ref_snap_kte.to_networkx().number_of_nodes(), 19)
         self.assertEqual(ref_snap_kte.to_networkx().number_of_edges(), 19)
+        # copies of a species are stamped from one template, as if each had been added with add_node and add_edge
+        reference = nx.MultiGraph()
+        for cx, cx_ab in ref_snap_kte.get_all_complexes_and_abundances():
+            for _ in range(cx_ab):
+                reference = nx.disjoint_union(reference, cx.to_networkx())
+        snapshot_graph = ref_snap_kte.to_networkx()
+        self.assertEqual(list(snapshot_graph.nodes(data=True)), list(reference.nodes(data=True)))
+        self.assertEqual(list(snapshot_graph.edges(keys=True, data=True)), list(reference.edges(keys=True, data=True)))
+        snapshot_graph.nodes[7]['kappa'] = None
+        self.assertIsNotNone(snapshot_graph.nodes[13]['kappa'])
+
+    def test_lazy_mode(self, ref_snap_abc=snap_abc, ref_snap_kte=snap_kte):
+        lazy_abc = KappaSnapshot('./models/alphabet_soup_snap.ka', lazy=True)
+        self.assertFalse(lazy_abc.is_materialized())
+        self.assertEqual(lazy_abc.get_size_distribution(), ref_snap_abc.get_size_distribution())
+        self.assertEqual(lazy_abc.get_all_sizes(), ref_snap_abc.get_all_sizes())
+        self.assertEqual(lazy_abc.get_all_abundances(), ref_snap_abc.get_all_abundances())
+        self.assertEqual(lazy_abc.get_total_mass(), ref_snap_abc.get_total_mass())
+        self.assertEqual(lazy_abc.get_composition(), ref_snap_abc.get_composition())
+        self.assertEqual(lazy_abc.get_agent_types_present(), ref_snap_abc.get_agent_types_present())
+        self.assertEqual(lazy_abc.get_complexes_of_size(4), ref_snap_abc.get_complexes_of_size(4))
+        self.assertFalse(lazy_abc.is_materialized())
+        lazy_kte = KappaSnapshot('./models/kite_snap.ka', lazy=True)
+        self.assertEqual(lazy_kte.get_all_complexes(), ref_snap_kte.get_all_complexes())
+        self.assertTrue(lazy_kte.is_materialized())
+        self.assertEqual(str(lazy_kte), str(ref_snap_kte))
+
+    def test_duplicate_species(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snap_name = os.path.join(temp_dir, 'duplicates_snap.ka')
+            with open(snap_name, 'w') as snap_file:
+                snap_file.write('// Snapshot [Event: 1]\n// "uuid" : "000000000"\n%def: "T0" "1"\n\n'
+                                '%init: 2 /*1 agents*/ A(a[.])\n%init: 3 /*1 agents*/ A(a[.])\n'
+                                '%init: 1 /*2 agents*/ A(a[1]), A(a[1])\n')
+            # a species listed twice is one species, with the sum of its abundances, however the snapshot is read
+            for snap in [KappaSnapshot(snap_name), KappaSnapshot(snap_name, lazy=True),
+                         KappaSnapshot(snap_name, use_cache=True), KappaSnapshot(snap_name, use_cache=True)]:
+                self.assertEqual(snap.get_all_abundances(), [5, 1])
+                self.assertEqual(snap.get_total_mass(), 7)
+                self.assertEqual(snap.get_abundance_of_agent('A()'), 7)
+                self.assertEqual(snap.to_arrays().species_abundances.tolist(), [5, 1])
+                self.assertEqual(len(snap.get_all_complexes()), 2)
+                self.assertEqual(snap.to_networkx().number_of_nodes(), 7)
+
+    def test_cache(self, ref_snap_dim=snap_dim):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snap_name = os.path.join(temp_dir, 'dimerization_with_tokens_snap.ka')
+            shutil.copy('./models/dimerization_with_tokens_snap.ka', snap_name)
+            # cold read writes the sidecar, warm read loads from it
+            KappaSnapshot(snap_name, use_cache=True)
+            self.assertTrue(os.path.isfile(snap_name + '.cache.npz'))
+            warm = KappaSnapshot(snap_name, use_cache=True)
+            self.assertEqual(str(warm), str(ref_snap_dim))
+            self.assertEqual(warm.get_snapshot_time(), ref_snap_dim.get_snapshot_time())
+            self.assertEqual(warm.get_snapshot_uuid(), ref_snap_dim.get_snapshot_uuid())
+            self.assertEqual(warm.get_all_tokens_and_values(), ref_snap_dim.get_all_tokens_and_values())
+            # arrays are added to the sidecar once built
+            warm.to_arrays()
+            self.assertIsNotNone(KappaSnapshot(snap_name, lazy=True, use_cache=True)._arrays)
+            # a changed snapshot invalidates its sidecar, even if of the same size
+            with open(snap_name, 'r') as snap_file:
+                contents = snap_file.read()
+            with open(snap_name, 'w') as snap_file:
+                snap_file.write(contents.replace('%init: 241 /*2 agents*/', '%init: 242 /*2 agents*/'))
+            with self.assertWarns(UserWarning):
+                self.assertEqual(KappaSnapshot(snap_name, use_cache=True).get_all_abundances(), [242, 18])
+            # a snapshot only touched still validates by hash
+            stat = os.stat(snap_name)
+            os.utime(snap_name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            with warnings.catch_warnings():
+                warnings.simplefilter('error')
+                self.assertEqual(KappaSnapshot(snap_name, use_cache=True).get_all_abundances(), [242, 18])
+            # a rewrite keeping both size and modification time, as a copy preserving timestamps would, is still caught
+            stat = os.stat(snap_name)
+            with open(snap_name, 'w') as snap_file:
+                snap_file.write(contents.replace('%init: 241 /*2 agents*/', '%init: 243 /*2 agents*/'))
+            os.utime(snap_name, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            self.assertEqual(os.stat(snap_name).st_size, stat.st_size)
+            with self.assertWarns(UserWarning):
+                self.assertEqual(KappaSnapshot(snap_name, use_cache=True).get_all_abundances(), [243, 18])
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+import unittest
+from KaSaAn.core import KappaSnapshot, KappaSnapshotReader, KappaComplex, KappaToken, iter_snapshot
+
+
+class TestKappaSnapshotReader(unittest.TestCase):
+    """Testing the streaming reader agrees with the in-memory KappaSnapshot."""
+    snap_dim = KappaSnapshot('./models/dimerization_with_tokens_snap.ka')
+    snap_kte = KappaSnapshot('./models/kite_snap.ka')
+    read_dim = KappaSnapshotReader('./models/dimerization_with_tokens_snap.ka')
+    read_kte = KappaSnapshotReader('./models/kite_snap.ka')
+
+    def test_header(self, ref_read_dim=read_dim, ref_snap_dim=snap_dim):
+        self.assertEqual(ref_read_dim.get_snapshot_file_name(), ref_snap_dim.get_snapshot_file_name())
+        self.assertEqual(ref_read_dim.get_snapshot_time(), ref_snap_dim.get_snapshot_time())
+        self.assertEqual(ref_read_dim.get_snapshot_uuid(), ref_snap_dim.get_snapshot_uuid())
+        self.assertEqual(ref_read_dim.get_snapshot_event(), ref_snap_dim.get_snapshot_event())
+
+    def test_iter_entries(self):
+        self.assertEqual(list(iter_snapshot('./models/dimerization_with_tokens_snap.ka')),
+                         [(KappaComplex('A(a[1]), A(a[1])'), 241), (KappaComplex('A(a[.])'), 18),
+                          (KappaToken('241 X'), 241.0)])
+
+    def test_iter_complexes_and_abundances(self, ref_read_kte=read_kte, ref_snap_kte=snap_kte):
+        self.assertEqual(list(ref_read_kte.iter_complexes_and_abundances()),
+                         list(ref_snap_kte.get_all_complexes_and_abundances()))
+
+    def test_aggregations(self, ref_read_kte=read_kte, ref_snap_kte=snap_kte, ref_read_dim=read_dim,
+                          ref_snap_dim=snap_dim):
+        for reader, snap in [(ref_read_kte, ref_snap_kte), (ref_read_dim, ref_snap_dim)]:
+            self.assertEqual(reader.get_size_distribution(), snap.get_size_distribution())
+            self.assertEqual(reader.get_total_mass(), snap.get_total_mass())
+            self.assertEqual(reader.get_composition(), snap.get_composition())
+            self.assertEqual(reader.get_agent_types_present(), snap.get_agent_types_present())
+            self.assertEqual(reader.get_all_tokens_and_values(), snap.get_all_tokens_and_values())
+        self.assertEqual(ref_read_kte.get_abundance_of_agent('A(a{ph})'), 5)
+        self.assertEqual(ref_read_dim.get_abundance_of_agent('A(a[_])'), 482)
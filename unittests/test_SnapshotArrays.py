@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import unittest
+import numpy as np
+from KaSaAn.core import KappaSnapshot, KappaSnapshotReader, SnapshotArrays
+
+
+class TestSnapshotArrays(unittest.TestCase):
+    """Testing the columnar arrays agree with the KappaSnapshot they come from."""
+    snap_kte = KappaSnapshot('./models/kite_snap.ka', lazy=True)
+    snap_abc = KappaSnapshot('./models/alphabet_soup_snap.ka', lazy=True)
+
+    def test_layout(self):
+        arrays = SnapshotArrays.from_species([(3, 2, 'B(x[1] y{ph}[.]), A(a[1], c{=4})'), (5, 1, 'A(a[_])')])
+        self.assertEqual(arrays.species_offsets.tolist(), [0, 2, 3])
+        self.assertEqual(arrays.species_abundances.tolist(), [3, 5])
+        self.assertEqual(arrays.agent_type_names, ['A', 'B'])
+        self.assertEqual(arrays.agent_types.tolist(), [1, 0, 0])
+        self.assertEqual(arrays.site_offsets.tolist(), [0, 2, 4, 5])
+        self.assertEqual([arrays.site_name_table[i] for i in arrays.site_names], ['x', 'y', 'a', 'c', 'a'])
+        self.assertEqual([arrays.site_state_table[i] for i in arrays.site_states], ['#', 'ph', '#', '=4', '#'])
+        self.assertEqual(arrays.site_bond_partners.tolist(),
+                         [2, SnapshotArrays.FREE, 0, SnapshotArrays.NOT_A_PORT, SnapshotArrays.BOUND_TO_ANY])
+        self.assertEqual(arrays.bonds.tolist(), [[0, 2]])
+        self.assertEqual(arrays.get_species_bond_counts().tolist(), [1, 0])
+
+    def test_malformed_species(self):
+        with self.assertRaises(ValueError):
+            SnapshotArrays.from_species([(1, 3, 'A(a[1]), A(a[1])')])
+        with self.assertRaises(ValueError):
+            SnapshotArrays.from_species([(1, 2, 'A(a[1]), A(a[2])')])
+
+    def test_reductions(self, ref_snap_kte=snap_kte, ref_snap_abc=snap_abc):
+        for snap in [ref_snap_kte, ref_snap_abc]:
+            arrays = snap.to_arrays()
+            self.assertEqual(arrays.get_size_distribution(), snap.get_size_distribution())
+            self.assertEqual(arrays.get_total_mass(), snap.get_total_mass())
+            self.assertEqual(arrays.get_composition(), snap.get_composition())
+            self.assertEqual(arrays.get_species_sizes().tolist(), snap.get_all_sizes())
+        # bond partners are symmetric
+        arrays = ref_snap_abc.to_arrays()
+        self.assertTrue(np.array_equal(arrays.site_bond_partners[arrays.bonds[:, 0]], arrays.bonds[:, 1]))
+        self.assertTrue(np.array_equal(arrays.site_bond_partners[arrays.bonds[:, 1]], arrays.bonds[:, 0]))
+
+    def test_bonds(self, ref_snap_kte=snap_kte):
+        arrays = ref_snap_kte.to_arrays()
+        self.assertEqual(arrays.get_species_bond_counts().tolist(),
+                         [kappa_complex.get_number_of_bonds() for kappa_complex in ref_snap_kte.get_all_complexes()])
+
+    def test_composition_matrix(self, ref_snap_kte=snap_kte):
+        arrays = ref_snap_kte.to_arrays()
+        self.assertEqual(arrays.get_composition_matrix().toarray().tolist(),
+                         ref_snap_kte.get_composition_matrix()[0].toarray().tolist())
+
+    def test_edge_array(self, ref_snap_kte=snap_kte):
+        arrays = SnapshotArrays.from_species([(3, 2, 'B(x[1] y{ph}[.]), A(a[1], c{=4})'), (5, 1, 'A(a[_])')])
+        edges, agent_types, edge_sites = arrays.get_edge_array(with_sites=True)
+        self.assertEqual(edges.dtype, np.int32)
+        self.assertEqual(edges.tolist(), [[0, 1], [2, 3], [4, 5]])
+        self.assertEqual(agent_types.tolist(), [1, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0])
+        self.assertEqual([[arrays.site_name_table[i] for i in row] for row in edge_sites], [['x', 'a']] * 3)
+        self.assertIsNone(arrays.get_edge_array()[2])
+        adjacency = arrays.get_sparse_adjacency()
+        self.assertEqual(adjacency.shape, (11, 11))
+        self.assertEqual((adjacency != adjacency.T).nnz, 0)
+        self.assertEqual(adjacency[0, 1], 1)
+        # the kite, against its expanded networkx graph
+        edges, agent_types, _ = ref_snap_kte.to_edge_array()
+        graph = KappaSnapshot('./models/kite_snap.ka').to_networkx()
+        self.assertEqual(len(agent_types), graph.number_of_nodes())
+        self.assertEqual(len(edges), graph.number_of_edges())
+        self.assertEqual(sorted(np.bincount(agent_types).tolist()),
+                         sorted(ref_snap_kte.get_composition().values()))
+        self.assertEqual(sorted(ref_snap_kte.to_sparse_adjacency().sum(axis=1).A1.tolist()),
+                         sorted([degree for _, degree in graph.degree()]))
+
+    def test_from_reader(self, ref_snap_kte=snap_kte):
+        from_reader = KappaSnapshotReader('./models/kite_snap.ka').to_arrays()
+        from_snapshot = ref_snap_kte.to_arrays()
+        for attribute in ['species_offsets', 'species_abundances', 'agent_types', 'site_offsets', 'site_names',
+                          'site_states', 'site_bond_partners', 'bonds']:
+            self.assertTrue(np.array_equal(getattr(from_reader, attribute), getattr(from_snapshot, attribute)))
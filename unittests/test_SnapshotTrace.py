@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import tempfile
+import unittest
+import numpy as np
+from KaSaAn.core import KappaSnapshot, SnapshotTrace
+from KaSaAn.functions import get_potential_of_snapshot, get_potential_of_trace
+
+
+class TestSnapshotTrace(unittest.TestCase):
+    """Testing a consolidated trace agrees with the snapshots it was built from."""
+    snap_names = ['./models/kite_snap.ka', './models/dimerization_with_tokens_snap.ka', './models/kite_snap.ka']
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.trace = SnapshotTrace.from_snapshots(self.snap_names, os.path.join(self.temp_dir.name, 'trace.bin'))
+
+    def tearDown(self):
+        del self.trace
+        self.temp_dir.cleanup()
+
+    def test_index(self):
+        snaps = [KappaSnapshot(snap_name, lazy=True) for snap_name in self.snap_names]
+        self.assertEqual(self.trace.get_number_of_snapshots(), 3)
+        self.assertEqual(self.trace.get_snapshot_times().tolist(), [snap.get_snapshot_time() for snap in snaps])
+        self.assertEqual(self.trace.get_snapshot_events().tolist(), [snap.get_snapshot_event() for snap in snaps])
+        self.assertEqual(self.trace.get_snapshot_uuids(), [snap.get_snapshot_uuid() for snap in snaps])
+        self.assertEqual(self.trace.get_snapshot_file_names(), [snap.get_snapshot_file_name() for snap in snaps])
+
+    def test_species_table(self):
+        # a repeated snapshot adds no species to the table
+        kite = KappaSnapshot('./models/kite_snap.ka', lazy=True)
+        dimer = KappaSnapshot('./models/dimerization_with_tokens_snap.ka', lazy=True)
+        self.assertEqual(self.trace.get_number_of_species(),
+                         len(kite.get_all_abundances()) + len(dimer.get_all_abundances()))
+        species, abundances = self.trace.get_snapshot_entries(2)
+        self.assertEqual(species.tolist(), list(range(len(kite.get_all_abundances()))))
+        self.assertEqual(abundances.tolist(), kite.get_all_abundances())
+        self.assertEqual([self.trace.get_species_complex(i) for i in species], kite.get_all_complexes())
+        self.assertEqual(self.trace.get_abundance_vector(1).sum(), sum(dimer.get_all_abundances()))
+        # slices are mapped from the file
+        self.assertIsInstance(abundances, np.memmap)
+        with self.assertRaises(ValueError):
+            abundances[0] = 0
+
+    def test_reductions(self):
+        snaps = [KappaSnapshot(snap_name, lazy=True) for snap_name in self.snap_names]
+        self.assertEqual(self.trace.get_total_masses().tolist(), [snap.get_total_mass() for snap in snaps])
+        for snap_index, snap in enumerate(snaps):
+            self.assertEqual(self.trace.get_size_distribution(snap_index), snap.get_size_distribution())
+        mean_dist = self.trace.get_mean_size_distribution()
+        self.assertEqual(sum(mean_dist.values()) * 3, sum([sum(snap.get_all_abundances()) for snap in snaps]))
+        self.assertEqual(get_potential_of_trace(self.trace, 'A()', 'B()'),
+                         [get_potential_of_snapshot(snap_name, 'A()', 'B()') for snap_name in self.snap_names])
+
+    def test_tokens(self):
+        dimer = KappaSnapshot('./models/dimerization_with_tokens_snap.ka', lazy=True)
+        self.assertEqual(self.trace.get_token_names(), dimer.get_token_names())
+        token_values = self.trace.get_token_values()
+        self.assertEqual(token_values[1].tolist(), list(dimer.get_all_tokens_and_values().values()))
+        self.assertTrue(np.isnan(token_values[0]).all())
+
+    def test_reopen(self):
+        reopened = SnapshotTrace(os.path.join(self.temp_dir.name, 'trace.bin'))
+        self.assertEqual(reopened.get_species_expressions(), self.trace.get_species_expressions())
+        self.assertEqual(reopened.get_total_masses().tolist(), self.trace.get_total_masses().tolist())
+        with self.assertRaises(ValueError):
+            SnapshotTrace('./models/kite_snap.ka')
+        empty = SnapshotTrace.from_snapshots([], os.path.join(self.temp_dir.name, 'empty.bin'))
+        self.assertEqual(empty.get_number_of_snapshots(), 0)
+        self.assertEqual(empty.get_total_masses().tolist(), [])
+
+    def test_canonical_species(self):
+        # the kite, with its bonds renumbered
+        relabeled_name = os.path.join(self.temp_dir.name, 'kite_relabeled.ka')
+        with open('./models/kite_snap.ka') as kite_file, open(relabeled_name, 'w') as relabeled_file:
+            relabeled_file.write(re.sub(r'\[(\d+)\]', lambda g: '[' + str(int(g.group(1)) + 10) + ']', kite_file.read()))
+        snap_names = ['./models/kite_snap.ka', relabeled_name]
+        raw = SnapshotTrace.from_snapshots(snap_names, os.path.join(self.temp_dir.name, 'raw.bin'))
+        canonical = SnapshotTrace.from_snapshots(snap_names, os.path.join(self.temp_dir.name, 'canonical.bin'),
+                                                 canonical_species=True)
+        self.assertEqual(raw.get_number_of_species(), 4)
+        self.assertEqual(canonical.get_number_of_species(), 2)
+        self.assertEqual(canonical.get_snapshot_entries(0)[0].tolist(), canonical.get_snapshot_entries(1)[0].tolist())
+        self.assertEqual(canonical.get_total_masses().tolist(), raw.get_total_masses().tolist())
+        kite = KappaSnapshot('./models/kite_snap.ka')
+        self.assertEqual(kite.get_canonical_abundances(), KappaSnapshot(relabeled_name).get_canonical_abundances())
+        self.assertEqual(sorted(kite.get_canonical_abundances().values()), sorted(kite.get_all_abundances()))
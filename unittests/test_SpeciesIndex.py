@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import unittest
+from KaSaAn.core import KappaSnapshot, SpeciesIndex
+
+
+class TestSpeciesIndex(unittest.TestCase):
+    """Testing the inverted index agrees with scanning the whole snapshot."""
+    snap_kte = KappaSnapshot('./models/kite_snap.ka')
+    kte_queries = ['A()', 'A(a{ph})', 'B(c{ph})', 'A(c[_])', 'A(c[.])', 'A(a{ub}[_] c[.])', 'B(b[#] c{ub})', 'C()',
+                   'A(a[1])', 'A(a[4] c[.])', 'Bob()', 'A(b[_])', 'A(c{#}[_])', 'B(c{ph}[.])', 'A(zz[.])']
+
+    def test_postings(self, ref_snap_kte=snap_kte):
+        index = ref_snap_kte.get_species_index()
+        self.assertIs(type(index), SpeciesIndex)
+        self.assertIs(ref_snap_kte.get_species_index(), index)
+        self.assertEqual(index.get_agent_names(), ['A', 'B', 'C'])
+        species, multiplicities = index.get_species_with_agent('C')
+        self.assertEqual((species.tolist(), multiplicities.tolist()), ([0], [1]))
+        species, multiplicities = index.get_species_with_agent('A')
+        self.assertEqual((species.tolist(), multiplicities.tolist()), ([0, 1], [4, 4]))
+        self.assertEqual(index.get_species_with_agent('Bob')[0].tolist(), [])
+        species, multiplicities = index.get_species_with_site('B', 'c{ph}[_]')
+        self.assertEqual((species.tolist(), multiplicities.tolist()), ([0, 1], [1, 1]))
+        species, multiplicities = index.get_species_with_site('B', 'c[.]')
+        self.assertEqual((species.tolist(), multiplicities.tolist()), ([1], [1]))
+        species, multiplicities = index.get_species_with_site('A', 'a{ph}')
+        self.assertEqual((species.tolist(), multiplicities.tolist()), ([0, 1], [3, 1]))
+
+    def test_candidates(self, ref_snap_kte=snap_kte):
+        index = ref_snap_kte.get_species_index()
+        self.assertTrue(index.is_exact('A(a{ph})'))
+        self.assertFalse(index.is_exact('A(a[1])'))
+        self.assertFalse(index.is_exact('A(a{ph} c[.])'))
+        species, multiplicities = index.get_candidate_species('B(c{ub}[.])')
+        self.assertEqual((species.tolist(), multiplicities.tolist()), ([1], [1]))
+        self.assertEqual(index.get_candidate_species('C(b[.])')[0].tolist(), [])
+        self.assertEqual(index.get_abundance_of_agent('A(a{ph})'), 5)
+        with self.assertRaises(ValueError):
+            index.get_abundance_of_agent('A(a{ph} c[.])')
+
+    def test_queries(self):
+        # the reference scans every complex, as it has no index
+        ref_snap_kte = KappaSnapshot('./models/kite_snap.ka')
+        lazy_kte = KappaSnapshot('./models/kite_snap.ka', lazy=True)
+        lazy_kte.get_species_index()
+        self.assertFalse(lazy_kte.is_materialized())
+        self.assertEqual([lazy_kte.get_abundance_of_agent(query) for query in self.kte_queries],
+                         [ref_snap_kte.get_abundance_of_agent(query) for query in self.kte_queries])
+        self.assertEqual(lazy_kte.get_complexes_with_agent('C()'), ref_snap_kte.get_complexes_of_size(7))
+        self.assertEqual(lazy_kte.get_complexes_with_agent('B(c{ph}[.])'), [])
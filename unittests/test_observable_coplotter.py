@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from matplotlib.figure import Figure
+from KaSaAn.functions import get_ensemble_statistics, observable_ensemble_axis_annotator
+from KaSaAn.functions.observable_coplotter import read_observable_time_span, resample_step
+
+header = '# Output of \'KaSim -i model.ka\'\n"uuid" : "000000000"\n"[T]","A()"\n'
+
+
+class TestObservableCoplotter(unittest.TestCase):
+    """Testing replicates are resampled as step functions, and reduced into ensemble statistics."""
+
+    def test_resample_step(self):
+        times = np.array([1.0, 2.0, 4.0])
+        values = np.array([10, 20, 40])
+        time_grid = np.array([0.0, 1.0, 1.5, 2.0, 3.9, 4.0, 4.5])
+        resampled = resample_step(times, values, time_grid)
+        # each value holds until the next time point; outside the span, NaN
+        np.testing.assert_array_equal(resampled, [np.nan, 10, 10, 20, 20, 40, np.nan])
+        self.assertEqual(resampled.dtype, np.float64)
+
+    def test_get_ensemble_statistics(self):
+        time_grid = np.array([0.0, 1.0, 2.0, 3.0])
+        series_list = [(np.array([0.0, 3.0]), np.array([1.0, 4.0])),
+                       (np.array([0.0, 1.0, 2.0]), np.array([3.0, 5.0, 7.0]))]
+        statistics = get_ensemble_statistics(series_list, time_grid, quantiles=(0.0, 1.0))
+        np.testing.assert_array_equal(statistics['time'], time_grid)
+        # the second replicate ends before the last grid point, which only the first covers
+        np.testing.assert_array_equal(statistics['replicates'], [2, 2, 2, 1])
+        np.testing.assert_array_equal(statistics['mean'], [2.0, 3.0, 4.0, 4.0])
+        np.testing.assert_array_equal(statistics['std'], [1.0, 2.0, 3.0, 0.0])
+        np.testing.assert_array_equal(statistics['lower quantile'], [1.0, 1.0, 1.0, 4.0])
+        np.testing.assert_array_equal(statistics['upper quantile'], [3.0, 5.0, 7.0, 4.0])
+        # derived over the grid, each rate is timed at the later grid point; NaNs spread to the rates they touch
+        statistics = get_ensemble_statistics(series_list, time_grid, quantiles=(0.0, 1.0), diff_toggle=True)
+        np.testing.assert_array_equal(statistics['time'], [1.0, 2.0, 3.0])
+        np.testing.assert_array_equal(statistics['replicates'], [2, 2, 1])
+        np.testing.assert_array_equal(statistics['mean'], [1.0, 1.0, 3.0])
+        np.testing.assert_array_equal(statistics['lower quantile'], [0.0, 0.0, 3.0])
+        np.testing.assert_array_equal(statistics['upper quantile'], [2.0, 2.0, 3.0])
+
+    def test_observable_ensemble_axis_annotator(self):
+        rng = np.random.default_rng(1)
+        series_list = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for replicate in range(4):
+                times = np.sort(rng.uniform(0, 10, 200))
+                times[0] = replicate * 0.5
+                values = rng.integers(0, 100, 200).astype(float)
+                series_list.append((times, values))
+                with open(os.path.join(temp_dir, 'data_' + str(replicate) + '.csv'), 'w') as data_file:
+                    data_file.write(header)
+                    data_file.write(''.join([repr(float(t)) + ',' + repr(float(v)) + '\n'
+                                             for t, v in zip(times, values)]))
+            with open(os.path.join(temp_dir, 'data_4.csv'), 'w') as data_file:
+                data_file.write(header)
+            self.assertIsNone(read_observable_time_span(os.path.join(temp_dir, 'data_4.csv')))
+            self.assertEqual(read_observable_time_span(os.path.join(temp_dir, 'data_3.csv')),
+                             (series_list[3][0][0], series_list[3][0][-1]))
+            for diff_toggle in [False, True]:
+                ax = Figure().add_subplot()
+                with self.assertWarns(UserWarning):
+                    statistics = observable_ensemble_axis_annotator(ax, os.path.join(temp_dir, 'data_*.csv'), 2,
+                                                                    diff_toggle, workers=2, grid_points=50)
+                time_grid = np.linspace(min([times[0] for times, _ in series_list]),
+                                        max([times[-1] for times, _ in series_list]), 50)
+                reference = get_ensemble_statistics(series_list, time_grid, diff_toggle=diff_toggle)
+                for key, reference_values in reference.items():
+                    np.testing.assert_array_equal(statistics[key], reference_values)
+                self.assertEqual(ax.get_title(), 'A()')
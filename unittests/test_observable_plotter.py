@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+import unittest.mock
+import numpy as np
+from matplotlib.figure import Figure
+from KaSaAn.functions import observable_file_reader, observable_file_tail_reader, observable_list_axis_annotator, \
+    observable_follow_axis_annotator
+from KaSaAn.functions.observable_plotter import decimate_min_max
+from KaSaAn.functions import observable_plotter
+
+header = '# Output of \'KaSim -i model.ka\'\n"uuid" : "000000000"\n"[T]","A()","B()","AB"\n'
+
+
+class TestObservablePlotter(unittest.TestCase):
+    """Testing the parsing of kappa output files, and the reduction of the series plotted from them."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.temp_dir.name, 'data.csv')
+        rows = np.column_stack([np.linspace(0, 10, 101), np.arange(101) * 3, 1000 - np.arange(101) ** 2,
+                                np.sin(np.arange(101)) * 0.125])
+        self.rows = rows
+        with open(self.file_name, 'w') as data_file:
+            data_file.write(header)
+            data_file.write(''.join([','.join([repr(float(value)) for value in row]) + '\n' for row in rows]))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_observable_file_reader(self):
+        leg_data, num_data = observable_file_reader(self.file_name)
+        self.assertEqual(leg_data, ['[T]', 'A()', 'B()', 'AB'])
+        np.testing.assert_array_equal(num_data, np.loadtxt(self.file_name, delimiter=',', skiprows=3))
+        np.testing.assert_array_equal(num_data, self.rows)
+        # selected columns come in the order asked for
+        leg_data, num_data = observable_file_reader(self.file_name, columns=[4, 1, 2])
+        self.assertEqual(leg_data, ['AB', '[T]', 'A()'])
+        np.testing.assert_array_equal(num_data, self.rows[:, [3, 0, 1]])
+        with self.assertRaises(ValueError):
+            observable_file_reader(self.file_name, columns=[5])
+
+    def test_observable_file_reader_last_line(self):
+        # a file whose last line lacks its newline still yields that row
+        with open(self.file_name, 'rb+') as data_file:
+            data_file.seek(-1, os.SEEK_END)
+            data_file.truncate()
+        _, num_data = observable_file_reader(self.file_name)
+        np.testing.assert_array_equal(num_data, self.rows)
+        # chunks too small to hold a line, or cutting lines at every point, are joined back into lines
+        for chunk_bytes in [5, 17, 64]:
+            with unittest.mock.patch.object(observable_plotter, '_OBSERVABLE_CHUNK_BYTES', chunk_bytes):
+                _, num_data = observable_file_reader(self.file_name, columns=[1, 3])
+            np.testing.assert_array_equal(num_data, self.rows[:, [0, 2]])
+        # a header alone gives no rows
+        with open(self.file_name, 'w') as data_file:
+            data_file.write(header)
+        self.assertEqual(observable_file_reader(self.file_name)[1].shape, (0, 4))
+
+    def test_observable_file_tail_reader(self):
+        with open(self.file_name, 'rb') as data_file:
+            contents = data_file.read()
+        header_end = len(header)
+        # a last line being written is left for the next call, whose offset resumes at its start
+        line_end = contents.index(b'\n', header_end + 100) + 1
+        cut = line_end + 4
+        with open(self.file_name, 'wb') as data_file:
+            data_file.write(contents[:cut])
+        leg_data, num_data, offset = observable_file_tail_reader(self.file_name, columns=[1, 4])
+        self.assertEqual(leg_data, ['[T]', 'AB'])
+        rows_read = len(num_data)
+        self.assertEqual(offset, line_end)
+        self.assertEqual(rows_read, contents[:line_end].count(b'\n') - 3)
+        np.testing.assert_array_equal(num_data, self.rows[:rows_read, [0, 3]])
+        with open(self.file_name, 'wb') as data_file:
+            data_file.write(contents)
+        _, num_data, offset = observable_file_tail_reader(self.file_name, offset, columns=[1, 4])
+        np.testing.assert_array_equal(num_data, self.rows[rows_read:, [0, 3]])
+        self.assertEqual(offset, len(contents))
+        # nothing new
+        _, num_data, offset = observable_file_tail_reader(self.file_name, offset)
+        self.assertEqual(num_data.shape, (0, 4))
+        self.assertEqual(offset, len(contents))
+        # a file overwritten by a shorter one is read from its start
+        with open(self.file_name, 'wb') as data_file:
+            data_file.write(contents[:contents.index(b'\n', header_end) + 1])
+        _, num_data, offset = observable_file_tail_reader(self.file_name, len(contents))
+        np.testing.assert_array_equal(num_data, self.rows[:1])
+        # a header not yet complete gives no legend, no rows, and an offset of zero
+        for header_part in [b'', contents[:20], contents[:header_end - 1]]:
+            with open(self.file_name, 'wb') as data_file:
+                data_file.write(header_part)
+            leg_data, num_data, offset = observable_file_tail_reader(self.file_name, columns=[1, 2])
+            self.assertEqual((leg_data, num_data.shape, offset), ([], (0, 2), 0))
+
+    def test_observable_follow_axis_annotator(self):
+        with open(self.file_name, 'rb') as data_file:
+            contents = data_file.read()
+        os.remove(self.file_name)
+        ax = Figure().add_subplot()
+        with unittest.mock.patch.object(observable_plotter, 'FuncAnimation') as animation:
+            observable_follow_axis_annotator(ax, self.file_name, [2, 4], diff_toggle=False)
+        refresh = animation.call_args[0][1]
+        # neither the file nor its header are there yet
+        self.assertEqual(refresh(1), [])
+        with open(self.file_name, 'wb') as data_file:
+            data_file.write(contents[:len(header) - 1])
+        self.assertEqual(refresh(2), [])
+        with open(self.file_name, 'wb') as data_file:
+            data_file.write(contents)
+        lines = refresh(3)
+        self.assertEqual([line.get_label() for line in lines], ['A()', 'AB'])
+        np.testing.assert_array_equal(lines[1].get_xdata(), self.rows[:, 0])
+        np.testing.assert_array_equal(lines[1].get_ydata(), self.rows[:, 3])
+
+    def test_decimate_min_max_short(self):
+        # four points per bin or fewer are left alone
+        x_data = np.arange(40.0)
+        y_data = np.cos(x_data)
+        x_kept, y_kept = decimate_min_max(x_data, y_data, 10)
+        self.assertIs(x_kept, x_data)
+        self.assertIs(y_kept, y_data)
+
+    def test_decimate_min_max(self):
+        rng = np.random.default_rng(0)
+        x_data = np.sort(rng.uniform(0, 1, 5000))
+        y_data = rng.normal(size=5000)
+        y_data[1234] = 50.0
+        number_of_bins = 20
+        x_kept, y_kept = decimate_min_max(x_data, y_data, number_of_bins)
+        self.assertLessEqual(len(x_kept), 4 * number_of_bins)
+        self.assertTrue(np.all(np.diff(x_kept) > 0))
+        self.assertIn(50.0, y_kept)
+        # per bin, exactly its first, last, and first lowest and highest points are kept
+        point_bins = np.minimum(((x_data - x_data[0]) * (number_of_bins / (x_data[-1] - x_data[0]))).astype(int),
+                                number_of_bins - 1)
+        expected = []
+        for bin_index in range(number_of_bins):
+            bin_points = np.flatnonzero(point_bins == bin_index)
+            bin_y = y_data[bin_points]
+            expected.extend(sorted({bin_points[0], bin_points[-1], bin_points[np.argmin(bin_y)],
+                                    bin_points[np.argmax(bin_y)]}))
+        np.testing.assert_array_equal(x_kept, x_data[expected])
+        np.testing.assert_array_equal(y_kept, y_data[expected])
+
+    def test_decimate_min_max_nan(self):
+        x_data = np.arange(100.0)
+        y_data = np.arange(100.0) % 7
+        # a bin of NaNs only keeps its ends; NaNs in a bin do not hide its extremes
+        y_data[10:20] = np.nan
+        y_data[25] = np.nan
+        x_kept, y_kept = decimate_min_max(x_data, y_data, 10)
+        np.testing.assert_array_equal(x_kept[(x_kept >= 10) & (x_kept < 20)], [10, 19])
+        bin_2 = (x_kept >= 20) & (x_kept < 30)
+        self.assertEqual(np.nanmin(y_kept[bin_2]), np.nanmin(y_data[20:30]))
+        self.assertEqual(np.nanmax(y_kept[bin_2]), np.nanmax(y_data[20:30]))
+
+    def test_decimation_after_derivative(self):
+        x_data = np.linspace(0, 100, 20001)
+        num_data = np.column_stack([x_data, np.sin(x_data) * x_data])
+        ax = Figure(figsize=(2, 2), dpi=50).add_subplot()
+        observable_list_axis_annotator(ax, (['[T]', 'A'], num_data), [2], diff_toggle=True)
+        number_of_bins = int(np.ceil(ax.get_window_extent().width))
+        x_plot, y_plot = ax.get_lines()[0].get_data()
+        self.assertLess(len(x_plot), 1000)
+        x_expected, y_expected = decimate_min_max(x_data[1:], np.diff(num_data[:, 1]) / np.diff(x_data), number_of_bins)
+        np.testing.assert_array_equal(x_plot, x_expected)
+        np.testing.assert_array_equal(y_plot, y_expected)
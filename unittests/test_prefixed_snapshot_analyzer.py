@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+import importlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+from KaSaAn.functions.prefixed_snapshot_analyzer import MANIFEST_VERSION, prefixed_snapshot_analyzer, reduce_snapshot
+
+# the package re-exports the analyzer function under the name of its module, so the module is fetched explicitly
+analyzer_module = importlib.import_module('KaSaAn.functions.prefixed_snapshot_analyzer')
+
+
+class TestPrefixedSnapshotAnalyzer(unittest.TestCase):
+    """Testing incremental runs of the prefixed snapshot analyzer only parse new or changed snapshots, and write the
+    same files as a full run."""
+    model_names = ['./models/kite_snap.ka', './models/dimerization_with_tokens_snap.ka', './models/kite_snap.ka']
+    output_names = ['snap_distribution_cumulative.csv', 'snap_distribution_mean.csv', 'snap_total_complexes.csv',
+                    'snap_largest_complex_stats.csv']
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_directory = self.temp_dir.name + '/'
+        self.manifest_file_name = self.base_directory + 'snap_manifest.json'
+        for index, model_name in enumerate(self.model_names):
+            shutil.copy(model_name, self.base_directory + 'snap_' + str(index) + '.ka')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_analyzer(self, incremental: bool = True):
+        """Runs the analyzer, returning the names of the snapshots it parsed, and the contents of its output files."""
+        with mock.patch.object(analyzer_module, 'reduce_snapshot', wraps=reduce_snapshot) as reducer:
+            prefixed_snapshot_analyzer(self.base_directory, 'snap_', verbosity=False, incremental=incremental)
+        parsed_names = [os.path.basename(call.args[0]) for call in reducer.call_args_list]
+        outputs = []
+        for output_name in self.output_names:
+            with open(self.base_directory + output_name, 'r') as output_file:
+                outputs.append(output_file.read())
+        return parsed_names, outputs
+
+    def load_manifest_names(self):
+        with open(self.manifest_file_name, 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertEqual(manifest['version'], MANIFEST_VERSION)
+        return sorted(os.path.basename(snap_name) for snap_name in manifest['snapshots'].keys())
+
+    def test_first_run(self):
+        self.assertFalse(os.path.isfile(self.manifest_file_name))
+        parsed_names, outputs = self.run_analyzer()
+        self.assertEqual(parsed_names, ['snap_0.ka', 'snap_1.ka', 'snap_2.ka'])
+        self.assertEqual(self.load_manifest_names(), ['snap_0.ka', 'snap_1.ka', 'snap_2.ka'])
+        # same files as without a manifest
+        self.assertEqual(self.run_analyzer(incremental=False)[1], outputs)
+
+    def test_touched_snapshot(self):
+        first_outputs = self.run_analyzer()[1]
+        snap_name = self.base_directory + 'snap_1.ka'
+        stat = os.stat(snap_name)
+        os.utime(snap_name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        parsed_names, outputs = self.run_analyzer()
+        self.assertEqual(parsed_names, ['snap_1.ka'])
+        self.assertEqual(outputs, first_outputs)
+        # nothing left to parse afterwards
+        self.assertEqual(self.run_analyzer()[0], [])
+
+    def test_deleted_snapshot(self):
+        self.run_analyzer()
+        os.remove(self.base_directory + 'snap_2.ka')
+        parsed_names, outputs = self.run_analyzer()
+        self.assertEqual(parsed_names, [])
+        self.assertEqual(self.load_manifest_names(), ['snap_0.ka', 'snap_1.ka'])
+        self.assertEqual(self.run_analyzer(incremental=False)[1], outputs)
+
+    def test_other_version(self):
+        first_outputs = self.run_analyzer()[1]
+        with open(self.manifest_file_name, 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+        manifest['version'] = MANIFEST_VERSION - 1
+        with open(self.manifest_file_name, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            parsed_names, outputs = self.run_analyzer()
+        self.assertEqual(parsed_names, ['snap_0.ka', 'snap_1.ka', 'snap_2.ka'])
+        self.assertEqual(outputs, first_outputs)
+        self.assertEqual(self.load_manifest_names(), ['snap_0.ka', 'snap_1.ka', 'snap_2.ka'])
+
+    def test_corrupt_manifest(self):
+        first_outputs = self.run_analyzer()[1]
+        with open(self.manifest_file_name, 'w') as manifest_file:
+            manifest_file.write('{"version": ')
+        with self.assertWarns(UserWarning):
+            parsed_names, outputs = self.run_analyzer()
+        self.assertEqual(parsed_names, ['snap_0.ka', 'snap_1.ka', 'snap_2.ka'])
+        self.assertEqual(outputs, first_outputs)
+        self.assertEqual(self.load_manifest_names(), ['snap_0.ka', 'snap_1.ka', 'snap_2.ka'])
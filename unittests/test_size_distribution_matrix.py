@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from scipy.sparse import csr_matrix
+from KaSaAn.functions import build_size_distribution_matrix, load_size_distribution_matrix
+
+
+class TestSizeDistributionMatrix(unittest.TestCase):
+    """Testing the size distribution matrix of a series of model snapshots, and its round-trip through file."""
+    # snapshot name, model it is copied from, and the time written into its header; names and times disagree in order
+    series = [('snap_1.ka', './models/kite_snap.ka', '30'),
+              ('snap_2.ka', './models/dimerization_with_tokens_snap.ka', '10'),
+              ('snap_10.ka', './models/kite_snap.ka', '20')]
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        for snap_name, model_name, snap_time in self.series:
+            with open(model_name, 'r') as model_file:
+                lines = model_file.readlines()
+            lines[2] = '%def: "T0" "' + snap_time + '"\n'
+            with open(os.path.join(self.temp_dir.name, snap_name), 'w') as snap_file:
+                snap_file.writelines(lines)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_dense(self):
+        times, events, sizes, matrix, snap_names = build_size_distribution_matrix(self.temp_dir.name, 'snap_')
+        # rows ordered by header time, not by name
+        self.assertEqual(times.tolist(), [10.0, 20.0, 30.0])
+        self.assertEqual(events.tolist(), [9953, 1, 1])
+        self.assertEqual([os.path.basename(snap_name) for snap_name in snap_names],
+                         ['snap_2.ka', 'snap_10.ka', 'snap_1.ka'])
+        self.assertEqual(sizes.tolist(), [1, 2, 6, 7])
+        self.assertIsInstance(matrix, np.ndarray)
+        self.assertEqual(matrix.tolist(), [[18, 241, 0, 0], [0, 0, 2, 1], [0, 0, 2, 1]])
+        # saved next to the snapshots, and loaded back as built
+        loaded = load_size_distribution_matrix(os.path.join(self.temp_dir.name, 'snap_size_distribution.npz'))
+        for built_array, loaded_array in zip([times, events, sizes, matrix], loaded[:4]):
+            np.testing.assert_array_equal(built_array, loaded_array)
+        self.assertEqual(loaded[4], snap_names)
+
+    def test_sparse(self):
+        matrix_file_name = os.path.join(self.temp_dir.name, 'matrix.npz')
+        dense = build_size_distribution_matrix(self.temp_dir.name, 'snap_')[3]
+        times, events, sizes, matrix, snap_names = build_size_distribution_matrix(
+            self.temp_dir.name, 'snap_', matrix_file_name=matrix_file_name, sparse=True, workers=2)
+        self.assertIsInstance(matrix, csr_matrix)
+        np.testing.assert_array_equal(matrix.toarray(), dense)
+        loaded_matrix = load_size_distribution_matrix(matrix_file_name)[3]
+        self.assertIsInstance(loaded_matrix, csr_matrix)
+        np.testing.assert_array_equal(loaded_matrix.toarray(), dense)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from functools import partial
+from KaSaAn.functions.prefixed_snapshot_analyzer import find_snapshots, reduce_snapshot
+from KaSaAn.functions.snapshot_pool import map_snapshots
+
+
+def _marked_reduce_snapshot(snap_name: str, marker_directory: str):
+    """Leaves a marker file when called, so the parent can count how many snapshots were handed out."""
+    open(os.path.join(marker_directory, os.path.basename(snap_name) + '.started'), 'w').close()
+    return reduce_snapshot(snap_name)
+
+
+class TestSnapshotPool(unittest.TestCase):
+    """Testing snapshots mapped in parallel give the results of serial mode, in order, and a bounded window."""
+    model_names = ['./models/kite_snap.ka', './models/dimerization_with_tokens_snap.ka']
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        for index in range(7):
+            shutil.copy(self.model_names[index % 2], os.path.join(self.temp_dir.name, 'snap_' + str(index) + '.ka'))
+        self.snap_names = find_snapshots(self.temp_dir.name, 'snap_')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parallel_matches_serial(self):
+        serial = list(map_snapshots(reduce_snapshot, self.snap_names, workers=1))
+        parallel = list(map_snapshots(reduce_snapshot, self.snap_names, workers=2))
+        self.assertEqual(len(serial), 7)
+        self.assertEqual(parallel, serial)
+        # results follow the order of the names, alternating between the two models copied
+        self.assertEqual(serial, [reduce_snapshot(self.model_names[index % 2]) for index in range(7)])
+
+    def test_bounded_window(self):
+        marker_directory = os.path.join(self.temp_dir.name, 'markers')
+        os.mkdir(marker_directory)
+        workers = 2
+        results = map_snapshots(partial(_marked_reduce_snapshot, marker_directory=marker_directory),
+                                self.snap_names, workers=workers)
+        for result_index, result in enumerate(results):
+            # a slow consumer lets every submitted snapshot finish, but no more get submitted
+            time.sleep(0.2)
+            self.assertLessEqual(len(os.listdir(marker_directory)), result_index + 2 * workers)
+            self.assertEqual(result, reduce_snapshot(self.model_names[result_index % 2]))
+        self.assertEqual(len(os.listdir(marker_directory)), 7)
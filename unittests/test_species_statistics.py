@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import unittest
+import networkx as nx
+import numpy as np
+from KaSaAn.core import KappaSnapshot
+from KaSaAn.functions import get_snapshot_statistics
+from KaSaAn.functions.species_statistics import get_graph_diameter
+
+
+class TestSpeciesStatistics(unittest.TestCase):
+    """Testing graph diameters agree with networkx, and snapshot statistics with the kite model."""
+
+    def assert_diameter(self, edges, number_of_nodes):
+        reference = nx.MultiGraph()
+        reference.add_nodes_from(range(number_of_nodes))
+        reference.add_edges_from(edges)
+        self.assertEqual(get_graph_diameter(np.array(edges, dtype=np.int64).reshape(-1, 2), number_of_nodes),
+                         nx.diameter(reference))
+
+    def test_get_graph_diameter(self):
+        # a ring, and one spanning more than a block of sources
+        self.assert_diameter([(i, (i + 1) % 9) for i in range(9)], 9)
+        self.assert_diameter([(i, (i + 1) % 1200) for i in range(1200)], 1200)
+        # a chain whose end agent is bound to itself
+        self.assert_diameter([(0, 1), (1, 2), (2, 3), (3, 3)], 4)
+        # a doubly bound pair, in a star
+        self.assert_diameter([(0, 1), (0, 1), (0, 2), (0, 3), (3, 4)], 5)
+        # a single agent
+        self.assertEqual(get_graph_diameter(np.zeros((0, 2), dtype=np.int64), 1), 0)
+
+    def test_get_snapshot_statistics(self):
+        snapshot = KappaSnapshot('./models/kite_snap.ka')
+        species_statistics = dict()
+        statistics = get_snapshot_statistics(snapshot, species_statistics)
+        self.assertEqual(statistics['number of species'], 2)
+        self.assertEqual(statistics['degree distribution'], {1: 3, 2: 13, 3: 3})
+        self.assertEqual(statistics['cycle rank distribution'], {1: 3})
+        reference_diameters = dict()
+        for kappa_complex, abundance in snapshot.get_all_complexes_and_abundances():
+            diameter = nx.diameter(kappa_complex.to_networkx())
+            reference_diameters[diameter] = reference_diameters.get(diameter, 0) + abundance
+        self.assertEqual(statistics['diameter distribution'], reference_diameters)
+        self.assertEqual(sum(statistics['bond type counts'].values()), 19)
+        # statistics are kept per species, and reused
+        self.assertEqual(len(species_statistics), 2)
+        self.assertEqual(get_snapshot_statistics(snapshot, species_statistics), statistics)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+import unittest
+import matplotlib.pyplot as plt
+import numpy as np
+from KaSaAn.functions import movie_from_snapshots
+from KaSaAn.functions import trace_movie_maker
+
+
+class TestTraceMovieMaker(unittest.TestCase):
+    """Testing frames rendered ahead by workers are those drawn serially, at the resolution asked for."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        for index, model_name in enumerate(['./models/kite_snap.ka', './models/dimerization_with_tokens_snap.ka',
+                                            './models/kite_snap.ka']):
+            shutil.copy(model_name, os.path.join(self.temp_dir.name, 'snapshot.' + str(index) + '.ka'))
+
+    def tearDown(self):
+        plt.close('all')
+        self.temp_dir.cleanup()
+
+    def get_frames(self, frame_rendering: str, workers: int) -> list:
+        movie = movie_from_snapshots(self.temp_dir.name, 'mass', 4, 1.0, False, 2, 100, False, workers=workers,
+                                     frame_rendering=frame_rendering, dpi=30,
+                                     frame_directory=os.path.join(self.temp_dir.name, 'frames'))
+        frames = []
+        for frame in movie.new_saved_frame_seq():
+            movie._draw_next_frame(frame, blit=False)
+            frames.append(np.asarray(movie._fig.canvas.buffer_rgba()).copy())
+        plt.close(movie._fig)
+        return frames
+
+    def test_frame_rendering(self):
+        serial_frames = self.get_frames('serial', 1)
+        self.assertEqual(len(serial_frames), 3)
+        self.assertEqual(serial_frames[0].shape, (60, 120, 4))
+        for frame_rendering, workers in [('rgba', 1), ('rgba', 2), ('png', 1)]:
+            frames = self.get_frames(frame_rendering, workers)
+            self.assertEqual(len(frames), 3)
+            for serial_frame, frame in zip(serial_frames, frames):
+                np.testing.assert_array_equal(frame, serial_frame)
+            # the figure frames were rendered on in this process is let go once the movie ends
+            self.assertIsNone(trace_movie_maker._frame_canvas['figure'])